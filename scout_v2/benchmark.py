@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Offline scout benchmark.
+
+Serves synthetic channel pages (ytd-rich-item-renderer grids with lazy-loaded
+infinite scroll and fake 1of10-style "N.Nx" badges) and a stand-in for the
+Supabase REST API from one local HTTP server, points run() at them, and
+reports channels/minute, p50/p95 per-channel latency, peak browser memory and
+DB round trips for every concurrency x channel-size combination. Nothing
+touches YouTube or production Supabase. With SCOUT_STORAGE=local the scout
+writes to a throwaway embedded store instead of the stand-in REST API.
+
+Usage:
+    [SCOUT_STORAGE=local] python benchmark.py [--channels 16] [--sizes 60,600] [--concurrency 2,4,8]
+                        [--page-latency-ms 300] [--adaptive] [--headless] [--json results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# Must be set before main/db/dedup_index are imported
+_server_port = int(os.environ.get("SCOUT_BENCH_PORT", 8765))
+os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{_server_port}"
+os.environ["SUPABASE_KEY"] = "bench-key"
+os.environ.setdefault("SCOUT_FETCH", "browser")  # The synthetic pages have no ytInitialData
+os.environ.setdefault("SCOUT_SNAPSHOT_DIR", os.path.join(tempfile.mkdtemp(), "snapshots"))
+os.environ.setdefault("SCOUT_DEDUP_INDEX_PATH", os.path.join(tempfile.mkdtemp(), "dedup_index.sqlite"))
+os.environ.setdefault("SCOUT_LOCAL_DB", os.path.join(tempfile.mkdtemp(), "scout.sqlite"))
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from main import run  # noqa: E402
+from browser_pool import BrowserManager, chromium_rss_mb  # noqa: E402
+from storage import get_storage  # noqa: E402
+from concurrency import AdaptiveLimiter  # noqa: E402
+
+BATCH_SIZE = 30  # Items YouTube appends per continuation
+
+CHANNEL_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>__NAME__</title>
+<style>ytd-rich-item-renderer { display: block; height: 240px; }</style></head>
+<body>
+<ytd-channel-header-renderer><span id="text">__NAME__</span><img id="img" src="/avatar.png"></ytd-channel-header-renderer>
+<div id="contents"></div>
+<script>
+const TOTAL = __TOTAL__, BATCH = __BATCH__, LATENCY = __LATENCY__, BADGE_DELAY = __BADGE_DELAY__;
+const SEED = __SEED__;
+let rendered = 0, loading = false;
+const contents = document.getElementById('contents');
+const rand = (i) => { const x = Math.sin(SEED * 9973 + i) * 10000; return x - Math.floor(x); };
+
+function item(i) {
+    const id = `v${SEED}x${i}`;
+    const views = Math.round(1000 + rand(i) * 900) * (rand(i + 1) > 0.9 ? 100 : 10);
+    const el = document.createElement('ytd-rich-item-renderer');
+    el.innerHTML = `
+        <ytd-thumbnail><img src="https://i.ytimg.com/vi/${id}/hqdefault.jpg"></ytd-thumbnail>
+        <a id="video-title-link" href="/watch?v=${id}"><span id="video-title">Synthetic video ${i} of channel ${SEED}</span></a>
+        <div id="metadata-line"><span>${(views / 1000).toFixed(1)}K views</span><span>${i + 1} days ago</span></div>`;
+    // 1of10 injects its badge a little after the item renders
+    setTimeout(() => {
+        const badge = document.createElement('span');
+        badge.textContent = `${(0.3 + rand(i + 2) * 3).toFixed(1)}x`;
+        el.appendChild(badge);
+    }, BADGE_DELAY);
+    return el;
+}
+
+function continuation() { return document.querySelector('ytd-continuation-item-renderer'); }
+
+function loadMore() {
+    if (loading || rendered >= TOTAL) return;
+    loading = true;
+    setTimeout(() => {
+        const frag = document.createDocumentFragment();
+        const end = Math.min(TOTAL, rendered + BATCH);
+        for (; rendered < end; rendered++) frag.appendChild(item(rendered));
+        continuation()?.remove();
+        contents.appendChild(frag);
+        if (rendered < TOTAL) contents.appendChild(document.createElement('ytd-continuation-item-renderer'));
+        loading = false;
+    }, LATENCY);
+}
+
+window.addEventListener('scroll', () => {
+    if (window.innerHeight + window.scrollY >= document.documentElement.scrollHeight - 800) loadMore();
+});
+// Pruned items shrink the page; keep loading if the spinner is on screen
+setInterval(() => {
+    const c = continuation();
+    if (c && c.getBoundingClientRect().top < window.innerHeight + 800) loadMore();
+}, 200);
+loadMore();
+</script></body></html>
+"""
+
+
+class BenchState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.channels = {}  # url -> row
+        self.outliers = {}
+        self.rest_requests = 0
+        self.page_requests = 0
+
+    def reset(self):
+        with self.lock:
+            self.channels.clear()
+            self.outliers.clear()
+            self.rest_requests = 0
+            self.page_requests = 0
+
+
+STATE = BenchState()
+PAGE_OPTIONS = {"latency_ms": 300, "badge_delay_ms": 150}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status, body, content_type="application/json"):
+        data = body.encode() if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path.startswith("/rest/v1/"):
+            with STATE.lock:
+                STATE.rest_requests += 1
+            # Every channel looks new, so run() always does a full scan
+            return self._send(200, "[]")
+        if parsed.path.endswith("/videos") and parsed.path.startswith("/@"):
+            # /@bench-<seed>-<size>/videos
+            _, seed, total = parsed.path.split("/")[1].split("-")
+            with STATE.lock:
+                STATE.page_requests += 1
+            html = (CHANNEL_PAGE.replace("__NAME__", f"Bench channel {seed}")
+                    .replace("__TOTAL__", total).replace("__BATCH__", str(BATCH_SIZE))
+                    .replace("__LATENCY__", str(PAGE_OPTIONS["latency_ms"]))
+                    .replace("__BADGE_DELAY__", str(PAGE_OPTIONS["badge_delay_ms"]))
+                    .replace("__SEED__", seed))
+            return self._send(200, html, "text/html")
+        self._send(404, "{}")
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        table = parsed.path.rsplit("/", 1)[-1]
+        rows = self._body() or []
+        if isinstance(rows, dict):
+            rows = [rows]
+        out = []
+        with STATE.lock:
+            STATE.rest_requests += 1
+            for row in rows:
+                if table == "os_channels":
+                    existing = STATE.channels.setdefault(row["url"], {"id": str(uuid.uuid4())})
+                    existing.update(row)
+                    out.append(existing)
+                else:
+                    STATE.outliers[row["video_id"]] = row
+                    out.append(row)
+        self._send(201, json.dumps(out))
+
+    do_PATCH = do_POST
+
+    def do_DELETE(self):
+        with STATE.lock:
+            STATE.rest_requests += 1
+        self._send(200, "[]")
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def start_server(port=_server_port):
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return round(values[lo] + (values[hi] - values[lo]) * (k - lo), 2)
+
+
+async def bench_once(n_channels, size, concurrency, headless, adaptive=False):
+    STATE.reset()
+    # The local store outlives a single run
+    stored_before = get_storage().count("os_outliers") if get_storage().name == "local" else 0
+    seeds = random.sample(range(10000, 99999), n_channels)
+    urls = [f"http://127.0.0.1:{_server_port}/@bench-{seed}-{size}" for seed in seeds]
+
+    browser = BrowserManager(pool_size=concurrency, headless=headless)
+    await browser.start()  # Warm browser: launch cost isn't part of throughput
+    # Pinned (floor = start = ceiling) so each row measures the concurrency it reports
+    limiter = (AdaptiveLimiter(ceiling=concurrency) if adaptive
+               else AdaptiveLimiter(ceiling=concurrency, floor=concurrency, start=concurrency))
+    peak_limit = limiter.current
+
+    peak_rss = 0.0
+    sampling = True
+
+    async def sample_memory():
+        nonlocal peak_rss, peak_limit
+        while sampling:
+            peak_rss = max(peak_rss, chromium_rss_mb())
+            peak_limit = max(peak_limit, limiter.current)
+            await asyncio.sleep(0.5)
+
+    sampler = asyncio.create_task(sample_memory())
+    t0 = time.perf_counter()
+    try:
+        results = await run(urls, browser=browser, full_rescan=True, limiter=limiter)
+    finally:
+        elapsed = time.perf_counter() - t0
+        sampling = False
+        await sampler
+        await browser.stop()
+
+    durations = [r["duration"] for r in results if r.get("duration") is not None]
+    return {
+        "channels": n_channels,
+        "channel_size": size,
+        "concurrency": concurrency,
+        "adaptive": adaptive,
+        "final_limit": limiter.current,
+        "peak_limit": peak_limit,
+        "elapsed": round(elapsed, 2),
+        "channels_per_minute": round(n_channels / elapsed * 60, 2) if elapsed else None,
+        "p50_latency": percentile(durations, 50),
+        "p95_latency": percentile(durations, 95),
+        "peak_rss_mb": peak_rss,
+        "db_round_trips": STATE.rest_requests,
+        "outliers_saved": (len(STATE.outliers) if get_storage().name == "supabase"
+                           else get_storage().count("os_outliers") - stored_before),
+        "failed": sum(1 for r in results if r["status"] != "done"),
+        "stop_reasons": sorted({(r.get("scroll") or {}).get("stop_reason") or "-" for r in results}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scout throughput benchmark")
+    parser.add_argument("--channels", type=int, default=16, help="Channels per run")
+    parser.add_argument("--sizes", default="60,600", help="Comma-separated videos per channel")
+    parser.add_argument("--concurrency", default="2,4,8", help="Comma-separated pool/concurrency sizes")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Let the adaptive limiter move below each size instead of pinning it")
+    parser.add_argument("--page-latency-ms", type=int, default=300, help="Delay before each grid continuation")
+    parser.add_argument("--badge-delay-ms", type=int, default=150, help="Delay before fake 1of10 badges appear")
+    parser.add_argument("--headless", action="store_true", help="Run Chromium headless (no Xvfb needed)")
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    PAGE_OPTIONS["latency_ms"] = args.page_latency_ms
+    PAGE_OPTIONS["badge_delay_ms"] = args.badge_delay_ms
+    server = start_server()
+
+    rows = []
+    try:
+        for size in [int(s) for s in args.sizes.split(",")]:
+            for concurrency in [int(c) for c in args.concurrency.split(",")]:
+                print(f"\n🏁 Benchmark: {args.channels} channels x {size} videos, concurrency {concurrency}")
+                rows.append(asyncio.run(bench_once(args.channels, size, concurrency, args.headless,
+                                                   adaptive=args.adaptive)))
+    finally:
+        server.shutdown()
+
+    print(f"\n{'size':>6} {'conc':>5} {'limit':>5} {'ch/min':>8} {'p50 s':>7} {'p95 s':>7} {'rss MB':>8} {'db rt':>6} {'failed':>6}")
+    for r in rows:
+        print(f"{r['channel_size']:>6} {r['concurrency']:>5} {r['peak_limit']:>5} {r['channels_per_minute']:>8} "
+              f"{r['p50_latency']:>7} {r['p95_latency']:>7} {r['peak_rss_mb']:>8} "
+              f"{r['db_round_trips']:>6} {r['failed']:>6}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\n📄 Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
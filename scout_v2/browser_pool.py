@@ -0,0 +1,251 @@
+"""
+Persistent Chromium manager for the scout.
+
+Keeps one persistent context (with the 1of10 extension loaded when the
+scorer needs it, see scoring.py) alive between batches and hands out pre-created pages from a pool. Pages are recycled after
+MAX_NAVIGATIONS uses, and the whole context is relaunched once Chromium's RSS
+passes MAX_RSS_MB, so a long-running worker doesn't slowly leak memory.
+RSS is sampled at most every RSS_SAMPLE_SECONDS, and the relaunch runs as a
+background task once every page is back, so no release() waits on it.
+"""
+
+import asyncio
+import os
+import time
+from playwright.async_api import async_playwright
+from resource_policy import ResourcePolicy
+from scoring import USES_EXTENSION
+
+# Configuration
+EXTENSION_PATH = os.path.abspath("./1of10_ext")
+USER_DATA_DIR = os.path.abspath("./user_data")
+
+POOL_SIZE = int(os.environ.get("SCOUT_POOL_SIZE", 8))
+MAX_NAVIGATIONS = int(os.environ.get("SCOUT_MAX_NAVIGATIONS", 25))  # Per page, then it's replaced
+MAX_RSS_MB = int(os.environ.get("SCOUT_MAX_RSS_MB", 2048))  # Whole Chromium tree, then context relaunch
+RSS_SAMPLE_SECONDS = float(os.environ.get("SCOUT_RSS_SAMPLE_SECONDS", 10))  # Walking /proc isn't free
+# Extensions need a headed browser (Xvfb); without one we can run truly headless
+HEADLESS = os.environ.get("SCOUT_HEADLESS", "0" if USES_EXTENSION else "1") == "1"
+
+
+def chromium_rss_mb(root_pid=None):
+    """Total RSS (MB) of every process descended from root_pid. Linux only; 0 elsewhere."""
+    root_pid = root_pid or os.getpid()
+    children = {}
+    try:
+        pids = [int(p) for p in os.listdir("/proc") if p.isdigit()]
+    except OSError:
+        return 0.0
+
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                # Field 4 is ppid; comm (field 2) may contain spaces so split after ')'
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            children.setdefault(ppid, []).append(pid)
+        except (OSError, IndexError, ValueError):
+            continue
+
+    total_kb = 0
+    stack = list(children.get(root_pid, []))
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            continue
+    return round(total_kb / 1024, 1)
+
+
+class BrowserManager:
+    def __init__(self, pool_size=POOL_SIZE, max_navigations=MAX_NAVIGATIONS, max_rss_mb=MAX_RSS_MB,
+                 headless=HEADLESS, user_data_dir=USER_DATA_DIR, use_extension=USES_EXTENSION):
+        self.pool_size = pool_size
+        self.user_data_dir = user_data_dir
+        self.use_extension = use_extension
+        self.max_navigations = max_navigations
+        self.max_rss_mb = max_rss_mb
+        self.headless = headless
+        self.resource_policy = ResourcePolicy()
+
+        self.context = None
+        self._playwright = None
+        self._idle = None
+        self._navigations = {}
+        self._in_use = 0
+        self._recycling = False
+        self._recycle_task = None
+        self._rss_mb = 0.0
+        self._rss_sampled_at = 0.0
+        self._start_lock = None
+        self._cond = None
+
+        self.started_at = None
+        self.launch_seconds = None
+        self.page_recycles = 0
+        self.context_recycles = 0
+        self.last_error = None
+
+    @property
+    def running(self):
+        return self.context is not None
+
+    async def start(self):
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+            self._cond = asyncio.Condition()
+        async with self._start_lock:
+            if self.context:
+                return
+            if self.use_extension and not os.path.exists(EXTENSION_PATH):
+                raise RuntimeError(f"Extension not found at {EXTENSION_PATH}")
+            if not self._playwright:
+                self._playwright = await async_playwright().start()
+            await self._launch()
+            self.started_at = time.time()
+
+    async def _launch(self):
+        t0 = time.time()
+        print(f"🌐 Launching browser (pool of {self.pool_size} pages"
+              f"{', 1of10 extension' if self.use_extension else ''}{', headless' if self.headless else ''})")
+        args = ["--no-sandbox", "--disable-setuid-sandbox", "--disable-dev-shm-usage"]
+        if self.use_extension:
+            args += [f"--disable-extensions-except={EXTENSION_PATH}", f"--load-extension={EXTENSION_PATH}"]
+        self.context = await self._playwright.chromium.launch_persistent_context(
+            self.user_data_dir,
+            headless=self.headless,
+            args=args,
+            viewport={"width": 1920, "height": 1080}
+        )
+        self.resource_policy.clear()
+        await self.resource_policy.install(self.context)
+        self._idle = asyncio.Queue()
+        self._navigations = {}
+        # The persistent context opens with a blank tab; reuse it
+        for page in self.context.pages[:self.pool_size]:
+            self._add_idle(page)
+        while self._idle.qsize() < self.pool_size:
+            self._add_idle(await self.context.new_page())
+        self.launch_seconds = round(time.time() - t0, 2)
+        print(f"✅ Browser ready in {self.launch_seconds}s")
+
+    def _add_idle(self, page):
+        self._navigations[page] = 0
+        self._idle.put_nowait(page)
+
+    async def acquire(self):
+        """Check out a warm page. Blocks while the context is being recycled."""
+        await self.start()
+        async with self._cond:
+            await self._cond.wait_for(lambda: not self._recycling)
+            self._in_use += 1
+        try:
+            return await self._idle.get()
+        except BaseException:
+            async with self._cond:
+                self._in_use -= 1
+                self._cond.notify_all()
+            raise
+
+    async def release(self, page):
+        """Return a page to the pool, replacing it if it's worn out or closed."""
+        try:
+            uses = self._navigations.pop(page, 0) + 1
+            if page.is_closed() or uses >= self.max_navigations:
+                self.resource_policy.forget(page)
+                if not page.is_closed():
+                    await page.close()
+                page = await self.context.new_page()
+                uses = 0
+                self.page_recycles += 1
+            self._navigations[page] = uses
+            self._idle.put_nowait(page)
+        except Exception as e:
+            # Context is probably dead; force a relaunch on the next check
+            print(f"⚠️ Failed to return page to pool: {e}")
+            self.last_error = str(e)
+        finally:
+            async with self._cond:
+                self._in_use -= 1
+                self._cond.notify_all()
+        self._maybe_recycle_context()
+
+    def _sampled_rss(self):
+        now = time.time()
+        if now - self._rss_sampled_at >= RSS_SAMPLE_SECONDS:
+            self._rss_mb = chromium_rss_mb()
+            self._rss_sampled_at = now
+        return self._rss_mb
+
+    def _maybe_recycle_context(self):
+        """Schedule a context relaunch if it's broken or too big. Never blocks the caller."""
+        if self._recycling:
+            return
+        broken = self._idle.qsize() + self._in_use < self.pool_size
+        rss = self._sampled_rss()
+        if not broken and rss < self.max_rss_mb:
+            return
+        # Set before the task runs so new acquire()s wait for the fresh context
+        self._recycling = True
+        self._recycle_task = asyncio.get_running_loop().create_task(self._recycle_context(rss, broken))
+
+    async def _recycle_context(self, rss, broken):
+        try:
+            async with self._cond:
+                await self._cond.wait_for(lambda: self._in_use == 0)
+            print(f"♻️ Recycling browser context (rss={rss}MB, broken={broken})")
+            try:
+                await self.context.close()
+            except Exception as e:
+                print(f"⚠️ Error closing context: {e}")
+            try:
+                await self._launch()
+                self.context_recycles += 1
+            except Exception as e:
+                # Leave the manager stopped so the next acquire() relaunches
+                print(f"❌ Browser relaunch failed: {e}")
+                self.context = None
+                self.last_error = str(e)
+        finally:
+            self._rss_sampled_at = 0.0  # Re-measure the fresh context on the next release
+            async with self._cond:
+                self._recycling = False
+                self._cond.notify_all()
+
+    async def stop(self):
+        if self._recycle_task and not self._recycle_task.done():
+            await self._recycle_task
+        if not self.context:
+            return
+        try:
+            await self.context.close()
+        finally:
+            self.context = None
+            if self._playwright:
+                await self._playwright.stop()
+                self._playwright = None
+            print("💤 Waiting 3s for browser process to exit...")
+            await asyncio.sleep(3)
+
+    def health(self):
+        return {
+            "running": self.running,
+            "headless": self.headless,
+            "extension": self.use_extension,
+            "recycling": self._recycling,
+            "pool_size": self.pool_size,
+            "idle_pages": self._idle.qsize() if self._idle else 0,
+            "in_use": self._in_use,
+            "rss_mb": self._sampled_rss(),
+            "max_rss_mb": self.max_rss_mb,
+            "launch_seconds": self.launch_seconds,
+            "uptime": round(time.time() - self.started_at, 1) if self.started_at else None,
+            "page_recycles": self.page_recycles,
+            "context_recycles": self.context_recycles,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Channel URL canonicalization and single-flight scouting.
+
+The same channel arrives as @handle, /c/name, /user/name, /channel/UC..., with
+or without a /videos (or other tab) suffix, m. or bare youtube.com hosts and
+tracking query strings. normalize_url() folds the purely syntactic variants;
+ChannelResolver then maps each to the channel's stable UC id by reading
+channelMetadataRenderer from the channel page, and remembers every alias in a
+SQLite cache so a URL is only resolved once per ALIAS_TTL_DAYS. The canonical
+URL (the channel's own @handle URL, else /channel/UC...) is what gets scouted
+and what os_channels is keyed by.
+
+run_canonical() wraps a runner (see journal.run_with_journal) so each batch
+scouts every channel once, whatever URLs it was given, and so a channel that
+another job is already scouting is waited on instead of opened again. Results
+and progress are reported under the URLs the caller passed in.
+
+Usage:
+    python channels.py resolve <url> [<url> ...]
+    python channels.py merge [--apply]   # Fold duplicate os_channels rows into one per channel
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+import httpx
+
+from innertube import HEADERS, COOKIES, TIMEOUT, extract_json, channel_metadata
+
+ALIAS_PATH = os.environ.get("SCOUT_ALIAS_PATH", os.path.abspath("./data/channel_aliases.sqlite"))
+ALIAS_TTL_DAYS = float(os.environ.get("SCOUT_ALIAS_TTL_DAYS", 30))  # Handles can be given up and re-claimed
+RESOLVE_CONCURRENCY = int(os.environ.get("SCOUT_RESOLVE_CONCURRENCY", 8))
+
+HOSTS = ("youtube.com", "www.youtube.com", "m.youtube.com")
+CHANNEL_ID_RE = re.compile(r"^UC[A-Za-z0-9_-]{22}$")
+CANONICAL_LINK_RE = re.compile(r'<link rel="canonical" href="https://www\.youtube\.com/channel/(UC[A-Za-z0-9_-]{22})"')
+PREFIXED = ("channel", "c", "user")  # Path prefixes followed by the channel's name or id
+
+
+def normalize_url(url):
+    """
+    Purely syntactic canonical form: https://www.youtube.com/<channel part>,
+    without tabs, query or fragment. Bare "@handle" and "UC..." ids are accepted.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    if url.startswith("@"):
+        url = f"https://www.youtube.com/{url}"
+    elif CHANNEL_ID_RE.match(url):
+        url = f"https://www.youtube.com/channel/{url}"
+    elif "://" not in url:
+        url = f"https://{url}"
+    parts = urlparse(url)
+    host = parts.netloc.lower()
+    if host not in HOSTS:
+        return url.rstrip("/")  # Not YouTube (e.g. the benchmark's synthetic channels); leave it alone
+    segments = [s for s in parts.path.split("/") if s]
+    keep = 2 if segments and segments[0] in PREFIXED else 1
+    return f"https://www.youtube.com/{'/'.join(segments[:keep])}".rstrip("/")
+
+
+def alias_key(url):
+    """Cache key: handles and vanity names are case-insensitive, UC ids are not."""
+    normalized = normalize_url(url)
+    return normalized if "/channel/" in normalized else normalized.lower()
+
+
+def parse_channel_page(html):
+    """(channel_id, vanity_url) from a channel page, either possibly None."""
+    metadata = channel_metadata(extract_json(html, "ytInitialData") or {})
+    channel_id = metadata.get("externalId")
+    if not channel_id:
+        match = CANONICAL_LINK_RE.search(html)
+        channel_id = match.group(1) if match else None
+    return channel_id, metadata.get("vanityChannelUrl") or None
+
+
+def canonical_url(channel_id, vanity_url=None):
+    if vanity_url and "/@" in vanity_url:
+        return normalize_url(vanity_url)
+    return f"https://www.youtube.com/channel/{channel_id}"
+
+
+class AliasCache:
+    def __init__(self, path=ALIAS_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS aliases (
+                alias TEXT PRIMARY KEY,
+                channel_id TEXT NOT NULL,
+                canonical_url TEXT NOT NULL,
+                resolved_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS aliases_channel ON aliases (channel_id);
+        """)
+
+    def lookup(self, aliases, ttl_days=ALIAS_TTL_DAYS):
+        """{alias: (channel_id, canonical_url)} for the aliases resolved within ttl_days."""
+        since = time.time() - ttl_days * 86400
+        found = {}
+        aliases = list(aliases)
+        with self._lock:
+            for i in range(0, len(aliases), 500):
+                chunk = aliases[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT alias, channel_id, canonical_url FROM aliases "
+                    f"WHERE resolved_at >= ? AND alias IN ({','.join('?' * len(chunk))})", (since, *chunk)
+                ).fetchall()
+                found.update({row["alias"]: (row["channel_id"], row["canonical_url"]) for row in rows})
+        return found
+
+    def save(self, aliases, channel_id, url):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO aliases (alias, channel_id, canonical_url, resolved_at) VALUES (?, ?, ?, ?)",
+                [(alias, channel_id, url, now) for alias in set(aliases)],
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ChannelResolver:
+    """Maps channel URLs to (channel_id, canonical_url), from the alias cache or the channel page."""
+
+    def __init__(self, cache=None):
+        self.cache = cache or AliasCache()
+        self.stats = {"cached": 0, "resolved": 0, "failed": 0}
+
+    async def resolve_many(self, urls):
+        """
+        {input_url: (channel_id, canonical_url)}. A URL that can't be resolved
+        (network error, consent wall) maps to (None, normalize_url(url)) and
+        is tried again next time.
+        """
+        keys = {url: alias_key(url) for url in urls if url and url.strip()}
+        out = {url: (None, normalize_url(url)) for url in keys if urlparse(normalize_url(url)).netloc not in HOSTS}
+        keys = {url: key for url, key in keys.items() if url not in out}
+        cached = await asyncio.to_thread(self.cache.lookup, set(keys.values()))
+        hits = {url: cached[key] for url, key in keys.items() if key in cached}
+        self.stats["cached"] += len(hits)
+        out.update(hits)
+        todo = {}
+        for url, key in keys.items():
+            if url not in out:
+                todo.setdefault(key, []).append(url)
+        if not todo:
+            return out
+
+        semaphore = asyncio.Semaphore(RESOLVE_CONCURRENCY)
+        async with httpx.AsyncClient(headers=HEADERS, cookies=COOKIES, timeout=TIMEOUT,
+                                     follow_redirects=True) as client:
+            async def resolve(key):
+                async with semaphore:
+                    normalized = normalize_url(todo[key][0])
+                    try:
+                        response = await client.get(normalized)
+                        response.raise_for_status()
+                        channel_id, vanity_url = parse_channel_page(response.text)
+                    except httpx.HTTPError as e:
+                        print(f"⚠️ Could not resolve {normalized}: {e}")
+                        channel_id = None
+                    if not channel_id:
+                        self.stats["failed"] += 1
+                        return key, (None, normalized)
+                    canonical = canonical_url(channel_id, vanity_url)
+                    # Every spelling that led here, plus the canonical and /channel/ forms, hit the cache next time
+                    aliases = [key, alias_key(canonical), alias_key(f"https://www.youtube.com/channel/{channel_id}")]
+                    await asyncio.to_thread(self.cache.save, aliases, channel_id, canonical)
+                    self.stats["resolved"] += 1
+                    return key, (channel_id, canonical)
+
+            for key, resolved in await asyncio.gather(*(resolve(key) for key in todo)):
+                for url in todo[key]:
+                    out[url] = resolved
+        return out
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver():
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = ChannelResolver()
+        return _resolver
+
+
+# --- Single-flight -----------------------------------------------------------
+
+# Canonical URL -> future of the result of the scout currently covering it.
+# Only touched from the job worker loop, so no lock is needed.
+_inflight = {}
+
+
+async def run_canonical(runner, channel_urls, on_progress=None, resolver=None, **options):
+    """
+    Call runner(canonical_urls, on_progress=..., **options) with each distinct
+    channel once, after waiting for (instead of re-scouting) any channel
+    another call is already scouting. Returns one result per input URL, in
+    order, with channel_url set to the input and canonical_url / channel_id
+    added; coalesced results carry coalesced=True.
+    """
+    from main import new_result
+    from metrics import REGISTRY
+
+    if isinstance(channel_urls, str):
+        channel_urls = [channel_urls]
+    channel_urls = list(dict.fromkeys(url.strip() for url in channel_urls if url and url.strip()))
+    resolved = await (resolver or get_resolver()).resolve_many(channel_urls)
+
+    inputs = {}  # canonical url -> the input URLs that resolved to it
+    for url in channel_urls:
+        inputs.setdefault(resolved[url][1], []).append(url)
+    channel_ids = {canonical: resolved[urls[0]][0] for canonical, urls in inputs.items()}
+    merged = len(channel_urls) - len(inputs)
+    if merged:
+        print(f"🔗 {merged} channel URLs were aliases of others in the batch")
+
+    def fan_out(canonical, status, result):
+        """Report one canonical channel's progress under every input URL for it."""
+        for url in inputs[canonical]:
+            tagged = dict(result, channel_url=url, canonical_url=canonical, channel_id=channel_ids[canonical])
+            if on_progress:
+                on_progress(url, status, tagged)
+            yield url, tagged
+
+    results = {}
+    waiting = {canonical: _inflight[canonical] for canonical in inputs if canonical in _inflight}
+    own = [canonical for canonical in inputs if canonical not in waiting]
+    loop = asyncio.get_running_loop()
+    for canonical in own:
+        _inflight[canonical] = loop.create_future()
+    if waiting:
+        print(f"🪢 {len(waiting)} channels are already being scouted by another job; waiting on those")
+        REGISTRY.inc("scout_channels_coalesced_total", len(waiting))
+
+    def progress(canonical, status, result):
+        results.update(fan_out(canonical, status, result))
+        future = _inflight.get(canonical)
+        if result.get("finished_at") and canonical in own and future and not future.done():
+            future.set_result(result)
+
+    async def follow(canonical, future):
+        try:
+            result = dict(await asyncio.shield(future), coalesced=True)
+        except Exception as e:
+            result = dict(new_result(canonical), status="failed", error=f"Coalesced scout failed: {e}",
+                          finished_at=time.time())
+        results.update(fan_out(canonical, result["status"], result))
+
+    try:
+        await asyncio.gather(
+            runner(own, on_progress=progress, **options) if own else asyncio.sleep(0),
+            *(follow(canonical, future) for canonical, future in waiting.items()),
+        )
+    finally:
+        for canonical in own:
+            future = _inflight.pop(canonical)
+            if not future.done():
+                future.set_exception(RuntimeError("Scout ended without a result for this channel"))
+                future.exception()  # Retrieved; followers get their own copy via shield
+
+    return [results.get(url) or dict(new_result(url), status="failed", error="Not run") for url in channel_urls]
+
+
+# --- Duplicate rows ----------------------------------------------------------
+
+def merge_duplicate_channels(storage, resolver=None, apply=False):
+    """
+    Group os_channels rows by resolved channel id and fold each group into
+    the most recently scouted row: outliers are re-pointed, the other rows
+    deleted, and the survivor's url set to the canonical URL. Dry run unless
+    apply=True. Blocking.
+    """
+    rows = [row for page in storage.scan("os_channels", "id, url, name, last_scouted", key="id") for row in page]
+    resolved = asyncio.run((resolver or get_resolver()).resolve_many([row["url"] for row in rows]))
+    groups = {}
+    for row in rows:
+        channel_id, canonical = resolved.get(row["url"], (None, None))
+        if channel_id:
+            groups.setdefault(channel_id, (canonical, []))[1].append(row)
+
+    stats = {"channels": len(rows), "groups": 0, "rows_removed": 0, "urls_updated": 0}
+    for channel_id, (canonical, group) in groups.items():
+        group.sort(key=lambda r: (bool(r.get("name")), r.get("last_scouted") or ""), reverse=True)
+        keep, dupes = group[0], group[1:]
+        if dupes:
+            stats["groups"] += 1
+            stats["rows_removed"] += len(dupes)
+            print(f"🔗 {canonical}: keeping {keep['url']}, merging {[d['url'] for d in dupes]}")
+        if keep["url"] != canonical:
+            stats["urls_updated"] += 1
+        if not apply:
+            continue
+        dupe_ids = [d["id"] for d in dupes]
+        if dupe_ids:
+            storage.update("os_outliers", {"channel_id": keep["id"]}, [("channel_id", "in", dupe_ids)])
+            storage.delete("os_channels", "id", dupe_ids)
+        if keep["url"] != canonical:
+            storage.update("os_channels", {"url": canonical}, [("id", "eq", keep["id"])])
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resolve channel URLs and merge duplicate channel rows")
+    sub = parser.add_subparsers(dest="command", required=True)
+    resolve_parser = sub.add_parser("resolve")
+    resolve_parser.add_argument("urls", nargs="+")
+    merge_parser = sub.add_parser("merge")
+    merge_parser.add_argument("--apply", action="store_true", help="Write changes (default is a dry run)")
+    args = parser.parse_args()
+
+    if args.command == "resolve":
+        for url, (channel_id, canonical) in asyncio.run(get_resolver().resolve_many(args.urls)).items():
+            print(f"{url} -> {canonical} ({channel_id or 'unresolved'})")
+    else:
+        from storage import get_storage
+        print(merge_duplicate_channels(get_storage(), apply=args.apply))
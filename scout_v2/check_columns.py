@@ -1,16 +1,13 @@
 
-import os
-from supabase import create_client
+from storage import get_storage
 
-url = "https://ulwjlqmccxfmxieapopy.supabase.co"
-key = "sb_publishable_nCcf-klL6pTn9UueRR6TlQ_eMPbUsk8"
-supabase = create_client(url, key)
+storage = get_storage()
 
 try:
     # Fetch one row to see structure
-    response = supabase.table("os_channels").select("*").limit(1).execute()
-    if response.data:
-        print("Columns found:", response.data[0].keys())
+    columns = storage.columns("os_channels")
+    if columns:
+        print("Columns found:", columns)
     else:
         print("Table is empty, cannot infer columns easily.")
 except Exception as e:
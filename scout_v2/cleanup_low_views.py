@@ -1,19 +1,25 @@
-import os
-from supabase import create_client, Client
+from storage import get_storage
 
-SUPABASE_URL = "https://ulwjlqmccxfmxieapopy.supabase.co"
-SUPABASE_KEY = "sb_publishable_nCcf-klL6pTn9UueRR6TlQ_eMPbUsk8"
+MIN_VIEWS = 5000
 
 def cleanup():
-    print("🧹 Starting cleanup of low-view videos (< 5000 views)...")
+    print(f"🧹 Starting cleanup of low-view videos (< {MIN_VIEWS} views)...")
     try:
-        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-        
-        # Delete videos with views < 5000
-        response = supabase.table('os_outliers').delete().lt('views', 5000).execute()
-        
-        deleted_count = len(response.data) if response.data else 0
-        print(f"✅ Deleted {deleted_count} videos with less than 5000 views.")
+        storage = get_storage()
+
+        # Delete videos with views < MIN_VIEWS, a page of keys at a time
+        deleted_count = 0
+        while True:
+            rows = storage.query('os_outliers', 'video_id', [('views', 'lt', MIN_VIEWS)], limit=1000)
+            if not rows:
+                break
+            deleted = storage.delete('os_outliers', 'video_id', [row['video_id'] for row in rows])
+            if not deleted:
+                print("⚠️ Nothing was deleted (no delete permission?); stopping.")
+                break
+            deleted_count += deleted
+
+        print(f"✅ Deleted {deleted_count} videos with less than {MIN_VIEWS} views.")
         
     except Exception as e:
         print(f"❌ Error deleting videos: {e}")
@@ -0,0 +1,215 @@
+"""
+Adaptive limit on how many channels are scouted at once.
+
+AdaptiveLimiter is a drop-in for the old asyncio.Semaphore(pool_size):
+`async with limiter:` around each channel. After every page load
+process_channel reports how long goto + grid wait took and whether the grid
+timed out; the limiter grows by one slot per `limit` clean loads (additive
+increase) and halves on a timeout, on a latency spike against its running
+baseline, or when the host runs short of CPU or memory (multiplicative
+decrease). Decreases are rate-limited so a burst of slow pages that were all
+launched under the old limit only counts once.
+"""
+
+import asyncio
+import os
+import time
+from metrics import REGISTRY
+
+MIN_CONCURRENCY = int(os.environ.get("SCOUT_CONCURRENCY_MIN", 1))
+MAX_CONCURRENCY = int(os.environ.get("SCOUT_CONCURRENCY_MAX", 0))  # 0 = browser pool size
+START_CONCURRENCY = int(os.environ.get("SCOUT_CONCURRENCY_START", 0))  # 0 = half the ceiling
+LATENCY_TOLERANCE = float(os.environ.get("SCOUT_LATENCY_TOLERANCE", 2.0))  # x baseline = congested
+MAX_CPU = float(os.environ.get("SCOUT_MAX_CPU", 0.9))  # Fraction of the CPUs we may use
+MAX_MEMORY = float(os.environ.get("SCOUT_MAX_MEMORY", 0.85))  # Fraction of RAM (or cgroup limit)
+DECREASE_FACTOR = 0.5
+DECREASE_COOLDOWN = 10.0  # Seconds between multiplicative decreases
+BASELINE_ALPHA = 0.1  # EWMA weight of each clean page load
+HOST_SAMPLE_INTERVAL = 1.0
+
+REGISTRY.describe("scout_concurrency_limit", "Current adaptive limit on channels in flight")
+REGISTRY.describe("scout_concurrency_in_flight", "Channels currently holding a concurrency slot")
+REGISTRY.describe("scout_concurrency_decreases_total", "Limit decreases, by reason")
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+class HostMonitor:
+    """
+    CPU and memory pressure as fractions (0-1). Prefers cgroup v2 counters so
+    it sees the container's quota on Railway, falls back to /proc; returns
+    None for anything it can't read (e.g. not on Linux).
+    """
+
+    def __init__(self):
+        self._last_cpu = None  # (wall time, busy seconds)
+        self._cpus = self._cpu_quota() or os.cpu_count() or 1
+
+    @staticmethod
+    def _cpu_quota():
+        quota = _read("/sys/fs/cgroup/cpu.max")
+        if quota and not quota.startswith("max"):
+            limit, period = quota.split()
+            return int(limit) / int(period)
+        return None
+
+    @staticmethod
+    def _busy_seconds():
+        stat = _read("/sys/fs/cgroup/cpu.stat")
+        if stat:
+            for line in stat.splitlines():
+                if line.startswith("usage_usec"):
+                    return int(line.split()[1]) / 1e6
+        stat = _read("/proc/stat")
+        if stat:
+            # cpu  user nice system idle iowait irq softirq steal ...
+            fields = [int(x) for x in stat.splitlines()[0].split()[1:]]
+            idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+            return (sum(fields) - idle) / os.sysconf("SC_CLK_TCK")
+        return None
+
+    def cpu(self):
+        busy = self._busy_seconds()
+        if busy is None:
+            return None
+        now = time.monotonic()
+        last, self._last_cpu = self._last_cpu, (now, busy)
+        if last is None or now <= last[0]:
+            return None
+        return min(1.0, (busy - last[1]) / (now - last[0]) / self._cpus)
+
+    @staticmethod
+    def memory():
+        current, limit = _read("/sys/fs/cgroup/memory.current"), _read("/sys/fs/cgroup/memory.max")
+        if current and limit and limit != "max":
+            return int(current) / int(limit)
+        meminfo = _read("/proc/meminfo")
+        if not meminfo:
+            return None
+        values = {line.split(":")[0]: int(line.split()[1]) for line in meminfo.splitlines()}
+        if not values.get("MemTotal") or "MemAvailable" not in values:
+            return None
+        return 1 - values["MemAvailable"] / values["MemTotal"]
+
+
+class AdaptiveLimiter:
+    def __init__(self, ceiling=None, floor=MIN_CONCURRENCY, start=START_CONCURRENCY, monitor=None):
+        caps = [c for c in (ceiling, MAX_CONCURRENCY) if c]  # Env can only lower the page pool
+        self.ceiling = max(floor, min(caps) if caps else 8)
+        self.floor = floor
+        self.limit = float(min(self.ceiling, max(floor, start or self.ceiling // 2)))
+        self.monitor = monitor or HostMonitor()
+        self.baseline = None  # EWMA of clean page-load seconds
+        self._in_flight = 0
+        self._cond = None
+        self._last_decrease = 0.0
+        self._last_host_check = 0.0
+        self.host = {"cpu": None, "memory": None}
+        self.stats = {"increases": 0, "decreases": 0, "timeouts": 0, "observations": 0}
+        self._export()
+
+    @property
+    def current(self):
+        return int(self.limit)
+
+    async def __aenter__(self):
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.current)
+            self._in_flight += 1
+        self._export()
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+        self._export()
+
+    def observe(self, latency=None, timed_out=False):
+        """Feed back one page load: seconds for goto + grid wait, or timed_out=True."""
+        self.stats["observations"] += 1
+        reason = None
+        if timed_out:
+            self.stats["timeouts"] += 1
+            reason = "timeout"
+        elif latency is not None:
+            if self.baseline is not None and latency > self.baseline * LATENCY_TOLERANCE:
+                reason = "latency"
+            else:
+                # Only clean loads move the baseline, so a slow spell can't become the new normal
+                self.baseline = latency if self.baseline is None else (
+                    (1 - BASELINE_ALPHA) * self.baseline + BASELINE_ALPHA * latency)
+        reason = reason or self._host_pressure()
+
+        if reason:
+            self._decrease(reason)
+        else:
+            self._increase()
+
+    def _host_pressure(self):
+        now = time.monotonic()
+        if now - self._last_host_check >= HOST_SAMPLE_INTERVAL:
+            self._last_host_check = now
+            self.host = {"cpu": self.monitor.cpu(), "memory": self.monitor.memory()}
+        if self.host["memory"] is not None and self.host["memory"] > MAX_MEMORY:
+            return "memory"
+        if self.host["cpu"] is not None and self.host["cpu"] > MAX_CPU:
+            return "cpu"
+        return None
+
+    def _increase(self):
+        # Only grow while the limit is actually what's holding channels back
+        if self.limit >= self.ceiling or self._in_flight < self.current:
+            return
+        before = self.current
+        self.limit = min(self.ceiling, self.limit + 1 / self.current)  # +1 per `limit` clean loads
+        if self.current > before:
+            self.stats["increases"] += 1
+            self._wake()
+        self._export()
+
+    def _decrease(self, reason):
+        now = time.monotonic()
+        if now - self._last_decrease < DECREASE_COOLDOWN or self.limit <= self.floor:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.floor), float(int(self.limit * DECREASE_FACTOR)))
+        self.stats["decreases"] += 1
+        REGISTRY.inc("scout_concurrency_decreases_total", reason=reason)
+        print(f"🐢 Concurrency limit down to {self.current} ({reason})")
+        self._export()
+
+    def _wake(self):
+        if self._cond is None:
+            return
+
+        async def notify():
+            async with self._cond:
+                self._cond.notify_all()
+        try:
+            asyncio.get_running_loop().create_task(notify())
+        except RuntimeError:
+            pass  # No loop yet; nobody can be waiting
+
+    def _export(self):
+        REGISTRY.set("scout_concurrency_limit", self.current)
+        REGISTRY.set("scout_concurrency_in_flight", self._in_flight)
+
+    def snapshot(self):
+        return {
+            "limit": self.current,
+            "floor": self.floor,
+            "ceiling": self.ceiling,
+            "in_flight": self._in_flight,
+            "baseline_latency": round(self.baseline, 3) if self.baseline is not None else None,
+            "host": self.host,
+            **self.stats,
+        }
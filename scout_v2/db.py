@@ -0,0 +1,260 @@
+"""
+Shared Supabase client and a write-behind buffer for scout results.
+
+The buffer writes through the configured storage backend (storage.py), so
+with SCOUT_STORAGE=local the same bulk upserts land in the embedded store.
+
+Every PostgREST call is blocking, so nothing here runs `.execute()` on the
+event loop: the writer collects channel and outlier upserts from all
+channels, flushes them in bulk from a worker thread once MAX_BUFFERED_ROWS or
+FLUSH_INTERVAL is reached, and retries with backoff off the loop. Callers get
+futures back (channel id, rows saved) and only wait on them if they care.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from supabase import create_client, Client
+from metrics import REGISTRY
+
+# Supabase Config
+SUPABASE_URL = os.environ.get("SUPABASE_URL", "https://ulwjlqmccxfmxieapopy.supabase.co")
+SUPABASE_KEY = os.environ.get("SUPABASE_KEY", "sb_publishable_nCcf-klL6pTn9UueRR6TlQ_eMPbUsk8")
+
+MAX_BUFFERED_ROWS = int(os.environ.get("SCOUT_DB_MAX_ROWS", 500))
+FLUSH_INTERVAL = float(os.environ.get("SCOUT_DB_FLUSH_INTERVAL", 2.0))
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5
+
+_client = None
+_client_lock = threading.Lock()
+_write_listeners = []
+
+
+def get_client() -> Client:
+    """One Supabase client (and HTTP connection pool) per process."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        return _client
+
+
+def add_write_listener(fn):
+    """Call fn(table, rows) after each successful bulk write; channel rows include their id."""
+    _write_listeners.append(fn)
+
+
+def notify_written(table, rows):
+    for fn in list(_write_listeners):
+        try:
+            fn(table, rows)
+        except Exception as e:
+            print(f"⚠️ Write listener failed: {e}")
+
+
+def is_retryable(exc):
+    """
+    Network errors, 5xx and PostgREST connection errors may clear up; a bad
+    request, a missing column or a constraint violation fails the same way every time.
+    """
+    code = str(getattr(exc, "code", "") or "")
+    if code.startswith("PGRST") and not code.startswith("PGRST0"):
+        return False  # PGRST1xx request, 2xx schema cache, 3xx auth
+    if len(code) == 5 and code[:2] in ("22", "23", "28", "42"):
+        return False  # Postgres data, integrity, auth and syntax/undefined-column classes
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    try:
+        status = int(status) if status is not None else None
+    except (TypeError, ValueError):
+        status = None
+    return not (status and 400 <= status < 500 and status not in (408, 429))
+
+
+def execute_with_retry(build_query, attempts=RETRY_ATTEMPTS, base_delay=RETRY_BASE_DELAY):
+    """
+    Run a query built by build_query() with exponential backoff. Blocking;
+    call it from a thread (asyncio.to_thread), never from the event loop.
+    Errors that can't succeed on a retry (see is_retryable) are raised at once.
+    """
+    for attempt in range(attempts):
+        try:
+            return build_query().execute()
+        except Exception as e:
+            if attempt == attempts - 1 or not is_retryable(e):
+                raise
+            delay = base_delay * 2 ** attempt
+            print(f"⚠️ DB call failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def _set_result(future, value):
+    if not future.done():
+        future.set_result(value)
+
+
+def _set_exception(future, exc):
+    if not future.done():
+        future.set_exception(exc)
+
+
+class BufferedWriter:
+    def __init__(self, storage=None, max_rows=MAX_BUFFERED_ROWS, flush_interval=FLUSH_INTERVAL):
+        from storage import get_storage  # storage.py builds on this module
+        self.storage = storage or get_storage()
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self._channels = []  # (row, future -> channel id)
+        self._outliers = []  # (rows, channel id or future, future -> rows saved)
+        self._flush_lock = None
+        self._wakeup = None
+        self._task = None
+        self.stats = {"flushes": 0, "round_trips": 0, "channel_rows": 0, "outlier_rows": 0, "errors": 0}
+
+    async def start(self):
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Stop the background flusher and write whatever is still buffered."""
+        if self._task:
+            # Let a flush that's already running finish (and resolve its futures) first
+            async with self._flush_lock:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def pending_rows(self):
+        return len(self._channels) + sum(len(rows) for rows, _, _ in self._outliers)
+
+    def add_channel(self, row):
+        """Queue an os_channels upsert (keyed by url). Resolves to the row id, or None on failure."""
+        future = asyncio.get_running_loop().create_future()
+        self._channels.append((row, future))
+        self._maybe_wake()
+        return future
+
+    def add_outliers(self, rows, channel_id=None):
+        """
+        Queue os_outliers upserts (keyed by video_id). channel_id may be a
+        future from add_channel; it's resolved at flush time. Resolves to the
+        number of rows written.
+        """
+        future = asyncio.get_running_loop().create_future()
+        if not rows:
+            future.set_result(0)
+            return future
+        self._outliers.append((rows, channel_id, future))
+        self._maybe_wake()
+        return future
+
+    def _maybe_wake(self):
+        if self._wakeup and self.pending_rows() >= self.max_rows:
+            self._wakeup.set()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Background flush failed: {e}")
+
+    async def flush(self):
+        lock = self._flush_lock or asyncio.Lock()
+        async with lock:
+            channels, self._channels = self._channels, []
+            outliers, self._outliers = self._outliers, []
+            if not channels and not outliers:
+                return
+            self.stats["flushes"] += 1
+            t0 = time.perf_counter()
+            if channels:
+                await self._flush_channels(channels)
+            if outliers:
+                await self._flush_outliers(outliers)
+            REGISTRY.observe("scout_db_flush_seconds", time.perf_counter() - t0)
+
+    async def _flush_channels(self, channels):
+        # PostgREST rejects a bulk upsert that touches the same key twice; last write wins
+        by_url = {}
+        for row, future in channels:
+            by_url.setdefault(row["url"], [None, []])
+            by_url[row["url"]][0] = row
+            by_url[row["url"]][1].append(future)
+        rows = [row for row, _ in by_url.values()]
+
+        try:
+            data = await asyncio.to_thread(self._upsert_channels, rows)
+        except Exception as e:
+            print(f"❌ Channel Upsert Failed: {e}")
+            self.stats["errors"] += 1
+            REGISTRY.inc("scout_errors_total", kind="db")
+            data = []
+
+        ids = {row["url"]: row["id"] for row in data or []}
+        if data:
+            notify_written("os_channels", data)
+        self.stats["channel_rows"] += len(ids)
+        REGISTRY.inc("scout_db_rows_total", len(ids), table="os_channels")
+        for url, (_, futures) in by_url.items():
+            for future in futures:
+                _set_result(future, ids.get(url))
+
+    def _round_trip(self):
+        self.stats["round_trips"] += 1
+        REGISTRY.inc("scout_db_round_trips_total")
+
+    def _upsert_channels(self, rows):
+        try:
+            self._round_trip()
+            return self.storage.upsert("os_channels", rows, on_conflict="url")
+        except Exception as e:
+            if not any("avatar_url" in row for row in rows):
+                raise
+            print(f"⚠️ Channel Upsert Error (trying without avatar): {e}")
+            stripped = [{k: v for k, v in row.items() if k != "avatar_url"} for row in rows]
+            self._round_trip()
+            return self.storage.upsert("os_channels", stripped, on_conflict="url")
+
+    async def _flush_outliers(self, outliers):
+        by_video = {}
+        for rows, channel_id, _ in outliers:
+            if isinstance(channel_id, asyncio.Future):
+                channel_id = await channel_id
+            for row in rows:
+                by_video[row["video_id"]] = dict(row, channel_id=channel_id)
+
+        try:
+            await asyncio.to_thread(self._upsert_outliers, list(by_video.values()))
+        except Exception as e:
+            print(f"❌ Database Error: {e}")
+            self.stats["errors"] += 1
+            REGISTRY.inc("scout_errors_total", kind="db")
+            for _, _, future in outliers:
+                _set_exception(future, e)
+            return
+
+        notify_written("os_outliers", list(by_video.values()))
+        self.stats["outlier_rows"] += len(by_video)
+        REGISTRY.inc("scout_db_rows_total", len(by_video), table="os_outliers")
+        print(f"💾 Saved {len(by_video)} outliers to DB")
+        for rows, _, future in outliers:
+            _set_result(future, len(rows))
+
+    def _upsert_outliers(self, rows):
+        for i in range(0, len(rows), self.max_rows):
+            chunk = rows[i:i + self.max_rows]
+            self._round_trip()
+            self.storage.upsert("os_outliers", chunk, on_conflict="video_id")
@@ -0,0 +1,275 @@
+"""
+Near-duplicate index for outliers.
+
+Titles are normalized, split into character shingles and MinHashed; the
+signature is banded (LSH) and the band buckets are stored in an on-disk
+SQLite file with an index on (band, bucket), so checking a new row only
+touches the handful of rows sharing a bucket with it, however large the
+table gets. Identical normalized thumbnail URLs count as duplicates too.
+
+Similar titles alone aren't enough: series titles ("Part 1" / "Part 2",
+"100 Days" / "1000 Days") shingle almost identically, so a title match also
+needs exactly the same numbers in both titles.
+
+The index is updated incrementally by the scout (process_channel checks and
+adds each batch of outliers) and rebuilt by maintenance.py into staging
+tables in the same file, which are swapped in with one transaction so a
+running scout's open connection keeps seeing a consistent index.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+import unicodedata
+from urllib.parse import urlparse
+
+DATA_DIR = os.path.abspath("./data")
+INDEX_PATH = os.environ.get("SCOUT_DEDUP_INDEX_PATH", os.path.join(DATA_DIR, "dedup_index.sqlite"))
+ENABLED = os.environ.get("SCOUT_DEDUPE", "1") == "1"
+
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 Jaccard usually collide somewhere
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 4
+THRESHOLD = 0.8  # Estimated Jaccard similarity to call two titles the same video
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+
+
+def _seeded(i, salt):
+    return int.from_bytes(hashlib.blake2b(f"{salt}{i}".encode(), digest_size=8).digest(), "big")
+
+
+# Fixed permutations so signatures stay comparable across runs
+_PERMS = [(_seeded(i, "a") % (_PRIME - 1) + 1, _seeded(i, "b") % _PRIME) for i in range(NUM_PERM)]
+
+
+# Words reposts add that say nothing about the video itself
+REPOST_MARKERS = {"reupload", "reuploaded", "repost", "reposted"}
+
+
+def normalize_title(title):
+    title = unicodedata.normalize("NFKD", title or "").encode("ascii", "ignore").decode()
+    title = re.sub(r"#\w+", " ", title.lower())  # hashtags (#shorts etc.)
+    title = re.sub(r"[^a-z0-9]+", " ", title)
+    title = re.sub(r"\bre (upload|post)", r"re\1", title)  # "re-upload" -> "reupload"
+    return " ".join(word for word in title.split() if word not in REPOST_MARKERS)
+
+
+def title_numbers(normalized):
+    """Every number in a normalized title, in order and without leading zeros ("Ep 01" == "Ep 1")."""
+    return " ".join(str(int(n)) for n in re.findall(r"\d+", normalized))
+
+
+def normalize_thumbnail(url):
+    """Host + path without signed query strings; empty for missing/placeholder images."""
+    if not url or "data:image" in url or "placeholder" in url.lower():
+        return ""
+    parsed = urlparse(url)
+    return f"{parsed.hostname or ''}{parsed.path}"
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash(text):
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in shingles(text)]
+    if not hashes:
+        return None
+    return [min(((a * h + b) % _PRIME) & _MASK for h in hashes) for a, b in _PERMS]
+
+
+def band_keys(signature):
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(struct.pack(f"<{ROWS_PER_BAND}I", *chunk), digest_size=8).digest()
+        keys.append((band, int.from_bytes(digest, "big", signed=True)))
+    return keys
+
+
+def similarity(sig_a, sig_b):
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+class DuplicateIndex:
+    """
+    prefix selects the table set: "" is the live index, anything else a
+    staging copy in the same file (see replace_with).
+    """
+
+    def __init__(self, path=INDEX_PATH, threshold=THRESHOLD, prefix=""):
+        self.path = path
+        self.threshold = threshold
+        self.items = f"{prefix}items"
+        self.buckets = f"{prefix}buckets"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        # The scout and maintenance may hold the file at the same time
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.executescript(f"""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS {self.items} (
+                video_id TEXT PRIMARY KEY,
+                signature BLOB,
+                thumb_key TEXT,
+                numbers TEXT,
+                added_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS {self.buckets} (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                video_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS {self.buckets}_lookup ON {self.buckets} (band, bucket);
+            CREATE INDEX IF NOT EXISTS {self.buckets}_video ON {self.buckets} (video_id);
+            CREATE INDEX IF NOT EXISTS {self.items}_thumb ON {self.items} (thumb_key);
+        """)
+        # Indexes built before titles' numbers were recorded
+        existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({self.items})")}
+        for column, kind in (("numbers", "TEXT"), ("added_at", "REAL")):
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE {self.items} ADD COLUMN {column} {kind}")
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.items}").fetchone()[0]
+
+    def _find(self, video_id, signature, thumb_key, numbers):
+        if thumb_key:
+            row = self._conn.execute(
+                f"SELECT video_id FROM {self.items} WHERE thumb_key = ? AND video_id != ? LIMIT 1",
+                (thumb_key, video_id)
+            ).fetchone()
+            if row:
+                return row[0], 1.0
+        if not signature:
+            return None
+
+        candidates = set()
+        for band, bucket in band_keys(signature):
+            for (candidate,) in self._conn.execute(
+                    f"SELECT video_id FROM {self.buckets} WHERE band = ? AND bucket = ?", (band, bucket)):
+                if candidate != video_id:
+                    candidates.add(candidate)
+
+        best = None
+        for candidate in candidates:
+            row = self._conn.execute(
+                f"SELECT signature, numbers FROM {self.items} WHERE video_id = ?", (candidate,)
+            ).fetchone()
+            # Rows indexed without their numbers can't be told apart from the next part of a series
+            if not row or not row[0] or row[1] is None or row[1] != numbers:
+                continue
+            score = similarity(signature, struct.unpack(f"<{NUM_PERM}I", row[0]))
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (candidate, score)
+        return best
+
+    def _add(self, video_id, signature, thumb_key, numbers):
+        blob = struct.pack(f"<{NUM_PERM}I", *signature) if signature else None
+        self._conn.execute(f"DELETE FROM {self.buckets} WHERE video_id = ?", (video_id,))
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO {self.items} (video_id, signature, thumb_key, numbers, added_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (video_id, blob, thumb_key, numbers, time.time())
+        )
+        if signature:
+            self._conn.executemany(
+                f"INSERT INTO {self.buckets} (band, bucket, video_id) VALUES (?, ?, ?)",
+                [(band, bucket, video_id) for band, bucket in band_keys(signature)]
+            )
+
+    @staticmethod
+    def _keys(title, thumbnail):
+        normalized = normalize_title(title)
+        return minhash(normalized), normalize_thumbnail(thumbnail), title_numbers(normalized)
+
+    def find_duplicate(self, video_id, title, thumbnail=None):
+        """(duplicate_video_id, similarity) for the closest indexed match, or None."""
+        with self._lock:
+            return self._find(video_id, *self._keys(title, thumbnail))
+
+    def add(self, video_id, title, thumbnail=None):
+        with self._lock:
+            self._add(video_id, *self._keys(title, thumbnail))
+            self._conn.commit()
+
+    def check_and_add(self, rows):
+        """
+        Split rows (dicts with video_id/title/thumbnail) into (unique, duplicates).
+        Unique rows are added to the index; each duplicate gets `duplicate_of`
+        and `similarity` keys. Rows also dedupe against each other.
+        """
+        unique, duplicates = [], []
+        with self._lock:
+            for row in rows:
+                keys = self._keys(row.get("title"), row.get("thumbnail"))
+                match = self._find(row["video_id"], *keys)
+                if match:
+                    duplicates.append(dict(row, duplicate_of=match[0], similarity=round(match[1], 2)))
+                else:
+                    self._add(row["video_id"], *keys)
+                    unique.append(row)
+            self._conn.commit()
+        return unique, duplicates
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.items}")
+            self._conn.execute(f"DELETE FROM {self.buckets}")
+            self._conn.commit()
+
+    def drop(self):
+        """Remove this index's tables (for discarding a staging copy)."""
+        with self._lock:
+            self._conn.execute(f"DROP TABLE IF EXISTS {self.items}")
+            self._conn.execute(f"DROP TABLE IF EXISTS {self.buckets}")
+            self._conn.commit()
+
+    def replace_with(self, staging, started_at):
+        """
+        Swap a rebuilt staging index (same file, another prefix) in for this
+        one in a single transaction, then drop it. Rows this index gained
+        after `started_at` (the scout kept adding while the rebuild ran) stay.
+        """
+        with self._lock:
+            conn = self._conn
+            with conn:
+                conn.execute(f"DELETE FROM {self.items} WHERE added_at IS NULL OR added_at < ?", (started_at,))
+                conn.execute(f"INSERT OR REPLACE INTO {self.items} SELECT video_id, signature, thumb_key, numbers, "
+                             f"added_at FROM {staging.items}")
+                conn.execute(f"DELETE FROM {self.buckets} WHERE video_id NOT IN (SELECT video_id FROM {self.items}) "
+                             f"OR video_id IN (SELECT video_id FROM {staging.items})")
+                conn.execute(f"INSERT INTO {self.buckets} SELECT band, bucket, video_id FROM {staging.buckets}")
+                conn.execute(f"DROP TABLE {staging.items}")
+                conn.execute(f"DROP TABLE {staging.buckets}")
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Process-wide index, or None when SCOUT_DEDUPE=0."""
+    global _index
+    if not ENABLED:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = DuplicateIndex()
+        return _index
@@ -1,9 +1,12 @@
 #!/bin/bash
-# Start Xvfb
-Xvfb :99 -screen 0 1920x1080x24 > /dev/null 2>&1 &
+# The 1of10 extension needs a headed browser; native scoring runs headless
+if [ "${SCOUT_SCORER:-native}" != "native" ]; then
+    # Start Xvfb
+    Xvfb :99 -screen 0 1920x1080x24 > /dev/null 2>&1 &
 
-# Wait for Xvfb to be ready
-sleep 2
+    # Wait for Xvfb to be ready
+    sleep 2
+fi
 
 # Run the server
 python server.py
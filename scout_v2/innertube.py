@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Browserless channel listing.
+
+A channel's /videos page embeds its first grid page as `ytInitialData` JSON,
+and the rest comes from POST /youtubei/v1/browse with the continuation token
+at the end of each page. ChannelLister fetches both over one pooled async
+HTTP client and turns every grid item into the same record the DOM
+extraction in scroll.py produces (video_id, title, url, thumbnail, views,
+outlier_score, published_at, published_text), with the same stop rules and
+report shape as scroll_channel. A channel costs a few hundred KB of JSON
+instead of a Chromium renderer.
+
+ListingUnavailable means the page didn't look like we expect (consent wall,
+markup change, HTTP error); process_channel then falls back to the browser.
+The browser is also still used whenever the 1of10 extension is the scorer.
+
+Usage (manual check against a live channel or a saved page):
+    python innertube.py https://www.youtube.com/@ChannelName [--max-items 60]
+    python innertube.py --from-file saved_videos_page.html
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from scoring import USES_EXTENSION
+from scroll import parse_iso
+
+FETCH_MODE = os.environ.get("SCOUT_FETCH", "http")  # http (browser as fallback) | browser
+ENABLED = FETCH_MODE == "http" and not USES_EXTENSION  # Badges only exist in the rendered DOM
+MAX_PAGES = int(os.environ.get("SCOUT_MAX_SCROLLS", 50))  # Continuations, same budget as scrolls
+MAX_CONNECTIONS = int(os.environ.get("SCOUT_HTTP_CONNECTIONS", 20))
+TIMEOUT = float(os.environ.get("SCOUT_HTTP_TIMEOUT", 15))
+
+BASE_URL = "https://www.youtube.com"
+HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                   "Chrome/124.0.0.0 Safari/537.36"),
+    "Accept-Language": "en-US,en;q=0.9",  # View counts and dates are parsed as English
+}
+# Skip the EU consent interstitial
+COOKIES = {"SOCS": "CAI", "CONSENT": "YES+"}
+
+
+class ListingUnavailable(Exception):
+    """The HTTP path can't list this channel; use the browser instead."""
+
+
+# --- Parsing (pure functions, no I/O) ----------------------------------------
+
+def parse_views(text):
+    """Same rules as parseViews in scroll.py: '1.2K views' -> 1200, 'No views' -> 0."""
+    if not text:
+        return 0
+    digits = re.sub(r"[^0-9.]", "", text)
+    try:
+        num = float(digits) if digits else 0
+    except ValueError:
+        num = 0
+    upper = text.upper()
+    multiplier = 1000 if "K" in upper else 1000000 if "M" in upper else 1000000000 if "B" in upper else 1
+    return round(num * multiplier)
+
+
+def parse_ago(text, now=None):
+    """Same rules as parseAgo in scroll.py: '3 weeks ago' -> ISO timestamp."""
+    now = now or datetime.now(timezone.utc)
+    match = re.search(r"\d+", text or "")
+    num = int(match.group()) if match else 0
+    if "hour" in text:
+        now -= timedelta(hours=num)
+    elif "day" in text:
+        now -= timedelta(days=num)
+    elif "week" in text:
+        now -= timedelta(weeks=num)
+    elif "month" in text:
+        month = now.month - 1 - num
+        year = now.year + month // 12
+        day = min(now.day, 28)  # Good enough for a relative date
+        now = now.replace(year=year, month=month % 12 + 1, day=day)
+    elif "year" in text:
+        now = now.replace(year=now.year - num, day=min(now.day, 28))
+    return now.isoformat().replace("+00:00", "Z")
+
+
+def _text(node):
+    """simpleText / runs / content text nodes -> plain string."""
+    if not node:
+        return ""
+    if isinstance(node, str):
+        return node
+    if "simpleText" in node:
+        return node["simpleText"]
+    if "runs" in node:
+        return "".join(run.get("text", "") for run in node["runs"])
+    return node.get("content", "")
+
+
+def _find(obj, key):
+    """Depth-first search for every value stored under `key`."""
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            if k == key:
+                yield v
+            yield from _find(v, key)
+    elif isinstance(obj, list):
+        for v in obj:
+            yield from _find(v, key)
+
+
+def extract_json(html, marker):
+    """Decode the JSON object assigned right after `marker` in a page's scripts."""
+    decoder = json.JSONDecoder()
+    for match in re.finditer(re.escape(marker) + r"\s*=\s*", html):
+        try:
+            return decoder.raw_decode(html, match.end())[0]
+        except ValueError:
+            continue
+    return None
+
+
+def extract_ytcfg(html):
+    """Merge every ytcfg.set({...}) call; we need the API key and client context."""
+    decoder = json.JSONDecoder()
+    cfg = {}
+    for match in re.finditer(r"ytcfg\.set\(\s*", html):
+        try:
+            value = decoder.raw_decode(html, match.end())[0]
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            cfg.update(value)
+    return cfg
+
+
+def video_record(item, now=None):
+    """One grid item (videoRenderer or lockupViewModel) -> scroll.py record, or None."""
+    video = item.get("videoRenderer")
+    if video:
+        video_id = video.get("videoId", "")
+        title = _text(video.get("title"))
+        views_text = _text(video.get("viewCountText"))
+        published_text = _text(video.get("publishedTimeText"))
+        thumbnails = (video.get("thumbnail") or {}).get("thumbnails") or []
+    elif item.get("lockupViewModel"):
+        lockup = item["lockupViewModel"]
+        if lockup.get("contentType", "LOCKUP_CONTENT_TYPE_VIDEO") != "LOCKUP_CONTENT_TYPE_VIDEO":
+            return None
+        video_id = lockup.get("contentId", "")
+        metadata = ((lockup.get("metadata") or {}).get("lockupMetadataViewModel")) or {}
+        title = _text(metadata.get("title"))
+        parts = [_text(part.get("text")) for group in _find(metadata, "metadataParts") for part in group]
+        views_text = next((p for p in parts if "view" in p), "")
+        published_text = next((p for p in parts if "ago" in p), "")
+        thumbnails = next(_find(lockup.get("contentImage") or {}, "sources"), [])
+    else:
+        return None
+
+    if not video_id:
+        return None
+    thumbnail = thumbnails[-1]["url"] if thumbnails else ""
+    if not thumbnail or "data:image" in thumbnail:
+        thumbnail = f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+    return {
+        "video_id": video_id,
+        "title": title.strip(),
+        "url": f"{BASE_URL}/watch?v={video_id}",
+        "thumbnail": thumbnail,
+        "views": parse_views(views_text),
+        "outlier_score": None,
+        "published_at": parse_ago(published_text, now) if "ago" in published_text else None,
+        "published_text": published_text.strip() or None,
+    }
+
+
+def parse_items(contents, now=None):
+    """Grid contents -> (records, continuation token or None)."""
+    records, token = [], None
+    for entry in contents or []:
+        if "richItemRenderer" in entry:
+            record = video_record(entry["richItemRenderer"].get("content") or {}, now)
+            if record:
+                records.append(record)
+        elif "continuationItemRenderer" in entry:
+            token = next(_find(entry["continuationItemRenderer"], "token"), None)
+    return records, token
+
+
+def initial_grid(data):
+    """The selected tab's rich grid contents, or None if there's no grid at all."""
+    tabs = next(_find(data, "tabs"), None) or []
+    for tab in tabs:
+        renderer = tab.get("tabRenderer") or {}
+        if renderer.get("selected"):
+            grid = next(_find(renderer.get("content") or {}, "richGridRenderer"), None)
+            return grid.get("contents", []) if grid is not None else None
+    return None
+
+
+def continuation_contents(data):
+    for items in _find(data.get("onResponseReceivedActions") or [], "continuationItems"):
+        return items
+    return []
+
+
+def channel_metadata(data):
+    """The page's channelMetadataRenderer (title, avatar, externalId, vanityChannelUrl), or {}."""
+    return next(_find(data.get("metadata") or {}, "channelMetadataRenderer"), None) or {}
+
+
+def channel_info(data):
+    """{name, avatar_url} like the DOM header extraction."""
+    metadata = channel_metadata(data)
+    avatars = (metadata.get("avatar") or {}).get("thumbnails") or []
+    return {"name": metadata.get("title", ""), "avatar_url": avatars[-1]["url"] if avatars else ""}
+
+
+def videos_url(channel_url):
+    url = channel_url.rstrip("/")
+    if not url.endswith("/videos"):
+        url += "/videos"
+    return url
+
+
+# --- Fetching ----------------------------------------------------------------
+
+class ChannelLister:
+    """One pooled HTTP client shared by every channel in a batch."""
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, timeout=TIMEOUT):
+        self.client = httpx.AsyncClient(
+            headers=HEADERS, cookies=COOKIES, timeout=timeout, follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _request(self, stats, method, url, **kwargs):
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            raise ListingUnavailable(f"{method} {url}: {e}") from e
+        stats["requests"] += 1
+        stats["bytes"] += len(response.content)
+        return response
+
+    async def fetch_first_page(self, channel_url, stats):
+        """(ytInitialData, ytcfg) for the channel's /videos tab."""
+        response = await self._request(stats, "GET", videos_url(channel_url))
+        data = extract_json(response.text, "ytInitialData")
+        if data is None:
+            raise ListingUnavailable("No ytInitialData in page (consent wall or markup change)")
+        return data, extract_ytcfg(response.text)
+
+    async def fetch_continuation(self, cfg, token, stats):
+        api_key, context = cfg.get("INNERTUBE_API_KEY"), cfg.get("INNERTUBE_CONTEXT")
+        if not api_key or not context:
+            raise ListingUnavailable("No innertube config in page")
+        client = context.get("client") or {}
+        response = await self._request(
+            stats, "POST", f"{BASE_URL}/youtubei/v1/browse", params={"key": api_key, "prettyPrint": "false"},
+            json={"context": context, "continuation": token},
+            headers={"X-YouTube-Client-Name": str(cfg.get("INNERTUBE_CONTEXT_CLIENT_NAME", 1)),
+                     "X-YouTube-Client-Version": client.get("clientVersion", "")},
+        )
+        try:
+            return response.json()
+        except ValueError as e:
+            # A consent or captcha page, or a body cut off mid-transfer
+            raise ListingUnavailable(f"Continuation response is not JSON: {e}") from e
+
+    async def list_channel(self, channel_url, max_items=None, published_after=None, max_pages=MAX_PAGES,
+                           should_stop=None, on_items=None, min_items=0, first_page=None, stats=None):
+        """
+        Page through the channel's uploads, newest first. Returns
+        (channel_info, report) with the same report keys as scroll_channel;
+        `scrolls` counts continuation requests. Returns (channel_info, None)
+        if the channel has no videos grid.
+        """
+        t0 = time.time()
+        stats = stats if stats is not None else {"requests": 0, "blocked": 0, "bytes": 0, "blocked_by_type": {}}
+        data, cfg = first_page or await self.fetch_first_page(channel_url, stats)
+        info = channel_info(data)
+        contents = initial_grid(data)
+        if not contents:
+            return info, None
+
+        cutoff = parse_iso(published_after)
+        items, pages, stop_reason = 0, 0, None
+        oldest = last_video_id = None
+        while True:
+            records, token = parse_items(contents)
+            if records:
+                items += len(records)
+                oldest = records[-1]["published_at"] or oldest
+                last_video_id = records[-1]["video_id"]
+                if on_items:
+                    on_items(records)
+            snapshot = {"items": items, "oldest_published_at": oldest, "last_video_id": last_video_id,
+                        "batch_ids": [r["video_id"] for r in records]}
+            can_stop_early = items >= min_items
+
+            if max_items and items >= max_items:
+                stop_reason = "target_count"
+            elif can_stop_early and cutoff and oldest and parse_iso(oldest) < cutoff:
+                stop_reason = "date_cutoff"
+            elif can_stop_early and should_stop and (caller_reason := should_stop(snapshot)):
+                stop_reason = caller_reason
+            elif not token:
+                stop_reason = "stable"
+            elif pages >= max_pages:
+                stop_reason = "max_scrolls"
+            if stop_reason:
+                break
+            contents = continuation_contents(await self.fetch_continuation(cfg, token, stats))
+            pages += 1
+
+        return info, {
+            "stop_reason": stop_reason,
+            "scrolls": pages,
+            "items": items,
+            "extracted": items,
+            "badged": 0,
+            "oldest_published_at": oldest,
+            "scroll_seconds": round(time.time() - t0, 2),
+            "badge_wait_seconds": 0,
+        }
+
+
+async def _main(args):
+    if args.from_file:
+        with open(args.from_file, encoding="utf-8") as f:
+            html = f.read()
+        data = extract_json(html, "ytInitialData")
+        if data is None:
+            raise SystemExit("No ytInitialData in file")
+        records, token = parse_items(initial_grid(data))
+        print(json.dumps({"channel": channel_info(data), "videos": records, "continuation": bool(token)}, indent=2))
+        return
+    videos = []
+    async with ChannelLister() as lister:
+        info, report = await lister.list_channel(args.channel_url, max_items=args.max_items, on_items=videos.extend)
+    print(json.dumps({"channel": info, "report": report, "videos": videos[:args.show]}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List a channel's uploads without a browser")
+    parser.add_argument("channel_url", nargs="?")
+    parser.add_argument("--from-file", help="Parse a saved /videos page instead of fetching")
+    parser.add_argument("--max-items", type=int)
+    parser.add_argument("--show", type=int, default=5, help="Records to print")
+    args = parser.parse_args()
+    if not args.channel_url and not args.from_file:
+        parser.error("channel_url or --from-file is required")
+    asyncio.run(_main(args))
@@ -0,0 +1,241 @@
+"""
+Background job queue for the scout service.
+
+/scout enqueues a job and returns immediately; a single long-lived asyncio
+worker (running in its own thread) drains the queue one batch at a time, so
+only one Chromium ever touches user_data and no HTTP request has to stay open
+while a batch runs. JobQueue(concurrency=N) lets N jobs overlap on the same
+browser; the server only does that when SCOUT_JOB_CONCURRENCY opts in.
+
+Each job also keeps an append-only event log (a "channel" event with the
+channel info, outliers and timings as each channel finishes, then one "job"
+event), which /jobs/<id>/events streams to clients as SSE or NDJSON. Only
+the newest MAX_JOBS_WITH_ROWS finished jobs keep the outlier rows in their
+events; older ones keep the counts.
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+MAX_JOBS_KEPT = 200  # Finished jobs are forgotten oldest-first past this
+MAX_JOBS_WITH_ROWS = 20  # Finished jobs whose events still carry full outlier rows
+FINISHED = ("done", "failed")
+
+
+class Job:
+    def __init__(self, channel_urls, options=None):
+        self.id = uuid.uuid4().hex
+        self.channel_urls = channel_urls
+        self.options = options or {}
+        self.status = "queued"
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.channels = OrderedDict(
+            (url, {"status": "queued", "outliers": 0, "saved": 0, "error": None,
+                   "started_at": None, "finished_at": None, "duration": None, "scroll": None})
+            for url in channel_urls
+        )
+        self.events = []
+        self.events_trimmed = False
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def _emit(self, event):
+        """Append to the event log and wake streaming readers. Caller holds the lock."""
+        event["seq"] = len(self.events) + 1
+        self.events.append(event)
+        self._changed.notify_all()
+
+    def on_progress(self, channel_url, status, result):
+        with self._lock:
+            if status == "running":
+                self._emit({"type": "channel_started", "channel_url": channel_url,
+                            "started_at": result.get("started_at")})
+            elif result.get("finished_at"):
+                self._emit({
+                    "type": "channel",
+                    "channel_url": channel_url,
+                    "status": status,
+                    "channel": result.get("channel"),
+                    "outliers": result.get("outliers") or [],
+                    "outliers_count": len(result.get("outliers") or []),
+                    "saved": result.get("saved", 0),
+                    "error": result.get("error"),
+                    "skip_reason": result.get("skip_reason"),
+                    "mode": result.get("mode"),
+                    "fetch": result.get("fetch"),
+                    "duration": result.get("duration"),
+                    "timings": result.get("timings"),
+                    "finished_at": result.get("finished_at"),
+                })
+            entry = self.channels.setdefault(channel_url, {})
+            entry.update({
+                "status": status,
+                "outliers": len(result.get("outliers") or []),
+                "saved": result.get("saved", 0),
+                "error": result.get("error"),
+                "started_at": result.get("started_at"),
+                "finished_at": result.get("finished_at"),
+                "duration": result.get("duration"),
+                "scroll": result.get("scroll"),
+                "mode": result.get("mode"),
+                "skipped_unchanged": result.get("skipped_unchanged", 0),
+                "network": result.get("network"),
+                "shard": result.get("shard"),
+                "fetch": result.get("fetch"),
+                "skip_reason": result.get("skip_reason"),
+            })
+
+    def finish(self, status, error=None):
+        with self._lock:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+            self._emit({"type": "job", "status": status, "error": error, "finished_at": self.finished_at})
+
+    def trim_events(self):
+        """Drop the outlier rows from this job's events (they're in the database); counts stay."""
+        with self._lock:
+            for event in self.events:
+                if event.get("outliers"):
+                    event["outliers"] = []
+            self.events_trimmed = True
+
+    def events_since(self, seq=0, timeout=15):
+        """
+        Events after `seq`, waiting up to `timeout` seconds for one to arrive.
+        Returns (events, finished); an empty list means the wait timed out.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.events) > seq or self.status in FINISHED, timeout)
+            return self.events[seq:], self.status in FINISHED
+
+    def to_dict(self):
+        with self._lock:
+            channels = [dict(entry, channel_url=url) for url, entry in self.channels.items()]
+        counts = {}
+        for entry in channels:
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        finished = [c for c in channels if c["finished_at"]]
+        elapsed = None
+        if self.started_at:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 2)
+        return {
+            "id": self.id,
+            "status": self.status,
+            "options": self.options,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed": elapsed,
+            "queue_wait": round((self.started_at or time.time()) - self.created_at, 2),
+            "total_channels": len(channels),
+            "completed_channels": len(finished),
+            "status_counts": counts,
+            "outliers_found": sum(c["outliers"] for c in channels),
+            "outliers_saved": sum(c["saved"] for c in channels),
+            "network": {
+                key: sum((c.get("network") or {}).get(key, 0) for c in channels)
+                for key in ("requests", "blocked", "bytes")
+            },
+            "avg_channel_duration": (
+                round(sum(c["duration"] or 0 for c in finished) / len(finished), 2) if finished else None
+            ),
+            "channels": channels,
+        }
+
+
+class JobQueue:
+    """
+    Runs `runner(channel_urls, on_progress=..., **options)` for each submitted job on a
+    dedicated event loop thread, up to `concurrency` jobs at a time. Thread-safe:
+    submit()/get() may be called from Flask request threads.
+    """
+
+    def __init__(self, runner, concurrency=1):
+        self.runner = runner
+        self.concurrency = max(1, concurrency)
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._queue = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run_loop, name="scout-worker", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        self._ready.set()
+        self._loop.run_until_complete(asyncio.gather(*(self._worker() for _ in range(self.concurrency))))
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            print(f"🧵 Job {job.id} started ({len(job.channel_urls)} channels)")
+            try:
+                await self.runner(job.channel_urls, on_progress=job.on_progress, **job.options)
+                job.finish("done")
+            except Exception as e:
+                print(f"❌ Job {job.id} failed: {e}")
+                job.finish("failed", str(e))
+            finally:
+                if job.status not in FINISHED:  # Cancelled
+                    job.finish("failed", "Cancelled")
+                with self._lock:
+                    self._prune()
+                self._queue.task_done()
+                print(f"🏁 Job {job.id} {job.status} in {job.finished_at - job.started_at:.1f}s")
+
+    def submit(self, channel_urls, **options):
+        self.start()
+        job = Job(channel_urls, options)
+        with self._lock:
+            self.jobs[job.id] = job
+            self._prune()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+        return job
+
+    @property
+    def thread_id(self):
+        return self._thread.ident if self._thread else None
+
+    def run_coroutine(self, coro):
+        """Schedule a coroutine on the worker loop (e.g. browser start/stop hooks)."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def queue_depth(self):
+        with self._lock:
+            return sum(1 for job in self.jobs.values() if job.status == "queued")
+
+    def _prune(self):
+        excess = len(self.jobs) - MAX_JOBS_KEPT
+        for job_id in list(self.jobs):
+            if excess <= 0:
+                break
+            if self.jobs[job_id].status in FINISHED:
+                del self.jobs[job_id]
+                excess -= 1
+        finished = [job for job in self.jobs.values() if job.status in FINISHED and not job.events_trimmed]
+        for job in finished[:-MAX_JOBS_WITH_ROWS or None]:
+            job.trim_events()
@@ -0,0 +1,260 @@
+"""
+Checkpoint journal for scout batches.
+
+Every batch and every channel in it is recorded in a local SQLite file
+(queued -> running -> done / failed, with attempt count and result counts),
+so a batch interrupted by a container restart or a browser crash picks up
+where it left off: run_with_journal() skips channels the batch already
+finished, retries failed ones with bounded attempts and exponential backoff,
+and skips channels whose os_channels.last_scouted is within FRESHNESS_TTL.
+
+A batch is identified by its channel set and options, so re-submitting the
+same list resumes the unfinished batch instead of starting over; the server
+also re-submits unfinished batches at boot.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from scroll import parse_iso
+
+JOURNAL_PATH = os.environ.get("SCOUT_JOURNAL_PATH", os.path.abspath("./data/journal.sqlite"))
+ENABLED = os.environ.get("SCOUT_JOURNAL", "1") == "1"
+FRESHNESS_TTL_HOURS = float(os.environ.get("SCOUT_FRESHNESS_TTL_HOURS", 6))  # 0 = always rescout
+MAX_ATTEMPTS = int(os.environ.get("SCOUT_MAX_ATTEMPTS", 3))
+RETRY_BASE_DELAY = float(os.environ.get("SCOUT_RETRY_BASE_DELAY", 30))  # Seconds, doubled per round
+RESUME_MAX_AGE_HOURS = 24  # Unfinished batches older than this aren't resumed at boot
+
+FINISHED = ("done", "skipped", "no_videos")  # Channel states a resumed batch doesn't redo
+
+
+def batch_key(channel_urls, options):
+    payload = json.dumps([sorted(set(channel_urls)), options], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class Journal:
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS batches (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                batch_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                options TEXT,
+                total INTEGER,
+                created_at REAL,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS batches_key ON batches (batch_key, status);
+            CREATE TABLE IF NOT EXISTS channels (
+                batch_id INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                position INTEGER,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                outliers INTEGER DEFAULT 0,
+                saved INTEGER DEFAULT 0,
+                error TEXT,
+                started_at REAL,
+                finished_at REAL,
+                PRIMARY KEY (batch_id, url)
+            );
+        """)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def open_batch(self, channel_urls, options):
+        """Resume the unfinished batch for this channel set, or start one. Returns (batch_id, resumed)."""
+        key = batch_key(channel_urls, options)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id FROM batches WHERE batch_key = ? AND status = 'running' ORDER BY id DESC LIMIT 1", (key,)
+            ).fetchone()
+            if row:
+                self._conn.execute("UPDATE batches SET updated_at = ? WHERE id = ?", (now, row["id"]))
+                return row["id"], True
+            batch_id = self._conn.execute(
+                "INSERT INTO batches (batch_key, status, options, total, created_at, updated_at) "
+                "VALUES (?, 'running', ?, ?, ?, ?)",
+                (key, json.dumps(options, default=str), len(channel_urls), now, now),
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO channels (batch_id, url, position, status) VALUES (?, ?, ?, 'queued')",
+                [(batch_id, url, i) for i, url in enumerate(channel_urls)],
+            )
+            return batch_id, False
+
+    def channels(self, batch_id):
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM channels WHERE batch_id = ? ORDER BY position",
+                                      (batch_id,)).fetchall()
+        return {row["url"]: dict(row) for row in rows}
+
+    def mark_running(self, batch_id, url):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE channels SET status = 'running', attempts = attempts + 1, started_at = ?, error = NULL "
+                "WHERE batch_id = ? AND url = ?", (time.time(), batch_id, url)
+            )
+
+    def mark_finished(self, batch_id, url, status, outliers=0, saved=0, error=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE channels SET status = ?, outliers = ?, saved = ?, error = ?, finished_at = ? "
+                "WHERE batch_id = ? AND url = ?", (status, outliers, saved, error, time.time(), batch_id, url)
+            )
+
+    def finish_batch(self, batch_id):
+        with self._lock, self._conn:
+            unfinished = self._conn.execute(
+                f"SELECT COUNT(*) FROM channels WHERE batch_id = ? AND status NOT IN {FINISHED}", (batch_id,)
+            ).fetchone()[0]
+            status = "done" if not unfinished else "partial"
+            self._conn.execute("UPDATE batches SET status = ?, updated_at = ? WHERE id = ?",
+                               (status, time.time(), batch_id))
+            return status
+
+    def incomplete_batches(self, max_age_hours=RESUME_MAX_AGE_HOURS):
+        """Batches still marked running (i.e. the process died mid-batch), newest first."""
+        since = time.time() - max_age_hours * 3600
+        with self._lock:
+            batches = self._conn.execute(
+                "SELECT id, options FROM batches WHERE status = 'running' AND updated_at >= ? ORDER BY id DESC",
+                (since,),
+            ).fetchall()
+            out = []
+            for batch in batches:
+                urls = [r[0] for r in self._conn.execute(
+                    "SELECT url FROM channels WHERE batch_id = ? ORDER BY position", (batch["id"],))]
+                out.append({"id": batch["id"], "channel_urls": urls, "options": json.loads(batch["options"] or "{}")})
+            return out
+
+
+def fresh_channels(storage, channel_urls, ttl_hours=FRESHNESS_TTL_HOURS):
+    """URLs whose os_channels.last_scouted is within ttl_hours. Blocking."""
+    if ttl_hours <= 0 or not channel_urls:
+        return set()
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=ttl_hours)
+    fresh = set()
+    urls = list(channel_urls)
+    for i in range(0, len(urls), 100):
+        rows = storage.query("os_channels", "url, name, last_scouted", [("url", "in", urls[i:i + 100])])
+        for row in rows:
+            # Rows the frontend queued have no name and a default last_scouted; they were never scouted
+            if row.get("name") and row.get("last_scouted") and parse_iso(row["last_scouted"]) >= cutoff:
+                fresh.add(row["url"])
+    return fresh
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    """Process-wide journal, or None when SCOUT_JOURNAL=0."""
+    global _journal
+    if not ENABLED:
+        return None
+    with _journal_lock:
+        if _journal is None:
+            _journal = Journal()
+        return _journal
+
+
+async def run_with_journal(runner, channel_urls, on_progress=None, journal=None, **options):
+    """
+    Call runner(channel_urls, on_progress=..., **options) (main.run or
+    sharded.run_sharded) through the journal: skip finished and fresh
+    channels, record every channel's progress, and retry failures up to
+    MAX_ATTEMPTS times with exponential backoff. Returns one result per
+    input channel, in order; skipped channels have status "skipped".
+    """
+    from main import new_result
+    from storage import get_storage
+
+    journal = journal or get_journal()
+    if isinstance(channel_urls, str):
+        channel_urls = [channel_urls]
+    channel_urls = list(dict.fromkeys(url.strip() for url in channel_urls if url.strip()))
+    if journal is None:
+        return await runner(channel_urls, on_progress=on_progress, **options)
+
+    batch_id, resumed = await asyncio.to_thread(journal.open_batch, channel_urls, options)
+    states = await asyncio.to_thread(journal.channels, batch_id)
+    results = {}
+
+    def skip(url, reason):
+        result = new_result(url)
+        result.update(status="skipped", skip_reason=reason, finished_at=time.time())
+        results[url] = result
+        if on_progress:
+            on_progress(url, "skipped", result)
+
+    for url, state in states.items():
+        if state["status"] in FINISHED:
+            skip(url, "done_in_batch")
+        elif state["attempts"] >= MAX_ATTEMPTS:
+            result = new_result(url)
+            result.update(status="failed", error=f"Gave up after {state['attempts']} attempts: {state['error']}",
+                          finished_at=time.time())
+            results[url] = result
+            if on_progress:
+                on_progress(url, "failed", result)
+
+    if not options.get("full_rescan"):
+        candidates = [url for url in channel_urls if url not in results]
+        try:
+            fresh = await asyncio.to_thread(fresh_channels, get_storage(), candidates)
+        except Exception as e:
+            print(f"⚠️ Could not check channel freshness: {e}")
+            fresh = set()
+        for url in fresh:
+            skip(url, "fresh")
+            await asyncio.to_thread(journal.mark_finished, batch_id, url, "skipped")
+
+    if resumed:
+        print(f"♻️ Resuming batch {batch_id}: {len(results)} of {len(channel_urls)} channels need no work")
+
+    # SQLite writes here are sub-millisecond (WAL, synchronous=NORMAL), so they run inline
+    def progress(url, status, result):
+        if result.get("finished_at"):
+            # A "done" channel whose outliers failed to save isn't finished; retry it
+            finished_as = "failed" if result.get("error") else result["status"]
+            journal.mark_finished(batch_id, url, finished_as, len(result.get("outliers") or []),
+                                  result.get("saved", 0), result.get("error"))
+        elif status == "running":
+            journal.mark_running(batch_id, url)
+        if on_progress:
+            on_progress(url, status, result)
+
+    for attempt in range(MAX_ATTEMPTS):
+        states = await asyncio.to_thread(journal.channels, batch_id)
+        todo = [url for url in channel_urls
+                if states[url]["status"] not in FINISHED and states[url]["attempts"] < MAX_ATTEMPTS]
+        if not todo:
+            break
+        if attempt:
+            delay = RETRY_BASE_DELAY * 2 ** (attempt - 1)
+            print(f"🔁 Retrying {len(todo)} failed channels in {delay:.0f}s (round {attempt + 1}/{MAX_ATTEMPTS})")
+            await asyncio.sleep(delay)
+        for result in await runner(todo, on_progress=progress, **options):
+            results[result["channel_url"]] = result
+
+    status = await asyncio.to_thread(journal.finish_batch, batch_id)
+    print(f"📒 Batch {batch_id} {status}")
+    return [results.get(url) or dict(new_result(url), status="failed", error="Not run") for url in channel_urls]
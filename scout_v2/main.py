@@ -3,274 +3,401 @@ import os
 import sys
 import json
 import time
-from playwright.async_api import async_playwright
-from supabase import create_client, Client
+from datetime import timedelta
+from browser_pool import BrowserManager
+from scroll import scroll_channel, parse_iso
+from db import BufferedWriter
+from storage import get_storage
+from dedup_index import get_index
+from metrics import timed, record_channel
+from concurrency import AdaptiveLimiter
+from scoring import score_videos, cross_check, SCORER, USES_EXTENSION, MIN_ITEMS
+import snapshots
+from innertube import ChannelLister, ListingUnavailable, ENABLED as HTTP_LISTING
 
-# Configuration
-EXTENSION_PATH = os.path.abspath("./1of10_ext")
-USER_DATA_DIR = os.path.abspath("./user_data")
+# Incremental mode re-checks this many days before the last scout, since
+# recent uploads keep gaining views (and multiplier) after we first see them.
+INCREMENTAL_LOOKBACK_DAYS = int(os.environ.get("SCOUT_INCREMENTAL_LOOKBACK_DAYS", 7))
 
-# Supabase Config
-SUPABASE_URL = "https://ulwjlqmccxfmxieapopy.supabase.co"
-SUPABASE_KEY = "sb_publishable_nCcf-klL6pTn9UueRR6TlQ_eMPbUsk8"
+def load_watermark(storage, channel_url):
+    """
+    Everything we already know about a channel, loaded once per scout:
+    its row id, when it was last scouted, and its known outliers keyed by
+    video_id. Returns None if the channel has never been scouted by us.
+    """
+    rows = storage.query("os_channels", "id, name, last_scouted", [("url", "eq", channel_url)], limit=1)
+    if not rows:
+        return None
+    channel = rows[0]
+    # Rows queued by the frontend have no name and a default last_scouted,
+    # so only trust the watermark once the scout itself has written the row.
+    if not channel.get("name") or not channel.get("last_scouted"):
+        return None
 
-async def process_channel(context, channel_url, index, total, sem):
-    async with sem:
-        print(f"📺 Processing ({index + 1}/{total}): {channel_url}")
-        page = await context.new_page()
-        try:
-            # Navigate to videos page
-            target_url = channel_url
-            if not target_url.endswith('/videos'):
-                target_url = target_url.rstrip('/') + '/videos'
-            target_url += '?view=0&sort=dd&shelf_id=0' # Newest first
+    known = {}
+    # Paged: an unlimited query stops at PostgREST's row cap on large channels
+    for page in storage.scan("os_outliers", "video_id, views, outlier_score, published_at", key="video_id",
+                             filters=[("channel_id", "eq", channel["id"])]):
+        for row in page:
+            known[row["video_id"]] = row
+
+    cutoff = parse_iso(channel["last_scouted"]) - timedelta(days=INCREMENTAL_LOOKBACK_DAYS)
+    # Known outliers older than the cutoff mark a point we've definitely scrolled past before
+    stop_ids = {
+        vid for vid, row in known.items()
+        if row.get("published_at") and parse_iso(row["published_at"]) < cutoff
+    }
+    return {
+        "channel_id": channel["id"],
+        "last_scouted": channel["last_scouted"],
+        "cutoff": cutoff,
+        "known": known,
+        "stop_ids": stop_ids,
+    }
+
+def is_changed(outlier, known_row):
+    if not known_row:
+        return True
+    return (outlier.get("views") != known_row.get("views")
+            or float(outlier.get("outlier_score") or 0) != float(known_row.get("outlier_score") or 0))
+
+# Scraped fields that aren't os_outliers columns
+NON_COLUMNS = ("published_text", "native_score", "extension_score")
+
+def select_outliers(videos):
+    """Videos scored above 1.5x (see scoring.py) with at least 5k views."""
+    return [
+        {k: v for k, v in video.items() if k not in NON_COLUMNS}
+        for video in videos
+        if video["video_id"] and video["outlier_score"] and video["outlier_score"] > 1.5 and video["views"] >= 5000
+    ]
+
+def new_result(channel_url):
+    return {
+        "channel_url": channel_url,
+        "status": "queued",
+        "channel": None,
+        "outliers": [],
+        "saved": 0,
+        "error": None,
+        "snapshot_error": None,
+        "started_at": None,
+        "finished_at": None,
+        "duration": None,
+        "scroll": None,
+        "mode": None,
+        "skipped_unchanged": 0,
+        "network": None,
+        "videos_seen": 0,
+        "duplicates": [],
+        "scoring": None,
+        "fetch": None,
+        "timings": {},
+    }
+
+CHANNEL_INFO_JS = """
+() => {
+    try {
+        const header = document.querySelector("ytd-channel-header-renderer");
+        const nameEl = header ? header.querySelector("#text") : null;
+        const imgEl = header ? header.querySelector("#img") : null;
+        return {
+            name: nameEl ? nameEl.innerText : "",
+            avatar_url: imgEl ? imgEl.src : ""
+        };
+    } catch (e) {
+        return { name: "", avatar_url: "" };
+    }
+}
+"""
 
+async def list_with_browser(browser, channel_url, result, limiter, **list_options):
+    """
+    Render the channel's /videos grid on a pooled page and scroll it.
+    Returns (videos, channel_info, scroll_report), or None if the grid never appeared.
+    """
+    with timed(result, "acquire_page"):
+        page = await browser.acquire()
+    browser.resource_policy.reset(page)
+    try:
+        # Navigate to videos page
+        target_url = channel_url
+        if not target_url.endswith('/videos'):
+            target_url = target_url.rstrip('/') + '/videos'
+        target_url += '?view=0&sort=dd&shelf_id=0' # Newest first
+
+        with timed(result, "goto"):
             await page.goto(target_url, wait_until="domcontentloaded")
-            
-            # Wait for video grid
-            try:
+
+        # Wait for video grid
+        try:
+            with timed(result, "wait_grid"):
                 await page.wait_for_selector('ytd-rich-item-renderer', timeout=15000)
-            except:
-                print(f"⚠️ Timeout waiting for videos on {channel_url}")
-                return
-
-            # Robust scrolling to load full channel
-            last_height = await page.evaluate("document.documentElement.scrollHeight")
-            scroll_attempts = 0
-            max_scrolls = 50 # Allow up to 50 scrolls (approx 100s)
-            
-            while scroll_attempts < max_scrolls:
-                await page.evaluate("window.scrollTo(0, document.documentElement.scrollHeight)")
-                await asyncio.sleep(2) # Wait for load
-                
-                new_height = await page.evaluate("document.documentElement.scrollHeight")
-                if new_height == last_height:
-                    # Try one more time with a small delay just in case
-                    await asyncio.sleep(2)
-                    new_height = await page.evaluate("document.documentElement.scrollHeight")
-                    if new_height == last_height:
-                        break # Reached bottom
-                
-                last_height = new_height
-                scroll_attempts += 1
-
-            # Wait for 1of10 extension to load
-            await asyncio.sleep(3)
-
-            # Extract Channel Info
-            channel_info = await page.evaluate("""
-                () => {
-                    try {
-                        const header = document.querySelector("ytd-channel-header-renderer");
-                        const nameEl = header ? header.querySelector("#text") : null;
-                        const imgEl = header ? header.querySelector("#img") : null;
-                        return {
-                            name: nameEl ? nameEl.innerText : "",
-                            avatar_url: imgEl ? imgEl.src : ""
-                        };
-                    } catch (e) {
-                        return { name: "", avatar_url: "" };
-                    }
-                }
-            """)
-            
-            # Upsert Channel
-            channel_id = None
-            supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-            
-            if channel_info['name']:
-                try:
-                    # Try upsert with avatar_url
-                    res = supabase.table("os_channels").upsert({
+        except:
+            limiter.observe(timed_out=True)
+            return None
+        limiter.observe(result["timings"]["goto"] + result["timings"]["wait_grid"])
+
+        # Scroll until the grid stops growing (or a limit is hit), then let 1of10 settle
+        videos = []
+        scroll_report = await scroll_channel(page, on_items=videos.extend, wait_for_badges=USES_EXTENSION,
+                                             **list_options)
+
+        # Extract Channel Info
+        with timed(result, "channel_info"):
+            channel_info = await page.evaluate(CHANNEL_INFO_JS)
+        return videos, channel_info, scroll_report
+    finally:
+        result["network"] = browser.resource_policy.stats(page)
+        await browser.release(page)
+
+async def list_with_http(lister, channel_url, result, limiter, **list_options):
+    """
+    Same as list_with_browser, from ytInitialData and continuation requests.
+    Raises ListingUnavailable when the caller should fall back to the browser.
+    """
+    stats = {"requests": 0, "blocked": 0, "bytes": 0, "blocked_by_type": {}}
+    result["network"] = stats
+    try:
+        with timed(result, "goto"):
+            first_page = await lister.fetch_first_page(channel_url, stats)
+    except ListingUnavailable:
+        limiter.observe(timed_out=True)  # Errors and 429s on the first request mean back off
+        raise
+    limiter.observe(result["timings"]["goto"])
+
+    videos = []
+    channel_info, scroll_report = await lister.list_channel(channel_url, first_page=first_page, stats=stats,
+                                                            on_items=videos.extend, **list_options)
+    if scroll_report is None:
+        return None
+    return videos, channel_info, scroll_report
+
+async def process_channel(browser, writer, channel_url, index, total, limiter, on_progress=None,
+                          max_items=None, published_after=None, full_rescan=False, snapshot_writer=None,
+                          lister=None):
+    result = new_result(channel_url)
+    pending_save = None
+    scraped = None
+    queued_at = time.perf_counter()
+    try:
+        async with limiter:
+            result["timings"]["queue_wait"] = round(time.perf_counter() - queued_at, 3)
+            print(f"📺 Processing ({index + 1}/{total}): {channel_url}")
+            result["status"] = "running"
+            result["started_at"] = time.time()
+            if on_progress:
+                on_progress(channel_url, "running", result)
+            try:
+                # Incremental mode: stop scrolling at what we saw last time
+                watermark = None
+                if not full_rescan:
+                    try:
+                        with timed(result, "watermark"):
+                            watermark = await asyncio.to_thread(load_watermark, get_storage(), channel_url)
+                    except Exception as e:
+                        print(f"⚠️ Could not load watermark for {channel_url}, doing full scan: {e}")
+                result["mode"] = "incremental" if watermark else "full"
+
+                should_stop = None
+                if watermark:
+                    cutoff = watermark["cutoff"]
+                    if published_after is None or parse_iso(published_after) < cutoff:
+                        published_after = cutoff
+                    stop_ids = watermark["stop_ids"]
+                    should_stop = lambda snap: "known_video" if (
+                        snap.get("last_video_id") in stop_ids or not stop_ids.isdisjoint(snap.get("batch_ids") or ())
+                    ) else None
+
+                # Native scoring needs enough neighbouring uploads for a baseline even when incremental
+                list_options = {"max_items": max_items, "published_after": published_after,
+                                "should_stop": should_stop,
+                                "min_items": MIN_ITEMS if SCORER != "extension" else 0}
+                listing = None
+                if lister:
+                    try:
+                        result["fetch"] = "http"
+                        listing = await list_with_http(lister, channel_url, result, limiter, **list_options)
+                    except ListingUnavailable as e:
+                        print(f"⚠️ HTTP listing unavailable for {channel_url}, using the browser: {e}")
+                        result["timings"].pop("goto", None)
+                if not listing:
+                    result["fetch"] = "browser"
+                    listing = await list_with_browser(browser, channel_url, result, limiter, **list_options)
+                if not listing:
+                    print(f"⚠️ Timeout waiting for videos on {channel_url}")
+                    result["status"] = "no_videos"
+                    return result
+                videos, channel_info, scroll_report = listing
+
+                result["scroll"] = scroll_report
+                result["timings"]["scroll"] = scroll_report["scroll_seconds"]
+                result["timings"]["extension_wait"] = scroll_report["badge_wait_seconds"]
+                print(f"📜 {channel_url}: {scroll_report['items']} videos after {scroll_report['scrolls']} "
+                      f"{'pages' if result['fetch'] == 'http' else 'scrolls'} "
+                      f"({scroll_report['stop_reason']}, {scroll_report['scroll_seconds']}s)")
+                result["channel"] = channel_info
+
+                # Queue channel upsert; the writer resolves its id when it flushes
+                channel_id = watermark["channel_id"] if watermark else None
+                if channel_info['name']:
+                    channel_id = writer.add_channel({
                         "url": channel_url,
                         "name": channel_info['name'],
                         "avatar_url": channel_info['avatar_url'],
                         "last_scouted": "now()"
-                    }, on_conflict="url").execute()
-                    if res.data:
-                        channel_id = res.data[0]['id']
-                except Exception as e:
-                    print(f"⚠️ Channel Upsert Error (trying without avatar): {e}")
-                    try:
-                        res = supabase.table("os_channels").upsert({
-                            "url": channel_url,
-                            "name": channel_info['name'],
-                            "last_scouted": "now()"
-                        }, on_conflict="url").execute()
-                        if res.data:
-                            channel_id = res.data[0]['id']
-                    except Exception as e2:
-                        print(f"❌ Channel Upsert Failed: {e2}")
-
-            # Extract Data
-            outliers = await page.evaluate("""
-                () => {
-                    const results = [];
-                    const videoElements = document.querySelectorAll('ytd-rich-item-renderer');
-                    
-                    videoElements.forEach(el => {
-                        const titleEl = el.querySelector('#video-title');
-                        const thumbnailEl = el.querySelector('ytd-thumbnail img');
-                        const linkEl = el.querySelector('a#video-title-link');
-                        const metadataLine = el.querySelector('#metadata-line');
-                        
-                        // Extract Views
-                        let views = 0;
-                        let viewCountText = "";
-                        if (metadataLine) {
-                            const spans = metadataLine.querySelectorAll('span');
-                            for (const span of spans) {
-                                if (span.innerText.includes('views')) {
-                                    viewCountText = span.innerText;
-                                    const num = parseFloat(viewCountText.replace(/[^0-9.]/g, ''));
-                                    const multiplier = viewCountText.toUpperCase().includes('K') ? 1000 : 
-                                                       viewCountText.toUpperCase().includes('M') ? 1000000 : 1;
-                                    views = Math.round(num * multiplier);
-                                    break;
-                                }
-                            }
-                        }
-
-                        // Extract Date
-                        let publishedAt = null;
-                        if (metadataLine) {
-                            const spans = metadataLine.querySelectorAll('span');
-                            for (const span of spans) {
-                                if (span.innerText.includes('ago')) {
-                                    const timeText = span.innerText;
-                                    const now = new Date();
-                                    const num = parseInt(timeText.match(/\\d+/)?.[0] || "0");
-                                    
-                                    if (timeText.includes('hour')) now.setHours(now.getHours() - num);
-                                    else if (timeText.includes('day')) now.setDate(now.getDate() - num);
-                                    else if (timeText.includes('week')) now.setDate(now.getDate() - num * 7);
-                                    else if (timeText.includes('month')) now.setMonth(now.getMonth() - num);
-                                    else if (timeText.includes('year')) now.setFullYear(now.getFullYear() - num);
-                                    
-                                    publishedAt = now.toISOString();
-                                    break;
-                                }
-                            }
-                        }
-
-                        // Extract Thumbnail
-                        let thumbnail = "";
-                        if (thumbnailEl) {
-                            thumbnail = thumbnailEl.src || thumbnailEl.getAttribute('data-src') || "";
-                        }
-                        
-                        if (!thumbnail || thumbnail.includes('data:image') || thumbnail.includes('spacer')) {
-                            if (linkEl && linkEl.href) {
-                                const urlObj = new URL(linkEl.href);
-                                const videoId = urlObj.searchParams.get("v");
-                                if (videoId) {
-                                    thumbnail = `https://i.ytimg.com/vi/${videoId}/hqdefault.jpg`;
-                                }
-                            }
-                        }
-
-                        // Look for 1of10 multiplier
-                        const allText = el.innerText;
-                        const multiplierMatch = allText.match(/(\\d+\\.\\d+)x/);
-                        
-                        if (multiplierMatch) {
-                            const multiplier = parseFloat(multiplierMatch[1]);
-                            
-                            if (multiplier > 1.5 && views >= 5000) {
-                                let videoId = "";
-                                if (linkEl && linkEl.href) {
-                                    const urlObj = new URL(linkEl.href);
-                                    videoId = urlObj.searchParams.get("v");
-                                }
-
-                                results.push({
-                                    video_id: videoId,
-                                    title: titleEl ? titleEl.innerText : '',
-                                    url: linkEl ? linkEl.href : '',
-                                    thumbnail: thumbnail,
-                                    views: views,
-                                    outlier_score: multiplier,
-                                    channel_url: window.location.href,
-                                    published_at: publishedAt
-                                });
-                            }
-                        }
-                    });
-                    
-                    return results;
-                }
-            """)
-            
-            print(f"✅ Found {len(outliers)} outliers on {channel_url}")
+                    })
+
+                with timed(result, "score"):
+                    videos = await asyncio.to_thread(score_videos, videos)
+                scraped = videos
+                if SCORER == "both":
+                    result["scoring"] = dict(cross_check(videos), mode=SCORER)
+                else:
+                    result["scoring"] = {"mode": SCORER}
+
+                outliers = select_outliers(videos)
+                network = result["network"]
+                print(f"✅ Found {len(outliers)} outliers on {channel_url} "
+                      f"({network['requests']} requests, {network['blocked']} blocked, "
+                      f"{network['bytes'] / 1024 / 1024:.1f}MB)")
+                result["outliers"] = outliers
+                result["videos_seen"] = len(videos)
             
-            # Save to Supabase
-            if outliers:
-                data_to_insert = []
-                for o in outliers:
-                    if o['video_id']:
-                        o['channel_id'] = channel_id # Add channel_id
-                        if 'channel_url' in o:
-                            del o['channel_url'] # Remove extra field not in DB
-                        if 'url' in o:
-                            del o['url'] # Remove extra field not in DB
-                        data_to_insert.append(o)
+                # Save to Supabase
+                if outliers:
+                    data_to_insert = []
+                    known = watermark["known"] if watermark else {}
+                    for o in outliers:
+                        if o['video_id'] and not is_changed(o, known.get(o['video_id'])):
+                            result["skipped_unchanged"] += 1
+                            continue
+                        if o['video_id']:
+                            # channel_id is filled in by the writer; url fields aren't DB columns
+                            data_to_insert.append({k: v for k, v in o.items() if k not in ('channel_url', 'url')})
                 
-                if data_to_insert:
-                    try:
-                        response = supabase.table("os_outliers").upsert(data_to_insert, on_conflict="video_id").execute()
-                        print(f"💾 Saved {len(data_to_insert)} to DB")
-                    except Exception as db_err:
-                        print(f"❌ Database Error: {db_err}")
+                    if result["skipped_unchanged"]:
+                        print(f"⏭️ Skipped {result['skipped_unchanged']} unchanged outliers on {channel_url}")
+
+                    # Drop reposts of videos we already have (near-identical title or same thumbnail)
+                    dup_index = get_index()
+                    if dup_index is not None and data_to_insert:
+                        with timed(result, "dedupe"):
+                            data_to_insert, duplicates = await asyncio.to_thread(dup_index.check_and_add,
+                                                                                 data_to_insert)
+                        result["duplicates"] = [
+                            {"video_id": d["video_id"], "duplicate_of": d["duplicate_of"], "similarity": d["similarity"]}
+                            for d in duplicates
+                        ]
+                        if duplicates:
+                            print(f"🔁 Skipped {len(duplicates)} near-duplicate outliers on {channel_url}")
+                    if data_to_insert:
+                        pending_save = writer.add_outliers(data_to_insert, channel_id)
+
+                result["status"] = "done"
+
+            except Exception as e:
+                print(f"❌ Error processing {channel_url}: {e}")
+                result["status"] = "failed"
+                result["error"] = str(e)
 
-        except Exception as e:
-            print(f"❌ Error processing {channel_url}: {e}")
-        finally:
-            await page.close()
+        # The concurrency slot is free again; only this channel waits on its write
+        # Snapshots are history, not results: a failure here must not fail the channel
+        if snapshot_writer and scraped:
+            try:
+                with timed(result, "snapshot"):
+                    await snapshot_writer.add(channel_url, scraped, scraped_at=result["started_at"])
+            except Exception as e:
+                print(f"⚠️ Could not snapshot {channel_url}: {e}")
+                result["snapshot_error"] = str(e)
+        if pending_save:
+            try:
+                with timed(result, "db_wait"):
+                    result["saved"] = await pending_save
+            except Exception as db_err:
+                result["error"] = f"Database Error: {db_err}"
+        return result
+    finally:
+        result["finished_at"] = time.time()
+        if result["started_at"]:
+            result["duration"] = round(result["finished_at"] - result["started_at"], 2)
+        record_channel(result)
+        if on_progress:
+            on_progress(channel_url, result["status"], result)
+
+async def run(channel_urls, on_progress=None, browser=None, max_items=None, published_after=None,
+              full_rescan=False, limiter=None):
+    """
+    Scout a batch of channels and return one result dict per channel.
 
-async def run(channel_urls):
+    on_progress(channel_url, status, result) is called when a channel starts
+    and when it finishes, so callers (e.g. the job queue) can track progress.
+    Pass a started BrowserManager to reuse a warm browser across batches;
+    otherwise one is launched for this batch (lazily, when channels are
+    listed over HTTP and only fallbacks need it) and closed afterwards.
+    max_items / published_after bound how far back each channel is scrolled.
+    By default channels we've scouted before are scanned incrementally (only
+    back to the last watermark); full_rescan=True scrolls the whole catalogue.
+    Pass a long-lived AdaptiveLimiter to carry the learned concurrency limit
+    across batches; by default each batch starts from half the page pool.
+    """
     if isinstance(channel_urls, str):
         channel_urls = [channel_urls]
+    channel_urls = [url.strip() for url in channel_urls if url.strip()]
 
     print(f"🚀 Starting Batch Scout for {len(channel_urls)} channels")
-    
-    if not os.path.exists(EXTENSION_PATH):
-        print(f"❌ Extension not found at {EXTENSION_PATH}")
-        return
-
-    async with async_playwright() as p:
-        # Launch browser ONCE
-        context = await p.chromium.launch_persistent_context(
-            USER_DATA_DIR,
-            headless=False, # Must be false for extension
-            args=[
-                f"--disable-extensions-except={EXTENSION_PATH}",
-                f"--load-extension={EXTENSION_PATH}",
-                "--no-sandbox",
-                "--disable-setuid-sandbox",
-                "--disable-dev-shm-usage"
-            ],
-            viewport={"width": 1920, "height": 1080}
-        )
+
+    owns_browser = browser is None
+    if owns_browser:
+        browser = BrowserManager()
+    if not HTTP_LISTING:
+        await browser.start()
+
+    writer = BufferedWriter()
+    await writer.start()
+    # Every scraped video (not just outliers) goes to the local history store
+    snapshot_writer = snapshots.SnapshotWriter() if snapshots.ENABLED else None
+    # Channels are listed over plain HTTP; the browser only starts if one needs it
+    lister = ChannelLister() if HTTP_LISTING else None
+
+    results = []
+    try:
+        # Never more channels than pooled pages; fewer while pages load slowly or the host is busy
+        limiter = limiter or AdaptiveLimiter(ceiling=browser.pool_size)
+        tasks = [process_channel(browser, writer, url, i, len(channel_urls), limiter, on_progress,
+                                 max_items=max_items, published_after=published_after,
+                                 full_rescan=full_rescan, snapshot_writer=snapshot_writer, lister=lister)
+                 for i, url in enumerate(channel_urls)]
         
-        try:
-            sem = asyncio.Semaphore(8) # Process 8 channels at once
-            tasks = [process_channel(context, url.strip(), i, len(channel_urls), sem) 
-                     for i, url in enumerate(channel_urls) if url.strip()]
-            
-            await asyncio.gather(*tasks)
-            
-        except Exception as e:
-            print(f"❌ Critical Batch Error: {e}")
-        finally:
-            await context.close()
-            print("💤 Waiting 3s for browser process to exit...")
-            await asyncio.sleep(3)
+        results = await asyncio.gather(*tasks)
+        
+    except Exception as e:
+        print(f"❌ Critical Batch Error: {e}")
+    finally:
+        # Final flush of anything still buffered
+        await writer.close()
+        print(f"💾 DB writes: {writer.stats}")
+        if snapshot_writer:
+            await snapshot_writer.close()
+            print(f"🗄️ Snapshots: {snapshot_writer.stats}")
+        if lister:
+            await lister.close()
+        if limiter:
+            print(f"🚦 Concurrency: {limiter.snapshot()}")
+        if owns_browser:
+            await browser.stop()
+
+    return list(results)
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python main.py <channel_url_or_comma_separated_list>")
+    args = [a for a in sys.argv[1:] if a != "--full"]
+    if not args:
+        print("Usage: python main.py [--full] <channel_url_or_comma_separated_list>")
         sys.exit(1)
     
     # Handle comma-separated list from command line
-    urls = sys.argv[1].split(',')
-    asyncio.run(run(urls))
+    urls = args[0].split(',')
+    from functools import partial
+    from journal import run_with_journal
+    from channels import run_canonical
+    asyncio.run(run_canonical(partial(run_with_journal, run), urls, full_rescan="--full" in sys.argv))
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Nightly maintenance for os_outliers: fix broken thumbnails and remove
+near-identical duplicates (same title, score within 0.2). Reposts with
+slightly different titles or the same thumbnail (see dedup_index.py) are
+only reported unless --delete-near-duplicates is given.
+
+Pages through the table with keyset pagination on video_id, selecting only
+the columns it needs, and applies each page's fixes with one bulk upsert and
+one in_-filtered delete instead of a round trip per row. Rows aren't kept
+between pages, but exact-duplicate detection needs every title it has seen:
+memory grows by one 8-byte hash and a score per distinct title/score bucket
+(roughly 100 bytes each in a dict, ~100MB per million distinct titles). The
+near-duplicate index is rebuilt on disk as it goes and swapped in at the end.
+
+Usage: python maintenance.py [--dry-run] [--no-thumbnails] [--no-dedupe] [--no-near-duplicates]
+                             [--delete-near-duplicates]
+"""
+
+import argparse
+import hashlib
+import time
+from storage import get_storage
+from dedup_index import DuplicateIndex, INDEX_PATH
+
+PAGE_SIZE = 1000  # PostgREST's default max-rows
+COLUMNS = "video_id,title,outlier_score,thumbnail"
+
+
+def is_broken_thumbnail(thumbnail):
+    return (not thumbnail or thumbnail.strip() == '' or 'placeholder' in thumbnail.lower()
+            or 'data:image' in thumbnail)
+
+
+def dedupe_key(title, score):
+    # Round to 0.2 precision; hashed to 8 bytes so each seen entry stays small
+    key = f"{(title or '').lower()}_{round((score or 0) * 5)}"
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+def iter_pages(storage, columns=COLUMNS, page_size=PAGE_SIZE, stats=None):
+    """Yield os_outliers rows page by page, ordered by video_id."""
+    return storage.scan("os_outliers", columns, key="video_id", page_size=page_size, stats=stats)
+
+
+def run_maintenance(fix_thumbnails=True, dedupe=True, near_duplicates=True, delete_near_duplicates=False,
+                    dry_run=False, storage=None, index_path=INDEX_PATH):
+    storage = storage or get_storage()
+    t0 = time.time()
+    stats = {"pages": 0, "rows": 0, "thumbnails_fixed": 0, "duplicates_removed": 0,
+             "near_duplicates": 0, "round_trips": 0, "errors": 0, "dry_run": dry_run}
+    seen = {}  # dedupe_key -> score of the row we kept
+
+    # Rebuild the near-duplicate index from the rows we keep into staging
+    # tables next to the live ones, then swap it in (see DuplicateIndex.replace_with)
+    index = None
+    if dedupe and near_duplicates:
+        index = DuplicateIndex(index_path, prefix="rebuild_")
+        index.clear()  # Leftovers from an interrupted run
+
+    print(f"🧹 Running maintenance{' (dry run)' if dry_run else ''}...")
+    for rows in iter_pages(storage, stats=stats):
+        stats["rows"] += len(rows)
+        thumbnail_fixes = []
+        duplicates = []
+
+        kept = []
+        for row in rows:
+            video_id = row["video_id"]
+            score = float(row.get("outlier_score") or 0)
+
+            if dedupe:
+                key = dedupe_key(row.get("title"), score)
+                if key in seen and abs(seen[key] - score) <= 0.2:
+                    duplicates.append(video_id)
+                    continue
+                seen[key] = score
+            kept.append(row)
+
+        if index is not None:
+            kept, near = index.check_and_add(kept)
+            for dup in near:
+                print(f"{'❌' if delete_near_duplicates else '🔁'} Near-duplicate of {dup['duplicate_of']} "
+                      f"({dup['similarity']}): {(dup.get('title') or '')[:50]}...")
+                if delete_near_duplicates:
+                    duplicates.append(dup["video_id"])
+                else:
+                    kept.append(dup)  # Still gets its thumbnail fixed
+            stats["near_duplicates"] += len(near)
+
+        for row in kept:
+            video_id = row["video_id"]
+
+            if fix_thumbnails and is_broken_thumbnail(row.get("thumbnail")):
+                thumbnail_fixes.append({
+                    "video_id": video_id,
+                    "thumbnail": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+                })
+
+        if dry_run:
+            stats["thumbnails_fixed"] += len(thumbnail_fixes)
+            stats["duplicates_removed"] += len(duplicates)
+            continue
+
+        if thumbnail_fixes:
+            try:
+                # Upsert with only video_id + thumbnail updates just that column
+                storage.upsert("os_outliers", thumbnail_fixes, on_conflict="video_id")
+                stats["thumbnails_fixed"] += len(thumbnail_fixes)
+            except Exception as e:
+                print(f"❌ Thumbnail batch failed: {e}")
+                stats["errors"] += 1
+            stats["round_trips"] += 1
+
+        if duplicates:
+            try:
+                storage.delete("os_outliers", "video_id", duplicates)
+                stats["duplicates_removed"] += len(duplicates)
+            except Exception as e:
+                print(f"❌ Duplicate delete batch failed: {e}")
+                stats["errors"] += 1
+            stats["round_trips"] += 1
+
+    if index is not None:
+        if dry_run:
+            index.drop()
+        else:
+            live = DuplicateIndex(index_path)
+            live.replace_with(index, started_at=t0)
+            live.close()
+        index.close()
+
+    stats["unique_remaining"] = stats["rows"] - stats["duplicates_removed"]
+    stats["elapsed"] = round(time.time() - t0, 2)
+
+    verb = "Would fix" if dry_run else "Fixed"
+    print(f"\n✅ {verb} {stats['thumbnails_fixed']} thumbnails")
+    print(f"✅ {'Would remove' if dry_run else 'Removed'} {stats['duplicates_removed']} duplicates; "
+          f"{stats['near_duplicates']} near-duplicates {'included' if delete_near_duplicates else 'reported, kept'}")
+    print(f"✅ {stats['unique_remaining']} unique outliers remaining "
+          f"({stats['rows']} scanned in {stats['pages']} pages, {stats['round_trips']} round trips, "
+          f"{stats['elapsed']}s)")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk maintenance for os_outliers")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--no-thumbnails", action="store_true", help="Skip thumbnail repair")
+    parser.add_argument("--no-dedupe", action="store_true", help="Skip duplicate removal")
+    parser.add_argument("--no-near-duplicates", action="store_true",
+                        help="Skip the near-duplicate check and index rebuild")
+    parser.add_argument("--delete-near-duplicates", action="store_true",
+                        help="Delete near-duplicates instead of only reporting them")
+    args = parser.parse_args()
+    run_maintenance(fix_thumbnails=not args.no_thumbnails, dedupe=not args.no_dedupe,
+                    near_duplicates=not args.no_near_duplicates, delete_near_duplicates=args.delete_near_duplicates,
+                    dry_run=args.dry_run)
@@ -0,0 +1,223 @@
+"""
+Counters, gauges and stage timings for the scout, exposed by server.py as
+Prometheus text (/metrics) and a JSON summary (/metrics/summary).
+
+process_channel wraps each stage in `timed(result, stage)`, which fills
+result["timings"], and calls record_channel(result) once at the end, so the
+hot path only does a few dict updates. SamplingProfiler is a low-overhead
+stack sampler that can be switched on in production to find hot spots.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+SECONDS_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300)
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key, extra=None):
+    items = list(key) + list(extra or [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # name -> {label_key: value}
+        self._gauges = {}
+        self._histograms = {}  # name -> {label_key: [bucket_counts..., count, sum]}
+        self._help = {}
+        self._collectors = []
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            key = _label_key(labels)
+            hist = series.setdefault(key, [0] * len(SECONDS_BUCKETS) + [0, 0.0])
+            for i, bound in enumerate(SECONDS_BUCKETS):
+                if value <= bound:
+                    hist[i] += 1
+            hist[-2] += 1
+            hist[-1] += value
+
+    def register_collector(self, fn):
+        """fn() -> {gauge_name: value}; called at scrape time (e.g. browser RSS)."""
+        self._collectors.append(fn)
+
+    def _collect(self):
+        for fn in self._collectors:
+            try:
+                for name, value in fn().items():
+                    if value is not None:
+                        self.set(name, value)
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+
+    def prometheus(self):
+        self._collect()
+        lines = []
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(store.items()):
+                    if name in self._help:
+                        lines.append(f"# HELP {name} {self._help[name]}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for key, value in series.items():
+                        lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in series.items():
+                    for i, bound in enumerate(SECONDS_BUCKETS):
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {hist[i]}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {hist[-2]}")
+                    lines.append(f"{name}_count{_format_labels(key)} {hist[-2]}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {round(hist[-1], 4)}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        self._collect()
+        with self._lock:
+            flat = lambda store: {
+                name + _format_labels(key): value for name, series in store.items() for key, value in series.items()
+            }
+            histograms = {}
+            for name, series in self._histograms.items():
+                for key, hist in series.items():
+                    count, total = hist[-2], hist[-1]
+                    histograms[name + _format_labels(key)] = {
+                        "count": count, "sum": round(total, 3), "avg": round(total / count, 3) if count else None
+                    }
+            return {"counters": flat(self._counters), "gauges": flat(self._gauges), "timings": histograms}
+
+
+REGISTRY = Registry()
+REGISTRY.describe("scout_channels_total", "Channels processed, by final status")
+REGISTRY.describe("scout_scrolls_total", "Scroll steps across all channels")
+REGISTRY.describe("scout_items_seen_total", "Video items parsed from channel grids")
+REGISTRY.describe("scout_outliers_total", "Outliers found")
+REGISTRY.describe("scout_db_rows_total", "Rows written to Supabase, by table")
+REGISTRY.describe("scout_db_round_trips_total", "Supabase HTTP round trips made by the writer")
+REGISTRY.describe("scout_errors_total", "Errors, by kind")
+REGISTRY.describe("scout_stage_seconds", "Per-channel time spent in each stage")
+REGISTRY.describe("scout_channel_seconds", "End-to-end per-channel time")
+
+
+@contextmanager
+def timed(result, stage):
+    """Time a block into result["timings"][stage] (seconds, accumulated)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = result.setdefault("timings", {})
+        timings[stage] = round(timings.get(stage, 0) + time.perf_counter() - t0, 3)
+
+
+def record_channel(result, registry=REGISTRY):
+    """Fold one finished channel result into the registry."""
+    status = result.get("status") or "unknown"
+    registry.inc("scout_channels_total", status=status)
+    if status == "no_videos":
+        registry.inc("scout_errors_total", kind="grid_timeout")
+    elif status == "failed":
+        registry.inc("scout_errors_total", kind="channel_failed")
+
+    scroll = result.get("scroll") or {}
+    registry.inc("scout_scrolls_total", scroll.get("scrolls", 0))
+    registry.inc("scout_items_seen_total", result.get("videos_seen", 0))
+    registry.inc("scout_outliers_total", len(result.get("outliers") or []))
+    if scroll.get("stop_reason"):
+        registry.inc("scout_scroll_stops_total", reason=scroll["stop_reason"])
+
+    network = result.get("network") or {}
+    registry.inc("scout_requests_total", network.get("requests", 0))
+    registry.inc("scout_requests_blocked_total", network.get("blocked", 0))
+    registry.inc("scout_bytes_total", network.get("bytes", 0))
+
+    for stage, seconds in (result.get("timings") or {}).items():
+        registry.observe("scout_stage_seconds", seconds, stage=stage)
+    if result.get("duration") is not None:
+        registry.observe("scout_channel_seconds", result["duration"])
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack every `interval` seconds from a side
+    thread. Overhead is a dict update per sample, so it's safe to leave on
+    for a few minutes in production. report() returns the hottest stacks in
+    collapsed 'a;b;c count' form (flamegraph.pl / speedscope friendly).
+    """
+
+    def __init__(self, thread_id, interval=float(os.environ.get("SCOUT_PROFILE_INTERVAL", 0.01))):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.total = 0
+        self.started_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.samples.clear()
+        self.total = 0
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="scout-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+            self.total += 1
+
+    def report(self, top=50):
+        return {
+            "running": self.running,
+            "started_at": self.started_at,
+            "samples": self.total,
+            "interval": self.interval,
+            "stacks": [f"{stack} {count}" for stack, count in self.samples.most_common(top)],
+        }
@@ -0,0 +1,307 @@
+"""
+In-memory, sorted index of os_outliers for the dashboard's read queries.
+
+The gallery's queries (min score, view range, published since, title search,
+sorted by score / views / recency, paged) used to hit Supabase on every view.
+OutlierIndex loads the table once, keeps every row in sorted key lists
+(one per sort order, globally and per channel), and is then updated in place
+from the scout's own writes (db.add_write_listener). A page is a bisect to
+the cursor plus a short scan, so hot queries never leave the process.
+
+Writes made elsewhere (the frontend deleting a row, the cleanup scripts) are
+picked up by a background reload once the index is older than TTL, or right
+away through invalidate().
+
+Cursors are opaque: the last row's sort key, so pages stay stable while rows
+are inserted above them.
+"""
+
+import base64
+import bisect
+import json
+import os
+import threading
+import time
+
+from scroll import parse_iso
+
+TTL = float(os.environ.get("SCOUT_OUTLIER_INDEX_TTL", 300))  # Seconds before a background reload
+MAX_LIMIT = 200
+DEFAULT_LIMIT = 50
+COLUMNS = "video_id,title,views,outlier_score,thumbnail,channel_id,published_at,scouted_at,created_at"
+CHANNEL_COLUMNS = "id,url,name,avatar_url"
+
+SORTS = {
+    "score": lambda row: row.get("outlier_score"),
+    "views": lambda row: row.get("views"),
+    "published_at": lambda row: row.get("_published_ts"),
+}
+
+
+def _sort_key(sort, row):
+    """Ascending key for descending order; rows without a value go last, ties by video_id."""
+    value = SORTS[sort](row)
+    return (-float(value) if value is not None else float("inf"), row["video_id"])
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value, video_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(value), str(video_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def _prepare(row):
+    row = dict(row)
+    # PostgREST may hand numerics back as strings
+    if row.get("outlier_score") is not None:
+        row["outlier_score"] = float(row["outlier_score"])
+    if row.get("views") is not None:
+        row["views"] = int(row["views"])
+    published = parse_iso(row.get("published_at")) if row.get("published_at") else None
+    row["_published_ts"] = published.timestamp() if published else None
+    row["_title"] = (row.get("title") or "").lower()
+    return row
+
+
+class _Partition:
+    """Sorted key lists for one set of rows (all rows, or one channel's)."""
+
+    __slots__ = ("keys",)
+
+    def __init__(self):
+        self.keys = {sort: [] for sort in SORTS}
+
+    def add(self, row):
+        for sort, keys in self.keys.items():
+            bisect.insort(keys, _sort_key(sort, row))
+
+    def remove(self, row):
+        for sort, keys in self.keys.items():
+            key = _sort_key(sort, row)
+            i = bisect.bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                del keys[i]
+
+    def __len__(self):
+        return len(self.keys["score"])
+
+
+class OutlierIndex:
+    def __init__(self, loader=None, ttl=TTL):
+        self.loader = loader or load_from_storage
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._rows = {}
+        self._channels = {}
+        self._all = _Partition()
+        self._by_channel = {}
+        self._reloading = False
+        self._replay = None  # Writes that arrive while a reload is running
+        self.loaded_at = None
+        self.version = 0
+        self.stats = {"queries": 0, "reloads": 0, "upserts": 0, "deletes": 0, "errors": 0}
+
+    # --- Loading -----------------------------------------------------------------
+
+    def _build(self, outliers, channels):
+        rows, everything, by_channel = {}, _Partition(), {}
+        prepared = [_prepare(row) for row in outliers]
+        for row in prepared:
+            rows[row["video_id"]] = row
+        # Sorting once is much cheaper than insort per row
+        for sort in SORTS:
+            everything.keys[sort] = sorted(_sort_key(sort, row) for row in rows.values())
+        for row in rows.values():
+            by_channel.setdefault(row.get("channel_id"), []).append(row)
+        partitions = {}
+        for channel_id, channel_rows in by_channel.items():
+            partition = partitions[channel_id] = _Partition()
+            for sort in SORTS:
+                partition.keys[sort] = sorted(_sort_key(sort, row) for row in channel_rows)
+        return rows, everything, partitions, {c["id"]: c for c in channels}
+
+    def reload(self):
+        """Rebuild from the database and swap it in. Blocking."""
+        with self._lock:
+            if self._reloading:
+                return False
+            self._reloading = True
+            self._replay = []
+        t0 = time.time()
+        try:
+            outliers, channels = self.loader()
+            built = self._build(outliers, channels)
+            with self._lock:
+                self._rows, self._all, self._by_channel, self._channels = built
+                replay, self._replay = self._replay, None
+                for table, rows in replay:
+                    if table == "deleted":
+                        self.invalidate(rows)
+                    else:
+                        self.apply_write(table, rows)
+                self.loaded_at = time.time()
+                self.version += 1
+            self.stats["reloads"] += 1
+            self._ready.set()
+            print(f"📇 Outlier index loaded: {len(self._rows)} rows, {len(self._channels)} channels "
+                  f"in {time.time() - t0:.1f}s")
+            return True
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"❌ Outlier index reload failed: {e}")
+            return False
+        finally:
+            with self._lock:
+                self._reloading = False
+                self._replay = None
+
+    def reload_in_background(self):
+        threading.Thread(target=self.reload, name="outlier-index-reload", daemon=True).start()
+
+    def wait_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def invalidate(self, video_ids=None):
+        """Forget specific rows (e.g. deleted elsewhere), or reload everything."""
+        if not video_ids:
+            self.reload_in_background()
+            return
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(("deleted", video_ids))
+            for video_id in video_ids:
+                if self._delete(video_id):
+                    self.stats["deletes"] += 1
+            self.version += 1
+
+    # --- Incremental updates -----------------------------------------------------
+
+    def _delete(self, video_id):
+        old = self._rows.pop(video_id, None)
+        if old:
+            self._all.remove(old)
+            partition = self._by_channel.get(old.get("channel_id"))
+            if partition:
+                partition.remove(old)
+        return old
+
+    def apply_write(self, table, rows):
+        """db write listener: fold rows the scout just wrote into the index."""
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((table, rows))
+            if table == "os_channels":
+                for row in rows:
+                    if row.get("id"):
+                        self._channels[row["id"]] = dict(self._channels.get(row["id"], {}), **row)
+            elif table == "os_outliers":
+                for row in rows:
+                    if not row.get("video_id"):
+                        continue
+                    # Upserts only carry the columns the scout sets; keep the rest
+                    old = self._delete(row["video_id"])
+                    merged = _prepare(dict({k: v for k, v in (old or {}).items() if not k.startswith("_")}, **row))
+                    self._rows[merged["video_id"]] = merged
+                    self._all.add(merged)
+                    self._by_channel.setdefault(merged.get("channel_id"), _Partition()).add(merged)
+                    self.stats["upserts"] += 1
+            self.version += 1
+
+    # --- Queries -----------------------------------------------------------------
+
+    def query(self, sort="score", channel_id=None, min_score=None, min_views=None, max_views=None,
+              published_after=None, search=None, limit=DEFAULT_LIMIT, cursor=None):
+        """
+        One page of rows in descending `sort` order, plus the cursor for the
+        next page (None on the last). Rows look like the dashboard's
+        `select('*, os_channels(name)')`.
+        """
+        if sort not in SORTS:
+            raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+        limit = max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
+        if self.loaded_at and time.time() - self.loaded_at > self.ttl and not self._reloading:
+            self.reload_in_background()  # Serve the current index meanwhile
+        cutoff = parse_iso(published_after).timestamp() if published_after else None
+        search = search.lower() if search else None
+        self.stats["queries"] += 1
+
+        with self._lock:
+            partition = self._all if channel_id is None else self._by_channel.get(channel_id)
+            keys = partition.keys[sort] if partition else []
+            start = bisect.bisect_right(keys, decode_cursor(cursor)) if cursor else 0
+            items, last_key = [], None
+            for i in range(start, len(keys)):
+                key = keys[i]
+                row = self._rows[key[1]]
+                # Sorted by the filtered column: nothing further down can match
+                if sort == "score" and min_score is not None and (row.get("outlier_score") or 0) < min_score:
+                    break
+                if sort == "views" and min_views is not None and (row.get("views") or 0) < min_views:
+                    break
+                if sort == "published_at" and cutoff is not None and (row["_published_ts"] or 0) < cutoff:
+                    break
+                if ((min_score is not None and (row.get("outlier_score") or 0) < min_score)
+                        or (min_views is not None and (row.get("views") or 0) < min_views)
+                        or (max_views is not None and (row.get("views") or 0) > max_views)
+                        or (cutoff is not None and (row["_published_ts"] or 0) < cutoff)
+                        or (search and search not in row["_title"])):
+                    continue
+                items.append(self._public(row))
+                if len(items) == limit:
+                    last_key = key if i + 1 < len(keys) else None
+                    break
+            return {"items": items, "next_cursor": encode_cursor(last_key) if last_key else None,
+                    "version": self.version}
+
+    def _public(self, row):
+        channel = self._channels.get(row.get("channel_id")) or {}
+        out = {k: v for k, v in row.items() if not k.startswith("_")}
+        out["os_channels"] = {"name": channel.get("name")} if channel else None
+        return out
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, rows=len(self._rows), channels=len(self._channels),
+                        partitions=len(self._by_channel), version=self.version, loaded_at=self.loaded_at,
+                        age=round(time.time() - self.loaded_at, 1) if self.loaded_at else None,
+                        reloading=self._reloading)
+
+
+def load_from_storage(storage=None, page_size=1000):
+    """(outlier rows, channel rows) for a full index build. Blocking."""
+    from storage import get_storage
+
+    storage = storage or get_storage()
+    outliers = [row for page in storage.scan("os_outliers", COLUMNS, key="video_id", page_size=page_size)
+                for row in page]
+    try:
+        channels = [row for page in storage.scan("os_channels", CHANNEL_COLUMNS, key="id", page_size=page_size)
+                    for row in page]
+    except Exception as e:
+        # Older databases have no os_channels.avatar_url (db.py falls back the same way)
+        if "avatar_url" not in str(e):
+            raise
+        print(f"⚠️ Outlier index channel load failed (trying without avatar): {e}")
+        columns = ",".join(c for c in CHANNEL_COLUMNS.split(",") if c != "avatar_url")
+        channels = [row for page in storage.scan("os_channels", columns, key="id", page_size=page_size)
+                    for row in page]
+    return outliers, channels
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = OutlierIndex()
+        return _index
@@ -0,0 +1,117 @@
+"""
+Request blocking for scout pages.
+
+process_channel only needs DOM text and URLs, so thumbnails, avatars, fonts,
+video previews and (optionally) third-party scripts are aborted at the
+Playwright routing layer. Anything the 1of10 extension loads is always
+allowed. Per-page request/byte counters let each channel report what it
+actually downloaded and how much was skipped.
+"""
+
+import os
+from urllib.parse import urlparse
+
+BLOCKED_TYPES = {
+    t.strip() for t in os.environ.get("SCOUT_BLOCK_RESOURCES", "image,media,font").split(",") if t.strip()
+}
+BLOCK_THIRD_PARTY_SCRIPTS = os.environ.get("SCOUT_BLOCK_THIRD_PARTY_SCRIPTS", "0") == "1"
+
+# Hosts YouTube itself needs to render the grid
+FIRST_PARTY_SUFFIXES = (
+    "youtube.com", "ytimg.com", "ggpht.com", "googlevideo.com", "gstatic.com",
+    "googleapis.com", "google.com", "youtube-nocookie.com",
+)
+# Hosts the 1of10 extension talks to; never blocked. Extend via env if it moves.
+EXTENSION_HOST_SUFFIXES = tuple(
+    h.strip() for h in os.environ.get("SCOUT_EXTENSION_HOSTS", "1of10.com").split(",") if h.strip()
+)
+# Hover previews are streamed as XHR, not as <video> media requests
+MEDIA_URL_MARKERS = ("googlevideo.com/videoplayback",)
+
+
+def _host_matches(host, suffixes):
+    return any(host == s or host.endswith("." + s) for s in suffixes)
+
+
+def new_stats():
+    return {"requests": 0, "blocked": 0, "bytes": 0, "blocked_by_type": {}}
+
+
+class ResourcePolicy:
+    def __init__(self, blocked_types=None, block_third_party_scripts=BLOCK_THIRD_PARTY_SCRIPTS):
+        self.blocked_types = set(BLOCKED_TYPES if blocked_types is None else blocked_types)
+        self.block_third_party_scripts = block_third_party_scripts
+        self._stats = {}
+
+    async def install(self, context):
+        """Route every request in the context through this policy."""
+        await context.route("**/*", self._handle_route)
+        context.on("requestfinished", self._on_request_finished)
+
+    def should_block(self, url, resource_type):
+        parsed = urlparse(url)
+        if parsed.scheme in ("chrome-extension", "data", "blob"):
+            return None
+        host = parsed.hostname or ""
+        if _host_matches(host, EXTENSION_HOST_SUFFIXES):
+            return None
+        if resource_type in self.blocked_types:
+            return resource_type
+        if "media" in self.blocked_types and any(m in url for m in MEDIA_URL_MARKERS):
+            return "media"
+        if (self.block_third_party_scripts and resource_type == "script"
+                and not _host_matches(host, FIRST_PARTY_SUFFIXES)):
+            return "third_party_script"
+        return None
+
+    def _page_stats(self, request):
+        try:
+            page = request.frame.page
+        except Exception:
+            return None  # Service worker / extension background requests have no page
+        stats = self._stats.get(page)
+        if stats is None:
+            stats = self._stats[page] = new_stats()
+            # Drop the counters with the page, however it goes away (recycle, crash, context close)
+            page.once("close", lambda _: self.forget(page))
+        return stats
+
+    async def _handle_route(self, route):
+        request = route.request
+        stats = self._page_stats(request)
+        reason = self.should_block(request.url, request.resource_type)
+        if stats is not None:
+            stats["requests"] += 1
+        if reason:
+            if stats is not None:
+                stats["blocked"] += 1
+                stats["blocked_by_type"][reason] = stats["blocked_by_type"].get(reason, 0) + 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _on_request_finished(self, request):
+        stats = self._page_stats(request)
+        if stats is None:
+            return
+        try:
+            sizes = await request.sizes()
+            stats["bytes"] += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+        except Exception:
+            pass  # Page navigated or closed mid-request
+
+    def reset(self, page):
+        if page not in self._stats:
+            page.once("close", lambda _: self.forget(page))
+        self._stats[page] = new_stats()
+
+    def stats(self, page):
+        stats = self._stats.get(page) or new_stats()
+        return dict(stats, blocked_by_type=dict(stats["blocked_by_type"]))
+
+    def forget(self, page):
+        self._stats.pop(page, None)
+
+    def clear(self):
+        """Drop every page's counters; called when the context is relaunched."""
+        self._stats.clear()
@@ -0,0 +1,99 @@
+"""
+Built-in outlier scoring, so the scout doesn't need the 1of10 extension.
+
+A video's multiplier is its views divided by what the channel's nearby
+uploads typically get. Recent uploads haven't finished collecting views, so
+views are first age-normalized against a saturating curve
+(1 - exp(-age / AGE_TAU_DAYS)); the baseline is the rolling median of those
+normalized views over the BASELINE_WINDOW uploads around each video (grid
+order, newest first). Everything is vectorized with pandas/NumPy.
+
+SCOUT_SCORER picks the source of `outlier_score`:
+    native     built-in score only; no extension, Chromium runs headless (default)
+    extension  1of10 badges only (the old behaviour; needs Xvfb)
+    both       built-in score, with the extension's badges kept as a cross-check
+"""
+
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+SCORER = os.environ.get("SCOUT_SCORER", "native")
+USES_EXTENSION = SCORER in ("extension", "both")
+BASELINE_WINDOW = int(os.environ.get("SCOUT_SCORE_WINDOW", 15))  # Uploads in each rolling baseline
+MIN_PERIODS = 3  # Fewer neighbours than this and the channel-wide median is used
+MIN_ITEMS = int(os.environ.get("SCOUT_SCORE_MIN_ITEMS", 30))  # Scroll at least this far for a baseline
+AGE_TAU_DAYS = float(os.environ.get("SCOUT_SCORE_AGE_TAU_DAYS", 3))  # ~63% of lifetime views by then
+MIN_AGE_DAYS = 0.25  # Don't blow up scores of videos a few minutes old
+AGREEMENT_TOLERANCE = 0.25  # Native and extension scores within 25% count as agreeing
+
+
+def score_frame(df, now=None, by=None):
+    """
+    Vectorized scores for a DataFrame with `views` and `published_at` columns,
+    rows in grid order (newest first) within each `by` group (e.g. channel).
+    Returns a float Series aligned with df; NaN where there's no baseline.
+    """
+    views = df["views"].fillna(0).astype("float64")
+    published = pd.to_datetime(df["published_at"], utc=True, errors="coerce")
+    # An undated video is about as old as its neighbours
+    published = published.groupby(df[by]).transform(lambda s: s.ffill().bfill()) if by else published.ffill().bfill()
+
+    now = pd.Timestamp(now or datetime.now(timezone.utc))
+    age_days = ((now - published).dt.total_seconds() / 86400).clip(lower=MIN_AGE_DAYS)
+    maturity = 1 - np.exp(-age_days.fillna(np.inf) / AGE_TAU_DAYS)
+    adjusted = views / maturity
+
+    rolling = lambda s: s.rolling(BASELINE_WINDOW, center=True, min_periods=MIN_PERIODS).median()
+    if by:
+        groups = adjusted.groupby(df[by])
+        baseline = groups.transform(rolling).fillna(groups.transform("median"))
+    else:
+        baseline = rolling(adjusted).fillna(adjusted.median())
+    return (adjusted / baseline).where(baseline > 0).round(1)
+
+
+def native_scores(videos, now=None):
+    """Outlier multiplier for each video (same order), or None where it can't be computed."""
+    if not videos:
+        return []
+    df = pd.DataFrame({"views": [v.get("views") or 0 for v in videos],
+                       "published_at": [v.get("published_at") for v in videos]})
+    return [None if np.isnan(s) else float(s) for s in score_frame(df, now=now)]
+
+
+def score_videos(videos, scorer=SCORER, now=None):
+    """
+    Return copies of `videos` with outlier_score set from the configured
+    scorer, plus native_score / extension_score for inspection.
+    """
+    native = native_scores(videos, now=now) if scorer != "extension" else [None] * len(videos)
+    scored = []
+    for video, score in zip(videos, native):
+        extension_score = video.get("outlier_score")
+        scored.append(dict(
+            video,
+            native_score=score,
+            extension_score=extension_score,
+            outlier_score=extension_score if scorer == "extension" else score,
+        ))
+    return scored
+
+
+def cross_check(videos, threshold=1.5):
+    """How well native scores match the extension's badges, where both exist."""
+    pairs = np.array([(v["native_score"], v["extension_score"]) for v in videos
+                      if v.get("native_score") is not None and v.get("extension_score") is not None])
+    if not len(pairs):
+        return {"compared": 0}
+    native, extension = pairs[:, 0], pairs[:, 1]
+    agree = np.abs(native - extension) <= AGREEMENT_TOLERANCE * np.maximum(extension, 1)
+    return {
+        "compared": len(pairs),
+        "agreement": round(float(agree.mean()), 3),
+        "median_ratio": round(float(np.median(native / np.maximum(extension, 0.1))), 3),
+        "native_only_outliers": int(((native > threshold) & (extension <= threshold)).sum()),
+        "extension_only_outliers": int(((extension > threshold) & (native <= threshold)).sum()),
+    }
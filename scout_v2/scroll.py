@@ -0,0 +1,303 @@
+"""
+Event-driven infinite scroll for a channel's /videos grid.
+
+A MutationObserver inside the page counts new ytd-rich-item-renderer nodes and
+1of10 badge injections. Python awaits promises exposed on window.__scoutScroll,
+so each scroll step advances the moment new items land instead of sleeping a
+fixed 2s, and the engine stops as soon as the grid is stable or a target
+count / date cutoff is hit. Every run reports why it stopped.
+
+Items are parsed in the page as they settle and streamed back in small
+batches, and parsed nodes are dropped from the DOM, so renderer memory and
+evaluate cost stay flat no matter how long the channel's catalogue is.
+"""
+
+import os
+import time
+from datetime import datetime, timezone
+
+MAX_SCROLLS = int(os.environ.get("SCOUT_MAX_SCROLLS", 50))
+IDLE_TIMEOUT_MS = 3000  # No new items for this long after a scroll => grid is probably done
+CONTINUATION_GRACE_MS = 3000  # Extra wait when YouTube's spinner is still on screen
+BADGE_TIMEOUT_MS = 3000  # Hard cap on waiting for the extension (old flat sleep)
+BADGE_QUIET_MS = 500  # Badges stopped changing for this long => extension is done
+
+INSTALL_JS = """
+([pruneDom, settleMs]) => {
+    if (window.__scoutScroll) return;
+
+    const ITEM = 'ytd-rich-item-renderer';
+    const BADGE_RE = /(\\d+\\.\\d+)x/;
+    const state = { added: 0, extracted: 0, badged: 0, lastBadgeAt: 0, lastRecord: null, waiters: [] };
+
+    const parseAgo = (text) => {
+        const now = new Date();
+        const num = parseInt(text.match(/\\d+/)?.[0] || "0");
+        if (text.includes('hour')) now.setHours(now.getHours() - num);
+        else if (text.includes('day')) now.setDate(now.getDate() - num);
+        else if (text.includes('week')) now.setDate(now.getDate() - num * 7);
+        else if (text.includes('month')) now.setMonth(now.getMonth() - num);
+        else if (text.includes('year')) now.setFullYear(now.getFullYear() - num);
+        return now.toISOString();
+    };
+
+    const parseViews = (text) => {
+        const num = parseFloat(text.replace(/[^0-9.]/g, ''));
+        const upper = text.toUpperCase();
+        const multiplier = upper.includes('K') ? 1000 : upper.includes('M') ? 1000000 : upper.includes('B') ? 1000000000 : 1;
+        return Math.round((num || 0) * multiplier);
+    };
+
+    // textContent only: innerText forces a layout per element
+    const parseItem = (el) => {
+        const titleEl = el.querySelector('#video-title');
+        const thumbnailEl = el.querySelector('ytd-thumbnail img');
+        const linkEl = el.querySelector('a#video-title-link');
+        const href = linkEl ? linkEl.href : '';
+        const videoId = href.match(/[?&]v=([^&]+)/)?.[1] || '';
+
+        let views = 0;
+        let publishedAt = null;
+        let publishedText = null;
+        for (const span of el.querySelectorAll('#metadata-line span')) {
+            const text = span.textContent;
+            if (!views && text.includes('views')) views = parseViews(text);
+            else if (!publishedAt && text.includes('ago')) { publishedText = text.trim(); publishedAt = parseAgo(text); }
+        }
+
+        let thumbnail = thumbnailEl ? (thumbnailEl.getAttribute('src') || thumbnailEl.getAttribute('data-src') || '') : '';
+        if (!thumbnail || thumbnail.includes('data:image') || thumbnail.includes('spacer')) {
+            thumbnail = videoId ? `https://i.ytimg.com/vi/${videoId}/hqdefault.jpg` : '';
+        }
+
+        // Look for 1of10 multiplier
+        const multiplierMatch = el.textContent.match(BADGE_RE);
+
+        return {
+            video_id: videoId,
+            title: titleEl ? titleEl.textContent.trim() : '',
+            url: href,
+            thumbnail: thumbnail,
+            views: views,
+            outlier_score: multiplierMatch ? parseFloat(multiplierMatch[1]) : null,
+            published_at: publishedAt,
+            published_text: publishedText
+        };
+    };
+
+    const notify = () => {
+        const waiters = state.waiters;
+        state.waiters = [];
+        waiters.forEach(w => w());
+    };
+
+    const markSeen = (el) => {
+        if (!el.hasAttribute('data-scout-seen')) {
+            el.setAttribute('data-scout-seen', String(Date.now()));
+            state.added++;
+        }
+    };
+    document.querySelectorAll(ITEM).forEach(markSeen);
+
+    let badgeScanQueued = false;
+    const scanBadges = () => {
+        badgeScanQueued = false;
+        for (const el of document.querySelectorAll(ITEM + ':not([data-scout-badged])')) {
+            if (BADGE_RE.test(el.textContent)) {
+                el.setAttribute('data-scout-badged', '1');
+                state.badged++;
+                state.lastBadgeAt = Date.now();
+            }
+        }
+        notify();
+    };
+
+    const observer = new MutationObserver((mutations) => {
+        const before = state.added;
+        for (const m of mutations) {
+            for (const node of m.addedNodes) {
+                if (node.nodeType === 1 && node.tagName === 'YTD-RICH-ITEM-RENDERER') markSeen(node);
+            }
+        }
+        if (!badgeScanQueued) {
+            badgeScanQueued = true;
+            setTimeout(scanBadges, 100);
+        }
+        if (state.added > before) notify();
+    });
+    observer.observe(document.body, { childList: true, subtree: true, characterData: true });
+
+    const snapshot = (grew) => {
+        const items = document.querySelectorAll(ITEM + ':not([data-scout-extracted])');
+        const last = items[items.length - 1];
+        let oldest = state.lastRecord ? state.lastRecord.published_at : null;
+        let lastVideoId = state.lastRecord ? state.lastRecord.video_id : null;
+        if (last) {
+            const record = parseItem(last);
+            oldest = record.published_at || oldest;
+            lastVideoId = record.video_id || lastVideoId;
+        }
+        return {
+            items: state.added,
+            in_dom: items.length,
+            extracted: state.extracted,
+            badged: state.badged,
+            grew: !!grew,
+            oldest_published_at: oldest,
+            continuation: !!document.querySelector('ytd-continuation-item-renderer'),
+            last_video_id: lastVideoId
+        };
+    };
+
+    const waitFor = (predicate, timeoutMs) => new Promise(resolve => {
+        let done = false;
+        const deadline = setTimeout(() => { done = true; resolve(false); }, timeoutMs);
+        const check = () => {
+            if (done) return;
+            if (predicate()) { done = true; clearTimeout(deadline); resolve(true); }
+            else state.waiters.push(check);
+        };
+        check();
+    });
+
+    window.__scoutScroll = {
+        snapshot: () => snapshot(false),
+        scrollAndWait: async (timeoutMs) => {
+            const before = state.added;
+            window.scrollTo(0, document.documentElement.scrollHeight);
+            const grew = await waitFor(() => state.added > before, timeoutMs);
+            return snapshot(grew);
+        },
+        waitForBadges: async (timeoutMs, quietMs) => {
+            const start = Date.now();
+            while (Date.now() - start < timeoutMs) {
+                const pending = document.querySelectorAll(ITEM + ':not([data-scout-badged]):not([data-scout-extracted])').length;
+                if (state.added && pending === 0) break;
+                if (state.badged && Date.now() - state.lastBadgeAt >= quietMs) break;
+                await waitFor(() => false, Math.min(quietMs, 250));
+            }
+            return { items: state.added, badged: state.badged, waited_ms: Date.now() - start };
+        },
+        // Parse up to `limit` settled items (badged, or old enough that no badge
+        // is coming), then drop them from the DOM so memory and later
+        // querySelectorAll calls stay bounded however long the channel is.
+        drain: (limit, force) => {
+            const now = Date.now();
+            const batch = [];
+            // Never prune the tail: it's what YouTube's continuation observer watches
+            const items = Array.from(document.querySelectorAll(ITEM + ':not([data-scout-extracted])'));
+            const keep = force ? 0 : 4;
+            for (let i = 0; i < items.length - keep && batch.length < limit; i++) {
+                const el = items[i];
+                const settled = el.hasAttribute('data-scout-badged')
+                    || now - parseInt(el.getAttribute('data-scout-seen') || '0') >= settleMs;
+                if (!force && !settled) break; // Keep grid order
+                const record = parseItem(el);
+                batch.push(record);
+                state.lastRecord = record;
+                state.extracted++;
+                el.setAttribute('data-scout-extracted', '1');
+                if (pruneDom) el.remove();
+            }
+            return batch;
+        }
+    };
+}
+"""
+
+DRAIN_BATCH = 100  # Items per page.evaluate round trip
+PRUNE_DOM = os.environ.get("SCOUT_PRUNE_DOM", "1") == "1"
+SETTLE_MS = 2000  # Unbadged items older than this are extracted without a multiplier
+
+
+def parse_iso(value):
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+async def _drain(page, on_items, force=False):
+    """Pull settled items out of the page in DRAIN_BATCH chunks. Returns their video ids."""
+    ids = []
+    while True:
+        batch = await page.evaluate("([n, f]) => window.__scoutScroll.drain(n, f)", [DRAIN_BATCH, force])
+        if batch:
+            ids.extend(item["video_id"] for item in batch)
+            if on_items:
+                on_items(batch)
+        if len(batch) < DRAIN_BATCH:
+            return ids
+
+
+async def scroll_channel(page, max_items=None, published_after=None, max_scrolls=MAX_SCROLLS,
+                         should_stop=None, on_items=None, wait_for_badges=True, min_items=0):
+    """
+    Scroll the grid until it's exhausted or a limit is reached, then wait for
+    1of10 badges to settle (skipped with wait_for_badges=False, when scores
+    are computed natively and nothing is injecting badges). Returns a report dict with `stop_reason` set to
+    one of: stable, target_count, date_cutoff, max_scrolls, or whatever
+    reason should_stop returned.
+
+    Items are parsed in the page while scrolling and handed to
+    on_items(list_of_records) in small batches; parsed nodes are removed
+    from the DOM (unless SCOUT_PRUNE_DOM=0).
+
+    should_stop(snapshot) lets the caller end the scroll early (returns a
+    truthy reason string or None). snapshot["batch_ids"] holds the video ids
+    drained since the previous check. Neither it nor the date cutoff can stop
+    the scroll before min_items videos have loaded.
+    """
+    t0 = time.time()
+    cutoff = parse_iso(published_after)
+
+    await page.evaluate(INSTALL_JS, [PRUNE_DOM, SETTLE_MS if wait_for_badges else 0])
+    state = await page.evaluate("() => window.__scoutScroll.snapshot()")
+    state["batch_ids"] = []
+    scrolls = 0
+    stop_reason = None
+
+    while stop_reason is None:
+        can_stop_early = state["items"] >= min_items
+        if max_items and state["items"] >= max_items:
+            stop_reason = "target_count"
+        elif can_stop_early and cutoff and state["oldest_published_at"] \
+                and parse_iso(state["oldest_published_at"]) < cutoff:
+            stop_reason = "date_cutoff"
+        elif can_stop_early and should_stop and (caller_reason := should_stop(state)):
+            stop_reason = caller_reason
+        elif scrolls >= max_scrolls:
+            stop_reason = "max_scrolls"
+        else:
+            state = await page.evaluate("(t) => window.__scoutScroll.scrollAndWait(t)", IDLE_TIMEOUT_MS)
+            scrolls += 1
+            if not state["grew"] and state["continuation"]:
+                # Spinner still there: YouTube is slow, not finished. Give it one grace period.
+                state = await page.evaluate("(t) => window.__scoutScroll.scrollAndWait(t)", CONTINUATION_GRACE_MS)
+            state["batch_ids"] = await _drain(page, on_items)
+            if not state["grew"]:
+                stop_reason = "stable"
+
+    scroll_seconds = time.time() - t0
+    if wait_for_badges:
+        badges = await page.evaluate(
+            "([t, q]) => window.__scoutScroll.waitForBadges(t, q)", [BADGE_TIMEOUT_MS, BADGE_QUIET_MS]
+        )
+    else:
+        badges = {"badged": state["badged"], "waited_ms": 0}
+    await _drain(page, on_items, force=True)
+    final = await page.evaluate("() => window.__scoutScroll.snapshot()")
+
+    return {
+        "stop_reason": stop_reason,
+        "scrolls": scrolls,
+        "items": final["items"],
+        "extracted": final["extracted"],
+        "badged": badges["badged"],
+        "oldest_published_at": final["oldest_published_at"] or state["oldest_published_at"],
+        "scroll_seconds": round(scroll_seconds, 2),
+        "badge_wait_seconds": round(badges["waited_ms"] / 1000, 2),
+    }
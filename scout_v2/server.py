@@ -1,16 +1,114 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, redirect, stream_with_context
 from flask_cors import CORS
-import asyncio
 import sys
 import os
+import atexit
+import json
+import time
+import threading
 
 # Ensure we can import main.py
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from functools import partial
 from main import run as run_scout
+from jobs import JobQueue
+from browser_pool import BrowserManager
+from concurrency import AdaptiveLimiter
+from sharded import run_sharded, SHARDS
+from innertube import ENABLED as HTTP_LISTING
+from journal import run_with_journal, get_journal
+from channels import run_canonical
+from db import add_write_listener
+import storage
+from outlier_index import get_index as get_outlier_index
+from thumbnails import get_cache as get_thumbnails, run_and_prefetch, ThumbnailNotFound, SOURCE_URL, \
+    MAX_PREFETCH
+from metrics import REGISTRY, SamplingProfiler
+
+# Thumbnails rarely change; a swapped one shows up within a week (SCOUT_THUMB_TTL_DAYS)
+STREAM_HEARTBEAT = 15  # Seconds between keepalives on an idle event stream
+THUMB_CACHE_CONTROL = "public, max-age=604800, stale-while-revalidate=86400"
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# One long-lived worker drains scout jobs so batches never block a request
+# thread and never launch two browsers over the same user_data dir.
+# The browser stays warm between batches; it lives on the worker's loop.
+# The concurrency limit it has learned carries over between batches too.
+# With SCOUT_SHARDS > 1 each batch is spread over that many browser processes
+# instead (see sharded.py), and the in-process browser is never launched.
+# When channels are listed over HTTP (innertube.py) the browser is only a
+# fallback, so it starts on first use instead of at boot.
+browser = BrowserManager()
+limiter = AdaptiveLimiter(ceiling=browser.pool_size)
+# Every batch goes through the checkpoint journal (journal.py), after its URLs
+# are resolved to canonical channels and any channel another job is already
+# scouting is handed that job's result (channels.py). Each finished channel's
+# outlier thumbnails are then pulled into the local cache.
+# Jobs run one at a time by default. SCOUT_JOB_CONCURRENCY > 1 opts into
+# overlapping non-sharded jobs on the shared browser and limiter; sharded
+# jobs launch their own browsers, so those always run one at a time.
+thumbnails = get_thumbnails()
+if SHARDS > 1:
+    runner = partial(run_with_journal, partial(run_sharded, shards=SHARDS))
+else:
+    runner = partial(run_with_journal, partial(run_scout, browser=browser, limiter=limiter))
+runner = partial(run_canonical, runner)
+if os.environ.get("SCOUT_THUMB_PREFETCH", "1") == "1":
+    runner = partial(run_and_prefetch, runner, cache=thumbnails)
+jobs = JobQueue(runner, concurrency=1 if SHARDS > 1 else int(os.environ.get("SCOUT_JOB_CONCURRENCY", 1)))
+jobs.start()
+if SHARDS == 1:
+    if not HTTP_LISTING:
+        jobs.run_coroutine(browser.start())
+    atexit.register(lambda: jobs.run_coroutine(browser.stop()).result(timeout=30))
+
+# Dashboard reads come from memory; the scout's own writes keep it current
+outlier_index = get_outlier_index()
+add_write_listener(outlier_index.apply_write)
+outlier_index.reload_in_background()
+
+# With the embedded store, results reach Supabase (and the dashboard) in bulk
+SYNC_INTERVAL = float(os.environ.get("SCOUT_SYNC_INTERVAL", 60))
+if storage.BACKEND == "local" and SYNC_INTERVAL > 0:
+    def sync_forever():
+        while True:
+            time.sleep(SYNC_INTERVAL)
+            try:
+                stats = storage.sync_upstream(storage.get_storage())
+                if stats["channels"] or stats["outliers"] or stats["deleted"]:
+                    print(f"🔄 Synced to Supabase: {stats}")
+            except Exception as e:
+                print(f"❌ Upstream sync failed: {e}")
+    threading.Thread(target=sync_forever, name="storage-sync", daemon=True).start()
+
+# Batches a previous process didn't finish pick up where they stopped
+if get_journal() and os.environ.get("SCOUT_RESUME_ON_BOOT", "1") == "1":
+    for batch in get_journal().incomplete_batches():
+        job = jobs.submit(batch["channel_urls"], **batch["options"])
+        print(f"♻️ Resubmitted unfinished batch {batch['id']} as job {job.id}")
+
+def collect_service_metrics():
+    browser_health = browser.health()
+    return {
+        "scout_browser_rss_mb": browser_health["rss_mb"],
+        "scout_browser_pages_in_use": browser_health["in_use"],
+        "scout_browser_page_recycles": browser_health["page_recycles"],
+        "scout_browser_context_recycles": browser_health["context_recycles"],
+        "scout_jobs_queued": jobs.queue_depth(),
+        "scout_thumbnail_cache_bytes": thumbnails.snapshot()["bytes"],
+        "scout_thumbnail_hits": thumbnails.stats["hits"],
+        "scout_thumbnail_misses": thumbnails.stats["misses"],
+    }
+
+REGISTRY.register_collector(collect_service_metrics)
+
+# Samples the scout worker thread; SCOUT_PROFILE=1 turns it on at boot
+profiler = SamplingProfiler(jobs.thread_id)
+if os.environ.get("SCOUT_PROFILE") == "1":
+    profiler.start()
+
 @app.route('/scout', methods=['POST'])
 def scout():
     data = request.json
@@ -23,19 +121,193 @@ def scout():
     if not channel_urls:
         return jsonify({"error": "channelUrls is required"}), 400
 
+    channel_urls = [url.strip() for url in channel_urls if url and url.strip()]
+    if not channel_urls:
+        return jsonify({"error": "channelUrls is required"}), 400
+
     print(f"Received batch scout request for {len(channel_urls)} channels")
     
+    job = jobs.submit(channel_urls, full_rescan=bool(data.get('fullRescan')))
+    # ?stream=sse|ndjson (or Accept: text/event-stream) keeps the request open and
+    # pushes each channel's results as it finishes, instead of returning a job id
+    stream_format = request.args.get('stream') or (
+        'sse' if 'text/event-stream' in request.headers.get('Accept', '') else None)
+    if stream_format:
+        return stream_job(job, stream_format)
+    return jsonify({
+        "success": True,
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "queue_depth": jobs.queue_depth()
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    # EventSource reconnects send Last-Event-ID; replay from there
+    since = request.headers.get('Last-Event-ID') or request.args.get('since') or 0
+    try:
+        since = int(since)
+    except (TypeError, ValueError):
+        return jsonify({"error": "since must be an event id (integer)"}), 400
+    if since < 0:
+        return jsonify({"error": "since must be an event id (integer)"}), 400
+    return stream_job(job, request.args.get('format', 'sse'), since=since)
+
+def stream_job(job, fmt='sse', since=0):
+    """
+    Stream a job's event log as SSE (`id:`/`event:`/`data:` frames) or NDJSON
+    (one JSON object per line), replaying from `since` and following until the
+    job finishes. Heartbeats keep proxies from closing idle connections while
+    a slow channel scrolls.
+    """
+    if fmt not in ('sse', 'ndjson'):
+        fmt = 'sse'
+
+    def frame(event):
+        body = json.dumps(event, default=str)
+        if fmt == 'ndjson':
+            return body + "\n"
+        return f"id: {event['seq']}\nevent: {event['type']}\ndata: {body}\n\n"
+
+    def generate():
+        seq = since
+        yield frame({"type": "job_started", "seq": seq, "job_id": job.id, "status": job.status,
+                     "total_channels": len(job.channel_urls), "status_url": f"/jobs/{job.id}"})
+        while True:
+            events, finished = job.events_since(seq, timeout=STREAM_HEARTBEAT)
+            for event in events:
+                yield frame(event)
+            if events:
+                seq = events[-1]["seq"]
+            elif finished:
+                return
+            else:
+                yield ": keepalive\n\n" if fmt == 'sse' else frame({"type": "heartbeat", "seq": seq})
+
+    mimetype = "text/event-stream" if fmt == 'sse' else "application/x-ndjson"
+    return Response(stream_with_context(generate()), mimetype=mimetype,
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/outliers', methods=['GET'])
+def list_outliers():
+    if not outlier_index.wait_ready(timeout=30):
+        return jsonify({"error": "Outlier index is still loading"}), 503
+    args = request.args
+    number = lambda name, cast=float: cast(args[name]) if args.get(name) not in (None, '') else None
+    t0 = time.perf_counter()
     try:
-        # Run the async scout function
-        asyncio.run(run_scout(channel_urls))
-        return jsonify({"success": True, "message": "Batch scouting completed successfully"})
+        page = outlier_index.query(
+            sort=args.get('sort', 'score'), channel_id=args.get('channelId'),
+            min_score=number('minScore'), min_views=number('minViews', int), max_views=number('maxViews', int),
+            published_after=args.get('publishedAfter'), search=args.get('search'),
+            limit=number('limit', int), cursor=args.get('cursor'),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    page["took_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    return jsonify(page), 200
+
+@app.route('/outliers/invalidate', methods=['POST'])
+def invalidate_outliers():
+    # videoIds drops just those rows (e.g. after a delete); no body reloads everything
+    video_ids = (request.get_json(silent=True) or {}).get('videoIds')
+    outlier_index.invalidate(video_ids)
+    return jsonify({"success": True, "reloading": not video_ids}), 202
+
+@app.route('/outliers/<video_id>', methods=['DELETE'])
+def delete_outlier(video_id):
+    # Deleting through the scout keeps the index from serving the row until its next reload
+    try:
+        deleted = storage.get_storage().delete("os_outliers", "video_id", [video_id])
     except Exception as e:
-        print(f"Error during scouting: {e}")
-        return jsonify({"error": str(e)}), 500
+        return jsonify({"error": str(e)}), 502
+    outlier_index.invalidate([video_id])
+    return jsonify({"success": True, "deleted": deleted}), 200
+
+@app.route('/outliers/stats', methods=['GET'])
+def outlier_index_stats():
+    return jsonify(outlier_index.snapshot()), 200
 
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({"status": "running"}), 200
+    return jsonify({"status": "running", "shards": SHARDS, "browser": browser.health(),
+                    "concurrency": limiter.snapshot(), "storage": storage.BACKEND}), 200
+
+@app.route('/browser/restart', methods=['POST'])
+def restart_browser():
+    if SHARDS > 1:
+        return jsonify({"error": "Sharded mode launches a fresh browser per shard and batch"}), 409
+    try:
+        jobs.run_coroutine(browser.stop()).result(timeout=60)
+        jobs.run_coroutine(browser.start()).result(timeout=120)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"success": True, "browser": browser.health()}), 200
+
+@app.route('/thumbnails/<video_id>', methods=['GET'])
+def thumbnail(video_id):
+    width = request.args.get('w')
+    # Browsers revalidate with the ETag; answer from the index without touching the image
+    etag = thumbnails.etag(video_id, width)
+    if etag and etag in request.headers.get('If-None-Match', ''):
+        return Response(status=304, headers={"ETag": etag, "Cache-Control": THUMB_CACHE_CONTROL})
+    try:
+        data, etag = thumbnails.get(video_id, width)
+    except ThumbnailNotFound:
+        return jsonify({"error": "Thumbnail not found"}), 404
+    except Exception as e:
+        # YouTube unreachable or image undecodable: let the browser try the CDN itself
+        print(f"⚠️ Thumbnail proxy failed for {video_id}: {e}")
+        return redirect(SOURCE_URL.format(video_id=video_id), code=302)
+    return Response(data, mimetype="image/webp", headers={"ETag": etag, "Cache-Control": THUMB_CACHE_CONTROL})
+
+@app.route('/thumbnails/prefetch', methods=['POST'])
+def prefetch_thumbnails():
+    video_ids = (request.json or {}).get('videoIds') or []
+    if not isinstance(video_ids, list) or not video_ids:
+        return jsonify({"error": "videoIds is required"}), 400
+    if len(video_ids) > MAX_PREFETCH:
+        return jsonify({"error": f"At most {MAX_PREFETCH} videoIds per request"}), 400
+    # Runs in the background; GET /thumbnails/stats shows progress
+    threading.Thread(target=thumbnails.prefetch, args=(video_ids,), daemon=True).start()
+    return jsonify({"success": True, "queued": len(video_ids)}), 202
+
+@app.route('/thumbnails/stats', methods=['GET'])
+def thumbnail_stats():
+    return jsonify(thumbnails.snapshot()), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.prometheus(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/metrics/summary', methods=['GET'])
+def metrics_summary():
+    return jsonify(REGISTRY.summary()), 200
+
+@app.route('/profile/start', methods=['POST'])
+def profile_start():
+    profiler.start()
+    return jsonify(profiler.report(top=0)), 200
+
+@app.route('/profile/stop', methods=['POST'])
+def profile_stop():
+    profiler.stop()
+    return jsonify(profiler.report(top=int(request.args.get('top', 50)))), 200
+
+@app.route('/profile', methods=['GET'])
+def profile_report():
+    return jsonify(profiler.report(top=int(request.args.get('top', 50)))), 200
 
 @app.route('/', methods=['GET'])
 def index():
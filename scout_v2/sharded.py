@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Sharded scouting: one batch spread over several Chromium processes.
+
+run_sharded() starts N worker processes (`python sharded.py --worker K`),
+each with its own cloned copy of user_data, its own browser and extension
+instance, page pool and event loop. Workers pull channels one at a time from
+the coordinator over a JSON-lines pipe, and only once their adaptive limiter
+has room for another, so a shard stuck on a huge channel simply asks for less
+work while the others keep draining the list. Every
+channel's progress and final result flows back the same way and is merged
+into one result list, in input order, exactly like run().
+
+Workers are subprocesses rather than multiprocessing children on purpose:
+spawn would re-import server.py in every child and boot a second warm browser.
+
+Usage:
+    python sharded.py [--shards 4] [--pool-size 4] [--full] <channel_url_or_comma_separated_list>
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from browser_pool import USER_DATA_DIR  # noqa: E402
+
+SHARDS = int(os.environ.get("SCOUT_SHARDS", 1))
+SHARD_POOL_SIZE = int(os.environ.get("SCOUT_SHARD_POOL_SIZE", 4))  # Pages per shard
+PROFILES_DIR = os.environ.get(
+    "SCOUT_PROFILES_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "profiles")
+)
+# Lock files and caches that must not be shared or are cheap to rebuild
+PROFILE_IGNORE = shutil.ignore_patterns(
+    "Singleton*", "lockfile", "Cache", "Code Cache", "GPUCache", "DawnCache", "GrShaderCache", "ShaderCache"
+)
+
+
+def clone_profile(shard):
+    """Copy user_data (extension state, cookies) to a per-shard dir, once."""
+    dest = os.path.join(PROFILES_DIR, f"shard-{shard}")
+    if not os.path.exists(dest):
+        if os.path.exists(USER_DATA_DIR):
+            shutil.copytree(USER_DATA_DIR, dest, ignore=PROFILE_IGNORE)
+        else:
+            os.makedirs(dest)
+    return dest
+
+
+# --- Worker side -------------------------------------------------------------
+
+async def _worker_main(shard, pool_size, options):
+    from main import process_channel
+    from browser_pool import BrowserManager
+    from concurrency import AdaptiveLimiter
+    from db import BufferedWriter, add_write_listener
+    import snapshots
+    from innertube import ChannelLister, ENABLED as HTTP_LISTING
+
+    # stdout is the protocol channel; everything else prints to stderr
+    proto, sys.stdout = sys.stdout, sys.stderr
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    def send(message):
+        proto.write(json.dumps(message, default=str) + "\n")
+        proto.flush()
+
+    # Each request for work gets exactly one reply, so replies can go in one queue
+    assignments = asyncio.Queue()
+
+    async def read_assignments():
+        while line := await reader.readline():
+            assignments.put_nowait(json.loads(line))
+
+    # The coordinator's process (e.g. the server's outlier index) wants to see these writes
+    add_write_listener(lambda table, rows: send({"type": "written", "table": table, "rows": rows}))
+
+    browser = BrowserManager(pool_size=pool_size, user_data_dir=clone_profile(shard))
+    writer = BufferedWriter()
+    limiter = AdaptiveLimiter(ceiling=pool_size)
+    # Shards write their own part files, so they can share the dataset directory
+    snapshot_writer = snapshots.SnapshotWriter() if snapshots.ENABLED else None
+    lister = ChannelLister() if HTTP_LISTING else None
+    on_progress = lambda url, status, result: send({"type": "progress", "url": url, "status": status,
+                                                    "result": result})
+
+    # Only ask for a channel when the limiter would let it start, so a shard
+    # never sits on assignments another shard could be running
+    outstanding = 0
+    free = asyncio.Condition()
+
+    async def puller():
+        nonlocal outstanding
+        while True:
+            async with free:
+                # Woken when a channel finishes; a limit increase waits for the next one
+                await free.wait_for(lambda: outstanding < limiter.current)
+                outstanding += 1
+            try:
+                send({"type": "want"})
+                item = await assignments.get()
+                if item.get("stop"):
+                    return
+                await process_channel(browser, writer, item["url"], item["index"], item["total"], limiter,
+                                      on_progress, snapshot_writer=snapshot_writer, lister=lister, **options)
+            finally:
+                async with free:
+                    outstanding -= 1
+                    free.notify_all()
+
+    reading = asyncio.create_task(read_assignments())
+    if not HTTP_LISTING:
+        await browser.start()
+    await writer.start()
+    try:
+        await asyncio.gather(*(puller() for _ in range(pool_size)))
+    finally:
+        await writer.close()
+        if snapshot_writer:
+            await snapshot_writer.close()
+        send({"type": "stats", "writer": writer.stats, "concurrency": limiter.snapshot(),
+              "snapshots": snapshot_writer.stats if snapshot_writer else None, "browser": browser.health()})
+        if lister:
+            await lister.close()
+        await browser.stop()
+        reading.cancel()
+
+
+# --- Coordinator side --------------------------------------------------------
+
+async def run_sharded(channel_urls, on_progress=None, shards=SHARDS, pool_size=SHARD_POOL_SIZE,
+                      max_items=None, published_after=None, full_rescan=False, **_):
+    """
+    Same contract as main.run(): scout channel_urls and return one result
+    dict per channel, calling on_progress(channel_url, status, result) as
+    channels start and finish. Rows the shards write to the database are
+    passed on to this process's db write listeners, and each finished
+    channel is recorded in this process's metrics registry (the one /metrics
+    serves); the shards' own registries never leave their processes. Extra
+    run() options (browser, limiter) are ignored; every shard owns its own.
+    """
+    from main import new_result
+    from db import notify_written
+    from metrics import record_channel
+
+    if isinstance(channel_urls, str):
+        channel_urls = [channel_urls]
+    channel_urls = [url.strip() for url in channel_urls if url.strip()]
+    shards = max(1, min(shards, len(channel_urls)))
+    total = len(channel_urls)
+    pending = list(enumerate(channel_urls))
+    pending.reverse()  # pop() hands them out in input order
+    results = {}
+    shard_reports = {}
+    options = {"max_items": max_items, "published_after": published_after, "full_rescan": full_rescan}
+
+    print(f"🚀 Starting Sharded Scout for {total} channels ({shards} shards x {pool_size} pages)")
+    t0 = time.time()
+
+    async def drive(shard):
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), "--worker", str(shard), "--pool-size", str(pool_size),
+            "--options", json.dumps(options, default=str),
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, limit=2 ** 24,
+        )
+        assigned = {}  # url -> index, until its final result comes back
+        report = shard_reports[shard] = {"shard": shard, "pid": proc.pid, "channels": 0}
+        try:
+            while line := await proc.stdout.readline():
+                message = json.loads(line)
+                kind = message["type"]
+                if kind == "want":
+                    if pending:
+                        index, url = pending.pop()
+                        assigned[url] = index
+                        reply = {"index": index, "url": url, "total": total}
+                    else:
+                        reply = {"stop": True}
+                    proc.stdin.write((json.dumps(reply) + "\n").encode())
+                    await proc.stdin.drain()
+                elif kind == "progress":
+                    url, status, result = message["url"], message["status"], message["result"]
+                    result["shard"] = shard
+                    if result.get("finished_at") and url in assigned:
+                        results[assigned.pop(url)] = result
+                        report["channels"] += 1
+                        # The final result carries the channel's timings, scroll and network counts
+                        record_channel(result)
+                    if on_progress:
+                        on_progress(url, status, result)
+                elif kind == "written":
+                    notify_written(message["table"], message["rows"])
+                elif kind == "stats":
+                    report.update({k: v for k, v in message.items() if k != "type"})
+        except (ConnectionError, ValueError) as e:
+            print(f"❌ Shard {shard} protocol error: {e}")
+        finally:
+            if proc.stdin and not proc.stdin.is_closing():
+                proc.stdin.close()
+            report["exit_code"] = await proc.wait()
+            # Whatever a crashed shard was holding is reported as failed, not lost
+            for url, index in assigned.items():
+                result = new_result(url)
+                result.update(status="failed", shard=shard, finished_at=time.time(),
+                              error=f"Shard {shard} exited with code {report['exit_code']}")
+                results[index] = result
+                record_channel(result)
+                if on_progress:
+                    on_progress(url, "failed", result)
+
+    await asyncio.gather(*(drive(shard) for shard in range(shards)))
+
+    # Shards that all died before asking for work leave channels unassigned
+    for index, url in pending:
+        result = new_result(url)
+        result.update(status="failed", error="No shard picked this channel up", finished_at=time.time())
+        results[index] = result
+        record_channel(result)
+        if on_progress:
+            on_progress(url, "failed", result)
+
+    elapsed = time.time() - t0
+    ordered = [results[i] for i in range(total)]
+    done = sum(1 for r in ordered if r["status"] == "done")
+    print(f"🏁 Sharded scout: {done}/{total} channels done in {elapsed:.1f}s "
+          f"({total / elapsed * 60 if elapsed else 0:.1f} channels/min)")
+    for shard in sorted(shard_reports):
+        report = shard_reports[shard]
+        print(f"   shard {shard} (pid {report['pid']}, exit {report.get('exit_code')}): "
+              f"{report['channels']} channels, DB {report.get('writer')}")
+    return ordered
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scout channels across several browser processes")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--options", default="{}", help=argparse.SUPPRESS)
+    parser.add_argument("--shards", type=int, default=SHARDS if SHARDS > 1 else (os.cpu_count() or 2) // 2 or 1)
+    parser.add_argument("--pool-size", type=int, default=SHARD_POOL_SIZE, help="Pages per shard")
+    parser.add_argument("--full", action="store_true", help="Full rescan instead of incremental")
+    parser.add_argument("channels", nargs="?", help="Channel URL or comma-separated list")
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        asyncio.run(_worker_main(args.worker, args.pool_size, json.loads(args.options)))
+    elif not args.channels:
+        parser.print_usage()
+        sys.exit(1)
+    else:
+        asyncio.run(run_sharded(args.channels.split(','), shards=args.shards, pool_size=args.pool_size,
+                                full_rescan=args.full))
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Columnar history of every video the scout has seen.
+
+Supabase only keeps outliers and overwrites their views on each upsert, so
+each scout run also appends every scraped video's stats to a local Parquet
+dataset, hive-partitioned by channel and scrape date:
+
+    data/snapshots/channel=<key>/date=YYYY-MM-DD/part-<uuid>-0.parquet
+
+SnapshotWriter buffers rows and writes them in batches from a worker thread.
+SnapshotStore reads the dataset with partition pruning and column projection,
+and answers view-velocity (growth) and re-scoring queries with vectorized
+pandas over millions of rows, without touching YouTube or Supabase.
+
+Usage:
+    python snapshots.py growth [--channel URL] [--since YYYY-MM-DD] [--top 20]
+    python snapshots.py rescore [--channel URL] [--min-score 1.5] [--top 20]
+    python snapshots.py compact
+    python snapshots.py stats
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from scoring import score_frame
+
+SNAPSHOT_DIR = os.environ.get("SCOUT_SNAPSHOT_DIR", os.path.abspath("./data/snapshots"))
+ENABLED = os.environ.get("SCOUT_SNAPSHOTS", "1") == "1"
+BATCH_ROWS = int(os.environ.get("SCOUT_SNAPSHOT_BATCH_ROWS", 5000))
+
+SCHEMA = pa.schema([
+    ("video_id", pa.string()),
+    ("channel_url", pa.string()),
+    ("views", pa.int64()),
+    ("published_at", pa.timestamp("us", tz="UTC")),
+    ("outlier_score", pa.float64()),
+    ("native_score", pa.float64()),
+    ("extension_score", pa.float64()),
+    ("scraped_at", pa.timestamp("us", tz="UTC")),
+    ("channel", pa.string()),
+    ("date", pa.string()),
+])
+PARTITIONING = ds.partitioning(pa.schema([("channel", pa.string()), ("date", pa.string())]), flavor="hive")
+
+
+def channel_key(channel_url):
+    """Filesystem-safe partition value: the @handle or /channel/ id, else a hash."""
+    path = urlparse(channel_url.strip()).path.strip("/")
+    path = re.sub(r"/(videos|featured|shorts|streams)$", "", path)
+    slug = re.sub(r"[^A-Za-z0-9@._-]", "_", path.split("/")[-1]) if path else ""
+    return slug or hashlib.sha1(channel_url.encode()).hexdigest()[:16]
+
+
+def _timestamp(value):
+    """datetime (UTC when naive) from an ISO string, a datetime or epoch seconds."""
+    if not value:
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def write_rows(rows, root=SNAPSHOT_DIR):
+    """Append rows to the dataset. Blocking; one new file per touched partition."""
+    if not rows:
+        return 0
+    table = pa.Table.from_pylist(rows, schema=SCHEMA)
+    ds.write_dataset(
+        table, root, format="parquet", partitioning=PARTITIONING,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return len(rows)
+
+
+class SnapshotWriter:
+    def __init__(self, root=SNAPSHOT_DIR, batch_rows=BATCH_ROWS):
+        self.root = root
+        self.batch_rows = batch_rows
+        self._rows = []
+        self._lock = None
+        self.stats = {"rows": 0, "flushes": 0, "errors": 0}
+
+    async def add(self, channel_url, videos, scraped_at=None):
+        """Buffer one channel's scraped videos; flushes once batch_rows are pending."""
+        scraped_at = _timestamp(scraped_at) or datetime.now(timezone.utc)
+        key, date = channel_key(channel_url), scraped_at.strftime("%Y-%m-%d")
+        for video in videos:
+            if not video.get("video_id"):
+                continue
+            self._rows.append({
+                "video_id": video["video_id"],
+                "channel_url": channel_url,
+                "views": video.get("views"),
+                "published_at": _timestamp(video.get("published_at")),
+                "outlier_score": video.get("outlier_score"),
+                "native_score": video.get("native_score"),
+                "extension_score": video.get("extension_score"),
+                "scraped_at": scraped_at,
+                "channel": key,
+                "date": date,
+            })
+        if len(self._rows) >= self.batch_rows:
+            await self.flush()
+
+    async def flush(self):
+        self._lock = self._lock or asyncio.Lock()
+        async with self._lock:
+            rows, self._rows = self._rows, []
+            if not rows:
+                return
+            try:
+                self.stats["rows"] += await asyncio.to_thread(write_rows, rows, self.root)
+                self.stats["flushes"] += 1
+            except Exception as e:
+                # History is best-effort; never fail a scout over it
+                print(f"❌ Snapshot write failed ({len(rows)} rows): {e}")
+                self.stats["errors"] += 1
+
+    async def close(self):
+        await self.flush()
+
+
+class SnapshotStore:
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+
+    def dataset(self):
+        return ds.dataset(self.root, format="parquet", partitioning=PARTITIONING, schema=SCHEMA)
+
+    def load(self, channels=None, since=None, until=None, columns=None):
+        """
+        Snapshots as a DataFrame. channels (URLs or keys) and since/until
+        (scrape dates) prune whole partitions before any file is opened.
+        """
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=columns or SCHEMA.names)
+        conditions = []
+        if channels:
+            keys = [c if "/" not in c else channel_key(c) for c in channels]
+            conditions.append(ds.field("channel").isin(keys))
+        if since:
+            conditions.append(ds.field("date") >= str(since)[:10])
+        if until:
+            conditions.append(ds.field("date") <= str(until)[:10])
+        flt = None
+        for condition in conditions:
+            flt = condition if flt is None else flt & condition
+        return self.dataset().to_table(columns=columns, filter=flt).to_pandas()
+
+    def growth(self, channels=None, since=None, until=None):
+        """
+        Per video: first and last sighting in the window, views gained and
+        views/day between them, plus current lifetime views/day.
+        """
+        df = self.load(channels, since, until, columns=["video_id", "channel", "views", "published_at",
+                                                       "scraped_at"])
+        if df.empty:
+            return pd.DataFrame(columns=["video_id", "channel", "snapshots", "first_views", "last_views",
+                                         "views_gained", "views_per_day", "lifetime_views_per_day"])
+        df = df.sort_values("scraped_at")
+        grouped = df.groupby("video_id", sort=False)
+        out = grouped.agg(
+            channel=("channel", "last"), snapshots=("views", "size"), published_at=("published_at", "last"),
+            first_seen=("scraped_at", "first"), last_seen=("scraped_at", "last"),
+            first_views=("views", "first"), last_views=("views", "last"),
+        )
+        days = (out["last_seen"] - out["first_seen"]).dt.total_seconds() / 86400
+        out["views_gained"] = out["last_views"] - out["first_views"]
+        out["views_per_day"] = (out["views_gained"] / days).where(days > 0)
+        age = (out["last_seen"] - out["published_at"]).dt.total_seconds() / 86400
+        out["lifetime_views_per_day"] = (out["last_views"] / age.clip(lower=1)).where(age.notna())
+        return out.reset_index()
+
+    def rescore(self, channels=None, as_of=None):
+        """
+        Re-run the native scorer over each video's latest snapshot (as of a
+        scrape date, default now), per channel, with the current settings.
+        """
+        df = self.load(channels, until=as_of, columns=["video_id", "channel", "channel_url", "views",
+                                                       "published_at", "outlier_score", "scraped_at"])
+        if df.empty:
+            return df.assign(score=pd.Series(dtype="float64"))
+        latest = df.sort_values("scraped_at").drop_duplicates("video_id", keep="last")
+        # Grid order (newest upload first) within each channel, as the scorer expects
+        latest = latest.sort_values(["channel", "published_at"], ascending=[True, False]).reset_index(drop=True)
+        now = pd.Timestamp(as_of, tz="UTC") + pd.Timedelta(days=1) if as_of else None
+        latest["score"] = score_frame(latest, now=now, by="channel")
+        return latest
+
+    def compact(self):
+        """Merge each partition's small per-flush files into one. Returns files removed."""
+        removed = 0
+        if not os.path.isdir(self.root):
+            return removed
+        for dirpath, _, filenames in os.walk(self.root):
+            parts = sorted(f for f in filenames if f.endswith(".parquet"))
+            if len(parts) < 2:
+                continue
+            paths = [os.path.join(dirpath, f) for f in parts]
+            table = pa.concat_tables(pq.read_table(p) for p in paths)
+            tmp = os.path.join(dirpath, f".compact-{uuid.uuid4().hex}.parquet.tmp")
+            pq.write_table(table, tmp)
+            for path in paths:
+                os.remove(path)
+            shutil.move(tmp, os.path.join(dirpath, f"part-{uuid.uuid4().hex}-0.parquet"))
+            removed += len(paths) - 1
+        return removed
+
+    def stats(self):
+        if not os.path.isdir(self.root):
+            return {"rows": 0, "files": 0, "channels": 0, "bytes": 0}
+        dataset = self.dataset()
+        files = dataset.files
+        return {
+            "rows": dataset.count_rows(),
+            "files": len(files),
+            "channels": len({os.path.basename(os.path.dirname(os.path.dirname(f))) for f in files}),
+            "bytes": sum(os.path.getsize(f) for f in files),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the local video snapshot store")
+    parser.add_argument("command", choices=["growth", "rescore", "compact", "stats"])
+    parser.add_argument("--channel", action="append", help="Channel URL or partition key (repeatable)")
+    parser.add_argument("--since", help="First scrape date (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Last scrape date (YYYY-MM-DD)")
+    parser.add_argument("--min-score", type=float, default=1.5)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    store = SnapshotStore()
+    t0 = time.time()
+    pd.set_option("display.width", 200)
+    if args.command == "growth":
+        result = store.growth(args.channel, args.since, args.until)
+        print(result.sort_values("views_per_day", ascending=False).head(args.top).to_string(index=False))
+    elif args.command == "rescore":
+        result = store.rescore(args.channel, as_of=args.until)
+        outliers = result[result["score"] > args.min_score].sort_values("score", ascending=False)
+        print(outliers[["channel", "video_id", "views", "published_at", "outlier_score", "score"]]
+              .head(args.top).to_string(index=False))
+        print(f"\n{len(outliers)} outliers above {args.min_score}x out of {len(result)} videos")
+    elif args.command == "compact":
+        print(f"🗜️ Removed {store.compact()} small files")
+    else:
+        print(store.stats())
+    print(f"⏱️ {time.time() - t0:.2f}s")
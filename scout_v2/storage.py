@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+Storage backends for scout data (os_channels, os_outliers).
+
+Everything that reads or writes those tables goes through a Storage:
+
+    upsert(table, rows, on_conflict)            bulk insert-or-update, returns the written rows
+    delete(table, column, values)               keyed delete
+    update(table, values, filters)              filtered update
+    scan(table, columns, key, page_size)        keyset-paged iteration over a whole table
+    query(table, columns, filters, order, ...)  filtered, ordered, limited select
+    count(table, filters) / columns(table)
+
+Filters are (column, op, value) tuples; op is one of eq, neq, lt, lte, gt,
+gte, in, ilike.
+
+SCOUT_STORAGE picks the backend:
+    supabase   PostgREST over HTTP (default; what the dashboard reads)
+    local      embedded SQLite at SCOUT_LOCAL_DB, indexed on video_id,
+               channel_id, outlier_score, views and published_at; writes go at
+               disk speed and nothing needs the network
+
+The local store remembers which rows changed (and which were deleted) since
+they were last pushed, and sync_upstream() sends them to Supabase in bulk:
+deletes first, then channels so outliers can be re-pointed at the remote
+channel ids.
+
+Usage:
+    python storage.py sync [--interval 0]   # Push local changes upstream (repeat every N seconds)
+    python storage.py stats
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from db import get_client, execute_with_retry
+
+BACKEND = os.environ.get("SCOUT_STORAGE", "supabase")
+LOCAL_DB_PATH = os.environ.get("SCOUT_LOCAL_DB", os.path.abspath("./data/scout.sqlite"))
+SYNC_BATCH_ROWS = int(os.environ.get("SCOUT_SYNC_BATCH_ROWS", 500))
+IN_CHUNK = 200  # Values per in_() filter; keeps PostgREST URLs short
+
+OPS = ("eq", "neq", "lt", "lte", "gt", "gte", "in", "ilike")
+
+# Columns Supabase has; local bookkeeping columns never leave the local store
+UPSTREAM_COLUMNS = {
+    "os_channels": ("url", "name", "avatar_url", "last_scouted"),
+    "os_outliers": ("video_id", "title", "views", "outlier_score", "thumbnail", "channel_id", "published_at",
+                    "scouted_at"),
+}
+
+
+class Storage:
+    """Interface; see the module docstring. Every method is blocking."""
+
+    name = None
+
+    def upsert(self, table, rows, on_conflict):
+        raise NotImplementedError
+
+    def delete(self, table, column, values):
+        raise NotImplementedError
+
+    def update(self, table, values, filters):
+        raise NotImplementedError
+
+    def query(self, table, columns="*", filters=(), order=None, desc=False, limit=None, offset=0):
+        raise NotImplementedError
+
+    def count(self, table, filters=()):
+        raise NotImplementedError
+
+    def columns(self, table):
+        raise NotImplementedError
+
+    def scan(self, table, columns="*", key="video_id", page_size=1000, filters=(), stats=None):
+        """Yield pages of rows ordered by `key`, each page starting after the last key seen."""
+        last = None
+        while True:
+            page_filters = list(filters) + ([(key, "gt", last)] if last is not None else [])
+            rows = self.query(table, columns, page_filters, order=key, limit=page_size)
+            if stats is not None:
+                stats["round_trips"] += 1
+                stats["pages"] += 1
+            if not rows:
+                return
+            yield rows
+            if len(rows) < page_size:
+                return
+            last = rows[-1][key]
+
+    def close(self):
+        pass
+
+
+# --- Supabase ------------------------------------------------------------------
+
+class SupabaseStorage(Storage):
+    name = "supabase"
+
+    def __init__(self, client=None):
+        self.client = client or get_client()
+
+    def _filtered(self, query, filters):
+        for column, op, value in filters:
+            if op not in OPS:
+                raise ValueError(f"Unsupported filter op: {op}")
+            query = getattr(query, "in_" if op == "in" else op)(column, value)
+        return query
+
+    def upsert(self, table, rows, on_conflict):
+        if not rows:
+            return []
+        return execute_with_retry(lambda: self.client.table(table).upsert(rows, on_conflict=on_conflict)).data or []
+
+    def delete(self, table, column, values):
+        deleted = 0
+        values = list(values)
+        for i in range(0, len(values), IN_CHUNK):
+            chunk = values[i:i + IN_CHUNK]
+            res = execute_with_retry(lambda: self.client.table(table).delete().in_(column, chunk))
+            deleted += len(res.data or [])
+        return deleted
+
+    def update(self, table, values, filters):
+        return execute_with_retry(lambda: self._filtered(self.client.table(table).update(values), filters)).data or []
+
+    def query(self, table, columns="*", filters=(), order=None, desc=False, limit=None, offset=0):
+        def build():
+            query = self._filtered(self.client.table(table).select(columns), filters)
+            if order:
+                query = query.order(order, desc=desc)
+            if limit:
+                query = query.range(offset, offset + limit - 1) if offset else query.limit(limit)
+            return query
+        return execute_with_retry(build).data or []
+
+    def count(self, table, filters=()):
+        return execute_with_retry(
+            lambda: self._filtered(self.client.table(table).select("*", count="exact", head=True), filters)
+        ).count or 0
+
+    def columns(self, table):
+        rows = self.query(table, limit=1)
+        return list(rows[0]) if rows else []
+
+
+# --- Local (SQLite) ------------------------------------------------------------
+
+LOCAL_SCHEMA = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    CREATE TABLE IF NOT EXISTS os_channels (
+        id TEXT PRIMARY KEY,
+        url TEXT NOT NULL UNIQUE,
+        name TEXT,
+        avatar_url TEXT,
+        last_scouted TEXT,
+        created_at TEXT,
+        remote_id TEXT,
+        updated_at REAL,
+        synced_at REAL
+    );
+    CREATE TABLE IF NOT EXISTS os_outliers (
+        video_id TEXT PRIMARY KEY,
+        title TEXT,
+        views INTEGER,
+        outlier_score REAL,
+        thumbnail TEXT,
+        channel_id TEXT,
+        published_at TEXT,
+        scouted_at TEXT,
+        created_at TEXT,
+        updated_at REAL,
+        synced_at REAL
+    );
+    CREATE INDEX IF NOT EXISTS os_outliers_channel ON os_outliers (channel_id);
+    CREATE INDEX IF NOT EXISTS os_outliers_score ON os_outliers (outlier_score DESC);
+    CREATE INDEX IF NOT EXISTS os_outliers_views ON os_outliers (views DESC);
+    CREATE INDEX IF NOT EXISTS os_outliers_published ON os_outliers (published_at DESC);
+    CREATE INDEX IF NOT EXISTS os_outliers_unsynced ON os_outliers (updated_at) WHERE synced_at IS NULL
+        OR synced_at < updated_at;
+    CREATE TABLE IF NOT EXISTS pending_deletes (
+        tbl TEXT NOT NULL,
+        key_column TEXT NOT NULL,
+        key TEXT NOT NULL,
+        PRIMARY KEY (tbl, key_column, key)
+    );
+"""
+
+SQL_OPS = {"eq": "=", "neq": "!=", "lt": "<", "lte": "<=", "gt": ">", "gte": ">=", "ilike": "LIKE"}
+LOCAL_ONLY = ("remote_id", "updated_at", "synced_at")
+# Columns Supabase fills with now() on insert (setup_database.sql); the local store does the same
+INSERT_DEFAULTS = {"os_channels": ("created_at", "last_scouted"), "os_outliers": ("created_at", "scouted_at")}
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _where(filters):
+    clauses, params = [], []
+    for column, op, value in filters:
+        if op == "in":
+            values = list(value)
+            if not values:
+                clauses.append("0")
+                continue
+            clauses.append(f'"{column}" IN ({",".join("?" * len(values))})')
+            params.extend(values)
+        elif op in SQL_OPS:
+            clauses.append(f'"{column}" {SQL_OPS[op]} ?')
+            params.append(value)
+        else:
+            raise ValueError(f"Unsupported filter op: {op}")
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class LocalStorage(Storage):
+    name = "local"
+
+    def __init__(self, path=LOCAL_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(LOCAL_SCHEMA)
+        self._columns = {
+            table: [row["name"] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+            for table in UPSTREAM_COLUMNS
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _check(self, table, columns):
+        unknown = set(columns) - set(self._columns[table])
+        if unknown:
+            raise ValueError(f"Unknown {table} columns: {', '.join(sorted(unknown))}")
+
+    def upsert(self, table, rows, on_conflict):
+        """Insert or update only the columns each row carries, like a PostgREST upsert."""
+        if not rows:
+            return []
+        now = time.time()
+        groups = {}
+        for row in rows:
+            row = {k: (_now_iso() if v == "now()" else v) for k, v in row.items()}
+            if table == "os_channels" and on_conflict != "id":
+                row.setdefault("id", str(uuid.uuid4()))
+            row["updated_at"] = now
+            groups.setdefault(tuple(row), []).append(row)
+        with self._lock, self._conn:
+            for columns, group in groups.items():
+                self._check(table, columns)
+                names = ", ".join(f'"{c}"' for c in columns)
+                # An existing row keeps its id (and created_at)
+                updates = ", ".join(f'"{c}" = excluded."{c}"' for c in columns
+                                    if c not in (on_conflict, "id", "created_at"))
+                # Defaults only apply to new rows; an update leaves them alone
+                defaults = [c for c in INSERT_DEFAULTS[table] if c not in columns]
+                stamp = _now_iso()
+                self._conn.executemany(
+                    f"INSERT INTO {table} ({', '.join([names] + defaults)}) "
+                    f"VALUES ({', '.join('?' * (len(columns) + len(defaults)))}) ON CONFLICT(\"{on_conflict}\") DO "
+                    + (f"UPDATE SET {updates}" if updates else "NOTHING"),
+                    [[row[c] for c in columns] + [stamp] * len(defaults) for row in group],
+                )
+            # A row written again after a local delete must not be deleted upstream
+            self._conn.executemany("DELETE FROM pending_deletes WHERE tbl = ? AND key_column = ? AND key = ?",
+                                   [(table, on_conflict, row[on_conflict]) for row in rows])
+        if table == "os_channels":
+            # Callers need the ids (BufferedWriter resolves channel futures with them)
+            keys = [row[on_conflict] for row in rows]
+            return self.query(table, "id, url, name, avatar_url, last_scouted", [(on_conflict, "in", keys)])
+        return rows
+
+    def delete(self, table, column, values):
+        values = list(values)
+        if not values:
+            return 0
+        deleted = 0
+        with self._lock, self._conn:
+            for i in range(0, len(values), 500):
+                chunk = values[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                # Remember what to delete upstream; local channel ids mean nothing to Supabase
+                if table == "os_channels" and column == "id":
+                    pending = [("id", r[0]) for r in self._conn.execute(
+                        f"SELECT remote_id FROM os_channels WHERE id IN ({marks}) AND remote_id IS NOT NULL", chunk)]
+                else:
+                    pending = [(column, value) for value in chunk]
+                self._conn.executemany("INSERT OR IGNORE INTO pending_deletes (tbl, key_column, key) VALUES (?, ?, ?)",
+                                       [(table, c, k) for c, k in pending])
+                deleted += self._conn.execute(f'DELETE FROM {table} WHERE "{column}" IN ({marks})', chunk).rowcount
+        return deleted
+
+    def update(self, table, values, filters):
+        self._check(table, values)
+        where, params = _where(filters)
+        assignments = ", ".join(f'"{c}" = ?' for c in values) + ", updated_at = ?"
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE {table} SET {assignments}{where}",
+                               [*(_now_iso() if v == "now()" else v for v in values.values()), time.time(), *params])
+        return self.query(table, filters=filters)
+
+    def query(self, table, columns="*", filters=(), order=None, desc=False, limit=None, offset=0):
+        if columns == "*":
+            select = ", ".join(f'"{c}"' for c in self._columns[table] if c not in LOCAL_ONLY)
+        else:
+            names = [c.strip() for c in columns.split(",")]
+            self._check(table, names)
+            select = ", ".join(f'"{c}"' for c in names)
+        where, params = _where(filters)
+        sql = f"SELECT {select} FROM {table}{where}"
+        if order:
+            sql += f' ORDER BY "{order}" {"DESC" if desc else "ASC"}'
+        if limit:
+            sql += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def count(self, table, filters=()):
+        where, params = _where(filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0]
+
+    def columns(self, table):
+        return [c for c in self._columns[table] if c not in LOCAL_ONLY]
+
+    # --- Sync bookkeeping --------------------------------------------------------
+
+    def unsynced(self, table, limit, after=None):
+        """Changed rows in (updated_at, key) order, starting past the `after` pair if given."""
+        key = "id" if table == "os_channels" else "video_id"
+        where, params = "", [limit]
+        if after:
+            where, params = f" AND (updated_at, \"{key}\") > (?, ?)", [*after, limit]
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(
+                f"SELECT * FROM {table} WHERE (synced_at IS NULL OR synced_at < updated_at){where} "
+                f"ORDER BY updated_at, \"{key}\" LIMIT ?", params)]
+
+    def mark_synced(self, table, key, rows, remote_ids=None):
+        """Mark rows pushed, unless they changed again since they were read."""
+        remote_ids = remote_ids or {}
+        with self._lock, self._conn:
+            if table == "os_channels":
+                self._conn.executemany(
+                    "UPDATE os_channels SET synced_at = ?, remote_id = COALESCE(?, remote_id) "
+                    "WHERE id = ? AND updated_at = ?",
+                    [(row["updated_at"], remote_ids.get(row["id"]), row["id"], row["updated_at"]) for row in rows],
+                )
+            else:
+                self._conn.executemany(
+                    f'UPDATE {table} SET synced_at = ? WHERE "{key}" = ? AND updated_at = ?',
+                    [(row["updated_at"], row[key], row["updated_at"]) for row in rows],
+                )
+
+    def remote_channel_ids(self, local_ids):
+        with self._lock:
+            local_ids = list(local_ids)
+            rows = self._conn.execute(
+                f"SELECT id, remote_id FROM os_channels WHERE id IN ({','.join('?' * len(local_ids))})", local_ids)
+            return {row["id"]: row["remote_id"] for row in rows if row["remote_id"]}
+
+    def pending_deletes(self):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute("SELECT * FROM pending_deletes")]
+
+    def clear_pending_deletes(self, table, column, keys):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM pending_deletes WHERE tbl = ? AND key_column = ? AND key = ?",
+                                   [(table, column, key) for key in keys])
+
+    def backlog(self):
+        with self._lock:
+            return {
+                table: self._conn.execute(
+                    f"SELECT COUNT(*) FROM {table} WHERE synced_at IS NULL OR synced_at < updated_at").fetchone()[0]
+                for table in UPSTREAM_COLUMNS
+            } | {"deletes": self._conn.execute("SELECT COUNT(*) FROM pending_deletes").fetchone()[0]}
+
+
+def upstream_row(table, row):
+    """
+    The row's upstream columns, with explicit nulls so values cleared locally
+    are cleared upstream; a column Supabase fills on insert is left out when
+    the local row has no value, so the default applies instead of a null.
+    """
+    return {c: row.get(c) for c in UPSTREAM_COLUMNS[table]
+            if row.get(c) is not None or c not in INSERT_DEFAULTS[table]}
+
+
+def _push(remote, table, rows, on_conflict, stats):
+    """Upsert rows upstream, one request per set of keys (PostgREST wants the same keys on every row)."""
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(row), []).append(row)
+    written = []
+    for group in groups.values():
+        stats["round_trips"] += 1
+        try:
+            written += remote.upsert(table, group, on_conflict=on_conflict)
+        except Exception as e:
+            # Databases created from setup_database.sql have no os_channels.avatar_url (see db.py)
+            if table != "os_channels" or "avatar_url" not in str(e):
+                raise
+            print(f"⚠️ Channel sync error (trying without avatar): {e}")
+            stats["round_trips"] += 1
+            written += remote.upsert(table, [{k: v for k, v in row.items() if k != "avatar_url"} for row in group],
+                                     on_conflict=on_conflict)
+    return written
+
+
+def sync_upstream(local, remote=None, batch_rows=SYNC_BATCH_ROWS):
+    """
+    Push every local change to Supabase in bulk: deletes first (so a row
+    deleted and written again locally ends up present upstream), then
+    channels (by remote id once known, else by url), then outliers with
+    channel_id mapped to the remote ids (see upstream_row for which columns
+    go). Outliers whose channel isn't upstream yet are deferred to the next
+    sync. Rows that change mid-sync are picked up again. Blocking; returns
+    counts.
+    """
+    remote = remote or SupabaseStorage()
+    stats = {"channels": 0, "outliers": 0, "deleted": 0, "deferred": 0, "round_trips": 0}
+    t0 = time.time()
+
+    pending = {}
+    for row in local.pending_deletes():
+        pending.setdefault((row["tbl"], row["key_column"]), []).append(row["key"])
+    for (table, column), keys in pending.items():
+        remote.delete(table, column, keys)
+        local.clear_pending_deletes(table, column, keys)
+        stats["deleted"] += len(keys)
+        stats["round_trips"] += -(-len(keys) // IN_CHUNK)
+
+    while rows := local.unsynced("os_channels", batch_rows):
+        remote_ids = {}
+        known = [r for r in rows if r["remote_id"]]
+        new = [r for r in rows if not r["remote_id"]]
+        if known:
+            _push(remote, "os_channels", [dict(upstream_row("os_channels", r), id=r["remote_id"]) for r in known],
+                  "id", stats)
+        if new:
+            written = _push(remote, "os_channels", [upstream_row("os_channels", r) for r in new], "url", stats)
+            by_url = {row["url"]: row["id"] for row in written}
+            remote_ids = {r["id"]: by_url.get(r["url"]) for r in new}
+        local.mark_synced("os_channels", "id", rows, remote_ids)
+        stats["channels"] += len(rows)
+        if len(rows) < batch_rows:
+            break
+
+    cursor = None
+    while rows := local.unsynced("os_outliers", batch_rows, after=cursor):
+        cursor = (rows[-1]["updated_at"], rows[-1]["video_id"])
+        channel_ids = local.remote_channel_ids({r["channel_id"] for r in rows if r["channel_id"]})
+        ready, pushed = [], []
+        for row in rows:
+            if row["channel_id"] and row["channel_id"] not in channel_ids:
+                # Channel never made it upstream; try again next sync
+                stats["deferred"] += 1
+                continue
+            out = upstream_row("os_outliers", row)
+            if row["channel_id"]:
+                out["channel_id"] = channel_ids[row["channel_id"]]
+            ready.append(out)
+            pushed.append(row)
+        if ready:
+            _push(remote, "os_outliers", ready, "video_id", stats)
+            local.mark_synced("os_outliers", "video_id", pushed)
+        stats["outliers"] += len(ready)
+        if len(rows) < batch_rows:
+            break
+
+    stats["elapsed"] = round(time.time() - t0, 2)
+    return stats
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """Process-wide storage backend chosen by SCOUT_STORAGE."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if BACKEND == "local":
+                _storage = LocalStorage()
+            elif BACKEND == "supabase":
+                _storage = SupabaseStorage()
+            else:
+                raise ValueError(f"Unknown SCOUT_STORAGE: {BACKEND}")
+        return _storage
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local store maintenance")
+    parser.add_argument("command", choices=["sync", "stats"])
+    parser.add_argument("--interval", type=float, default=0, help="Keep syncing every N seconds")
+    args = parser.parse_args()
+
+    local = LocalStorage()
+    if args.command == "stats":
+        print({"outliers": local.count("os_outliers"), "channels": local.count("os_channels"),
+               "unsynced": local.backlog(), "path": local.path})
+    else:
+        while True:
+            print(f"🔄 Synced to Supabase: {sync_upstream(local)}")
+            if not args.interval:
+                break
+            time.sleep(args.interval)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The scout's modules import each other as top-level modules (it runs from scout_v2/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,152 @@
+import time
+
+import pytest
+
+from dedup_index import DuplicateIndex, normalize_title, title_numbers
+from maintenance import run_maintenance
+from storage import LocalStorage
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = DuplicateIndex(str(tmp_path / "dedup.sqlite"))
+    yield index
+    index.close()
+
+
+def row(video_id, title, thumbnail=None):
+    return {"video_id": video_id, "title": title, "thumbnail": thumbnail}
+
+
+def test_repost_is_a_duplicate(index):
+    unique, duplicates = index.check_and_add([
+        row("a", "I Survived 100 Days in Hardcore Minecraft"),
+        row("b", "I Survived 100 Days in Hardcore Minecraft (REUPLOAD)"),
+        row("c", "i survived 100 days in hardcore minecraft #shorts"),
+    ])
+    assert [r["video_id"] for r in unique] == ["a"]
+    assert {d["video_id"]: d["duplicate_of"] for d in duplicates} == {"b": "a", "c": "a"}
+    assert len(index) == 1
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Beating Hardcore Minecraft Part 1", "Beating Hardcore Minecraft Part 2"),
+    ("Survival Series Episode 12", "Survival Series Episode 13"),
+    ("I Survived 100 Days in Hardcore Minecraft", "I Survived 1000 Days in Hardcore Minecraft"),
+    ("Top 10 Moments of 2023", "Top 10 Moments of 2024"),
+])
+def test_series_titles_are_not_duplicates(index, first, second):
+    unique, duplicates = index.check_and_add([row("a", first), row("b", second)])
+    assert duplicates == []
+    assert len(unique) == 2
+
+
+def test_leading_zeros_do_not_separate_titles():
+    assert title_numbers(normalize_title("Episode 01")) == title_numbers(normalize_title("Episode 1"))
+    assert normalize_title("Re-upload: My Video") == "my video"
+
+
+def test_same_thumbnail_is_a_duplicate(index):
+    thumb = "https://i.ytimg.com/vi/abc/hqdefault.jpg?sqp=signed"
+    unique, duplicates = index.check_and_add([
+        row("a", "Completely different", thumb),
+        row("b", "Nothing alike at all", thumb.split("?")[0]),
+    ])
+    assert [d["duplicate_of"] for d in duplicates] == ["a"]
+
+
+def test_rows_indexed_without_numbers_never_match_by_title(tmp_path):
+    path = str(tmp_path / "dedup.sqlite")
+    index = DuplicateIndex(path)
+    index.add("a", "Hardcore Minecraft Part 1")
+    index._conn.execute("UPDATE items SET numbers = NULL")
+    index._conn.commit()
+    assert index.find_duplicate("b", "Hardcore Minecraft Part 2") is None
+    index.close()
+
+
+def test_replace_with_keeps_rows_added_during_rebuild(tmp_path):
+    path = str(tmp_path / "dedup.sqlite")
+    live = DuplicateIndex(path)
+    live.add("old", "A video that was deleted upstream")
+    staging = DuplicateIndex(path, prefix="rebuild_")
+    started_at = time.time()
+    staging.add("kept", "A video still in the table")
+    live.add("new", "Scouted while maintenance ran")
+    live.replace_with(staging, started_at=started_at)
+    staging.close()
+
+    assert live.find_duplicate("x", "A video still in the table") == ("kept", 1.0)
+    assert live.find_duplicate("x", "Scouted while maintenance ran") == ("new", 1.0)
+    assert live.find_duplicate("x", "A video that was deleted upstream") is None
+    assert len(live) == 2
+    live.close()
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = LocalStorage(str(tmp_path / "scout.sqlite"))
+    storage.upsert("os_outliers", [
+        {"video_id": "v1", "title": "I Survived 100 Days in Hardcore Minecraft", "outlier_score": 5.0,
+         "thumbnail": "https://i.ytimg.com/vi/v1/hqdefault.jpg"},
+        {"video_id": "v2", "title": "I Survived 100 Days in Hardcore Minecraft (Reupload)", "outlier_score": 3.0,
+         "thumbnail": "https://i.ytimg.com/vi/v2/hqdefault.jpg"},
+        {"video_id": "v3", "title": "I Survived 1000 Days in Hardcore Minecraft", "outlier_score": 9.0,
+         "thumbnail": "https://i.ytimg.com/vi/v3/hqdefault.jpg"},
+        {"video_id": "v4", "title": "Beating Minecraft Part 2", "outlier_score": 4.0, "thumbnail": None},
+    ], on_conflict="video_id")
+    yield storage
+    storage.close()
+
+
+def test_maintenance_reports_near_duplicates_without_deleting(storage, tmp_path):
+    path = str(tmp_path / "dedup.sqlite")
+    stats = run_maintenance(storage=storage, index_path=path)
+
+    assert stats["near_duplicates"] == 1
+    assert stats["duplicates_removed"] == 0
+    assert stats["thumbnails_fixed"] == 1
+    assert storage.count("os_outliers") == 4
+
+    # The rebuilt index was swapped in and the scout's handle sees it
+    live = DuplicateIndex(path)
+    assert len(live) == 3
+    assert live.find_duplicate("new", "I Survived 100 Days in Hardcore Minecraft")[0] == "v1"
+    live.close()
+
+
+def test_maintenance_deletes_near_duplicates_when_asked(storage, tmp_path):
+    stats = run_maintenance(storage=storage, index_path=str(tmp_path / "dedup.sqlite"),
+                            delete_near_duplicates=True)
+
+    assert stats["duplicates_removed"] == 1
+    remaining = {r["video_id"] for r in storage.query("os_outliers", "video_id")}
+    assert remaining == {"v1", "v3", "v4"}
+
+
+def test_maintenance_rebuild_is_seen_by_an_open_index(storage, tmp_path):
+    path = str(tmp_path / "dedup.sqlite")
+    scout = DuplicateIndex(path)
+    scout.add("gone", "Deleted from os_outliers long ago")
+
+    run_maintenance(storage=storage, index_path=path)
+
+    assert scout.find_duplicate("x", "Deleted from os_outliers long ago") is None
+    assert scout.find_duplicate("x", "Beating Minecraft Part 2") == ("v4", 1.0)
+    unique, _ = scout.check_and_add([row("v5", "Fresh upload after maintenance")])
+    assert len(unique) == 1
+    scout.close()
+
+
+def test_dry_run_leaves_the_live_index_alone(storage, tmp_path):
+    path = str(tmp_path / "dedup.sqlite")
+    scout = DuplicateIndex(path)
+    scout.add("gone", "Deleted from os_outliers long ago")
+
+    stats = run_maintenance(storage=storage, index_path=path, dry_run=True)
+
+    assert stats["near_duplicates"] == 1
+    assert scout.find_duplicate("x", "Deleted from os_outliers long ago") == ("gone", 1.0)
+    tables = {r[0] for r in scout._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert not any(t.startswith("rebuild_") for t in tables)
+    scout.close()
@@ -0,0 +1,249 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+from innertube import (ChannelLister, ListingUnavailable, channel_info, continuation_contents, extract_json,
+                       extract_ytcfg, initial_grid, parse_ago, parse_items, parse_views, video_record)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "innertube")
+NOW = datetime(2024, 3, 15, 12, 0, tzinfo=timezone.utc)
+
+
+def load(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("text, views", [
+    ("1,234,567 views", 1234567),
+    ("1.2K views", 1200),
+    ("3.4M views", 3400000),
+    ("1.5B views", 1500000000),
+    ("No views", 0),
+    ("", 0),
+    (None, 0),
+])
+def test_parse_views(text, views):
+    assert parse_views(text) == views
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("5 hours ago", "2024-03-15T07:00:00Z"),
+    ("Streamed 3 days ago", "2024-03-12T12:00:00Z"),
+    ("2 weeks ago", "2024-03-01T12:00:00Z"),
+    ("2 months ago", "2024-01-15T12:00:00Z"),
+    ("3 months ago", "2023-12-15T12:00:00Z"),
+    ("1 year ago", "2023-03-15T12:00:00Z"),
+    ("just now", "2024-03-15T12:00:00Z"),
+])
+def test_parse_ago(text, expected):
+    assert parse_ago(text, now=NOW) == expected
+
+
+def test_parse_ago_clamps_month_end():
+    assert parse_ago("1 month ago", now=datetime(2024, 3, 31, tzinfo=timezone.utc)).startswith("2024-02-28")
+
+
+def test_initial_grid_picks_the_selected_tab():
+    contents = initial_grid(load("videos_page.json"))
+    assert len(contents) == 6
+    assert "continuationItemRenderer" in contents[-1]
+
+
+def test_initial_grid_without_a_grid():
+    assert initial_grid(load("no_grid_page.json")) is None
+    assert initial_grid({}) is None
+
+
+def test_video_record_from_video_renderer():
+    item = load("videos_page.json")["contents"]["twoColumnBrowseResultsRenderer"]["tabs"][1]["tabRenderer"][
+        "content"]["richGridRenderer"]["contents"][0]["richItemRenderer"]["content"]
+    assert video_record(item, now=NOW) == {
+        "video_id": "dQw4w9WgXcQ",
+        "title": "Rick Astley - Never Gonna Give You Up (Official Video)",
+        "url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "thumbnail": ("https://i.ytimg.com/vi/dQw4w9WgXcQ/hqdefault.jpg"
+                      "?sqp=-oaymwEcCNACELwBSFXyq4qpAw4IARUAAIhCGAFwAcABBg==&rs=AOn4CLA2"),
+        "views": 1234567,
+        "outlier_score": None,
+        "published_at": "2024-03-01T12:00:00Z",
+        "published_text": "2 weeks ago",
+    }
+
+
+def test_video_record_from_lockup_view_model():
+    item = continuation_contents(load("browse_continuation.json"))[0]["richItemRenderer"]["content"]
+    record = video_record(item, now=NOW)
+    assert record["video_id"] == "lXMskKTw3Bc"
+    assert record["title"] == "Rick Astley - Cry For Help (Official Video)"
+    assert record["views"] == 3400000
+    assert record["published_at"] == "2023-03-15T12:00:00Z"
+    assert record["published_text"] == "1 year ago"
+    assert record["thumbnail"].endswith("rs=AOn4CLC2")  # Largest source
+
+
+def test_video_record_skips_non_videos():
+    assert video_record({}) is None
+    assert video_record({"reelItemRenderer": {"videoId": "short"}}) is None
+    playlist = continuation_contents(load("browse_continuation.json"))[1]["richItemRenderer"]["content"]
+    assert video_record(playlist) is None
+
+
+def test_parse_items_first_page():
+    records, token = parse_items(initial_grid(load("videos_page.json")), now=NOW)
+    assert token == "4qmFsgKrARIYVUN1QVhGa2dzdzFMN3hhQ2ZuZDVKSk93"
+    # The renderer without a videoId and the Shorts shelf are dropped
+    assert [r["video_id"] for r in records] == ["dQw4w9WgXcQ", "yPYZpwSpKmA", "upcoming001"]
+
+    live, upcoming = records[1], records[2]
+    assert live["title"] == "Together Forever (Live)"
+    assert live["views"] == 0
+    assert live["published_at"] == "2024-03-12T12:00:00Z"
+    # Missing thumbnails fall back to the video's own hqdefault; no date without "ago"
+    assert upcoming["thumbnail"] == "https://i.ytimg.com/vi/upcoming001/hqdefault.jpg"
+    assert upcoming["views"] == 12
+    assert upcoming["published_at"] is None
+    assert upcoming["published_text"] is None
+
+
+def test_parse_items_continuation_pages():
+    records, token = parse_items(continuation_contents(load("browse_continuation.json")), now=NOW)
+    assert [r["video_id"] for r in records] == ["lXMskKTw3Bc", "membersOnly1"]
+    assert token.endswith("page3")
+    members = records[1]
+    assert members["title"] == "Members-only: Studio Session"
+    assert members["views"] == 0 and members["published_at"] is None
+    assert members["thumbnail"] == "https://i.ytimg.com/vi/membersOnly1/hqdefault.jpg"
+
+    records, token = parse_items(continuation_contents(load("browse_continuation_last.json")), now=NOW)
+    assert token is None
+    assert records[0]["thumbnail"] == "https://i.ytimg.com/vi/oldest00001/hqdefault.jpg"  # data: URI placeholder
+    assert records[0]["published_at"].startswith("2009-03-15")
+
+
+def test_parse_items_handles_empty_input():
+    assert parse_items(None) == ([], None)
+    assert parse_items([]) == ([], None)
+    assert continuation_contents({}) == []
+    assert continuation_contents({"onResponseReceivedActions": [{"reloadContinuationItemsCommand": {}}]}) == []
+
+
+def test_channel_info():
+    assert channel_info(load("videos_page.json")) == {
+        "name": "Rick Astley",
+        "avatar_url": ("https://yt3.googleusercontent.com/BbWaWU-qyR5nfxxXclxsI8zepppYL5x1agIPGfRdXFm5fPEewDsRSWg"
+                       "=s900-c-k-c0x00ffffff-no-rj"),
+    }
+    assert channel_info(load("no_grid_page.json")) == {"name": "Empty Channel", "avatar_url": ""}
+
+
+def test_extract_json_and_ytcfg_from_page():
+    data = load("videos_page.json")
+    html = ("<html><script>ytcfg.set({\"INNERTUBE_API_KEY\": \"AIzaSyTEST\"});</script>"
+            f"<script>var ytInitialData = {json.dumps(data)};</script>"
+            "<script>ytcfg.set({\"INNERTUBE_CONTEXT\": {\"client\": {\"clientVersion\": \"2.20240314\"}}});</script>")
+    assert extract_json(html, "ytInitialData") == data
+    assert extract_json("<html></html>", "ytInitialData") is None
+    cfg = extract_ytcfg(html)
+    assert cfg["INNERTUBE_API_KEY"] == "AIzaSyTEST"
+    assert cfg["INNERTUBE_CONTEXT"]["client"]["clientVersion"] == "2.20240314"
+
+
+class RecordedLister(ChannelLister):
+    """Serves continuation requests from the fixtures instead of YouTube."""
+
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = pages
+        self.tokens = []
+
+    async def fetch_continuation(self, cfg, token, stats):
+        self.tokens.append(token)
+        stats["requests"] += 1
+        return load(self.pages[len(self.tokens) - 1])
+
+
+def list_channel(pages, **kwargs):
+    async def go():
+        lister = RecordedLister(pages)
+        try:
+            seen = []
+            info, report = await lister.list_channel("https://www.youtube.com/@RickAstleyYT", on_items=seen.extend,
+                                                     first_page=(load("videos_page.json"), {}), **kwargs)
+            return info, report, seen, lister.tokens
+        finally:
+            await lister.close()
+    return asyncio.run(go())
+
+
+def test_list_channel_follows_continuations_to_the_end():
+    info, report, seen, tokens = list_channel(["browse_continuation.json", "browse_continuation_last.json"])
+    assert info["name"] == "Rick Astley"
+    assert tokens == ["4qmFsgKrARIYVUN1QVhGa2dzdzFMN3hhQ2ZuZDVKSk93",
+                      "4qmFsgKrARIYVUN1QVhGa2dzdzFMN3hhQ2ZuZDVKSk93page3"]
+    assert [r["video_id"] for r in seen] == ["dQw4w9WgXcQ", "yPYZpwSpKmA", "upcoming001", "lXMskKTw3Bc",
+                                             "membersOnly1", "oldest00001"]
+    assert report["stop_reason"] == "stable"
+    assert report["scrolls"] == 2
+    assert report["items"] == 6
+
+
+def test_list_channel_stops_at_max_items():
+    _, report, seen, tokens = list_channel(["browse_continuation.json"], max_items=3)
+    assert report["stop_reason"] == "target_count"
+    assert tokens == []
+    assert len(seen) == 3
+
+
+def test_list_channel_stops_at_max_pages():
+    _, report, _, tokens = list_channel(["browse_continuation.json"], max_pages=1)
+    assert report["stop_reason"] == "max_scrolls"
+    assert len(tokens) == 1
+
+
+def test_list_channel_without_a_grid():
+    async def go():
+        lister = ChannelLister()
+        try:
+            return await lister.list_channel("https://www.youtube.com/@empty", first_page=(load("no_grid_page.json"), {}))
+        finally:
+            await lister.close()
+    info, report = asyncio.run(go())
+    assert info["name"] == "Empty Channel"
+    assert report is None
+
+
+def fetch_continuation_body(body):
+    async def go():
+        lister = ChannelLister()
+        await lister.client.aclose()
+        lister.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body)))
+        try:
+            cfg = {"INNERTUBE_API_KEY": "AIzaSyTEST", "INNERTUBE_CONTEXT": {"client": {"clientVersion": "2.20240314"}}}
+            return await lister.fetch_continuation(cfg, "token", {"requests": 0, "bytes": 0})
+        finally:
+            await lister.close()
+    return asyncio.run(go())
+
+
+def test_fetch_continuation_parses_json():
+    with open(os.path.join(FIXTURES, "browse_continuation.json"), "rb") as f:
+        assert fetch_continuation_body(f.read()) == load("browse_continuation.json")
+
+
+@pytest.mark.parametrize("body", ["consent_page.html", "truncated"])
+def test_fetch_continuation_rejects_non_json(body):
+    if body == "truncated":
+        with open(os.path.join(FIXTURES, "browse_continuation.json"), "rb") as f:
+            content = f.read()
+        content = content[:len(content) // 2]
+    else:
+        with open(os.path.join(FIXTURES, body), "rb") as f:
+            content = f.read()
+    with pytest.raises(ListingUnavailable):
+        fetch_continuation_body(content)
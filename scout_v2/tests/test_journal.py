@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+import journal as journal_module
+from journal import Journal, run_with_journal
+from main import new_result
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal_module, "RETRY_BASE_DELAY", 0)
+    journal = Journal(str(tmp_path / "journal.sqlite"))
+    yield journal
+    journal.close()
+
+
+def runner_with_results(*rounds):
+    """A runner whose n-th call finishes every channel with rounds[n]'s status and error."""
+    calls = []
+
+    async def runner(channel_urls, on_progress=None, **options):
+        status, error = rounds[len(calls)]
+        calls.append(list(channel_urls))
+        results = []
+        for url in channel_urls:
+            result = new_result(url)
+            on_progress(url, "running", result)
+            result.update(status=status, error=error, finished_at=1.0)
+            on_progress(url, status, result)
+            results.append(result)
+        return results
+
+    return runner, calls
+
+
+def test_channel_with_a_save_error_is_retried(journal):
+    runner, calls = runner_with_results(("done", "Database Error: timeout"), ("done", None))
+
+    results = asyncio.run(run_with_journal(runner, ["https://youtube.com/@a"], journal=journal, full_rescan=True))
+
+    assert calls == [["https://youtube.com/@a"], ["https://youtube.com/@a"]]
+    assert results[0]["status"] == "done" and results[0]["error"] is None
+    state = journal.channels(1)["https://youtube.com/@a"]
+    assert state["status"] == "done" and state["attempts"] == 2
+
+
+def test_unsaved_channel_never_counts_as_finished(journal):
+    runner, _ = runner_with_results(*[("done", "Database Error: timeout")] * journal_module.MAX_ATTEMPTS)
+    asyncio.run(run_with_journal(runner, ["https://youtube.com/@a"], journal=journal, full_rescan=True))
+
+    assert journal.channels(1)["https://youtube.com/@a"]["status"] == "failed"
+    assert journal.incomplete_batches() == [] and journal.finish_batch(1) == "partial"
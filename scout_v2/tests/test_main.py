@@ -0,0 +1,88 @@
+import asyncio
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import main
+from concurrency import AdaptiveLimiter
+from innertube import ChannelLister
+from snapshots import SnapshotWriter
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "innertube")
+CHANNEL_URL = "https://www.youtube.com/@RickAstleyYT"
+
+
+def load(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class RecordedLister(ChannelLister):
+    """The channel's /videos page and continuations come from the fixtures."""
+
+    async def fetch_first_page(self, channel_url, stats):
+        stats["requests"] += 1
+        return load("videos_page.json"), {}
+
+    async def fetch_continuation(self, cfg, token, stats):
+        stats["requests"] += 1
+        return load("browse_continuation_last.json")
+
+
+class Writer:
+    def __init__(self):
+        self.outliers = []
+
+    def add_channel(self, row):
+        future = asyncio.get_running_loop().create_future()
+        future.set_result("channel-1")
+        return future
+
+    def add_outliers(self, rows, channel_id=None):
+        self.outliers.extend(rows)
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(len(rows))
+        return future
+
+
+@pytest.fixture(autouse=True)
+def no_dedupe(monkeypatch):
+    monkeypatch.setattr(main, "get_index", lambda: None)
+
+
+def process(snapshot_writer):
+    async def go():
+        lister = RecordedLister()
+        try:
+            result = await main.process_channel(None, Writer(), CHANNEL_URL, 0, 1, AdaptiveLimiter(),
+                                                full_rescan=True, snapshot_writer=snapshot_writer,
+                                                lister=lister)
+            await snapshot_writer.close()
+            return result
+        finally:
+            await lister.close()
+    return asyncio.run(go())
+
+
+def test_process_channel_writes_snapshots(tmp_path):
+    result = process(SnapshotWriter(root=str(tmp_path)))
+
+    assert result["status"] == "done"
+    assert result["error"] is None and result["snapshot_error"] is None
+    frame = pd.read_parquet(tmp_path)
+    assert len(frame) == result["videos_seen"] > 0
+    assert frame["scraped_at"].notna().all()
+
+
+def test_snapshot_failure_does_not_fail_the_channel(tmp_path):
+    class BrokenWriter(SnapshotWriter):
+        async def add(self, channel_url, videos, scraped_at=None):
+            raise OSError("disk full")
+
+    result = process(BrokenWriter(root=str(tmp_path)))
+
+    assert result["status"] == "done"
+    assert result["error"] is None
+    assert result["snapshot_error"] == "disk full"
@@ -0,0 +1,49 @@
+import pytest
+
+from outlier_index import OutlierIndex, load_from_storage
+from storage import LocalStorage
+
+
+class NoAvatarStorage(LocalStorage):
+    """A database created from setup_database.sql, whose os_channels has no avatar_url."""
+
+    def query(self, table, columns="*", *args, **kwargs):
+        if table == "os_channels" and "avatar_url" in columns:
+            raise ValueError("column os_channels.avatar_url does not exist")
+        return super().query(table, columns, *args, **kwargs)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    seed = LocalStorage(str(tmp_path / "scout.sqlite"))
+    [channel] = seed.upsert("os_channels", [{"url": "https://youtube.com/@a", "name": "A"}], on_conflict="url")
+    seed.upsert("os_outliers", [{"video_id": "v1", "title": "Video", "outlier_score": 3.0,
+                                 "channel_id": channel["id"]}], on_conflict="video_id")
+    seed.close()
+    storage = NoAvatarStorage(str(tmp_path / "scout.sqlite"))
+    yield storage
+    storage.close()
+
+
+def test_loads_without_avatar_url(storage):
+    outliers, channels = load_from_storage(storage)
+
+    assert [row["video_id"] for row in outliers] == ["v1"]
+    assert [row["name"] for row in channels] == ["A"]
+
+
+def test_index_serves_queries_without_avatar_url(storage):
+    index = OutlierIndex(loader=lambda: load_from_storage(storage))
+
+    assert index.reload()
+    page = index.query()
+    assert [(row["video_id"], row["os_channels"]["name"]) for row in page["items"]] == [("v1", "A")]
+
+
+def test_other_errors_still_raise(storage, monkeypatch):
+    def broken(*args, **kwargs):
+        raise ConnectionError("connection reset")
+
+    monkeypatch.setattr(storage, "query", broken)
+    with pytest.raises(ConnectionError):
+        load_from_storage(storage)
@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+import sharded
+from main import new_result
+from metrics import REGISTRY
+
+
+class FakeShard:
+    """A shard process that finishes every channel it is handed, speaking the JSON-lines protocol."""
+
+    def __init__(self):
+        self.pid = 4242
+        self.stdout = asyncio.StreamReader()
+        self.stdin = self
+        self._send({"type": "want"})
+
+    def _send(self, message):
+        self.stdout.feed_data((json.dumps(message) + "\n").encode())
+
+    def write(self, data):
+        reply = json.loads(data)
+        if reply.get("stop"):
+            self.stdout.feed_eof()
+            return
+        result = new_result(reply["url"])
+        result.update(status="done", finished_at=1.0, duration=2.5, videos_seen=30,
+                      scroll={"scrolls": 4, "stop_reason": "end"}, timings={"scrape": 2.0})
+        self._send({"type": "progress", "url": reply["url"], "status": "done", "result": result})
+        self._send({"type": "want"})
+
+    async def drain(self):
+        pass
+
+    def is_closing(self):
+        return False
+
+    def close(self):
+        pass
+
+    async def wait(self):
+        return 0
+
+
+def test_coordinator_records_shard_channels(monkeypatch):
+    def counters():
+        summary = REGISTRY.summary()
+        return (summary["counters"].get('scout_channels_total{status="done"}', 0),
+                summary["counters"].get("scout_scrolls_total", 0),
+                summary["timings"].get('scout_stage_seconds{stage="scrape"}', {}).get("count", 0))
+
+    async def spawn(*args, **kwargs):
+        return FakeShard()
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", spawn)
+    before = counters()
+    results = asyncio.run(sharded.run_sharded(["https://youtube.com/@a", "https://youtube.com/@b"], shards=1))
+
+    assert [r["status"] for r in results] == ["done", "done"]
+    assert [a - b for a, b in zip(counters(), before)] == [2, 8, 2]
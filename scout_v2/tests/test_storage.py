@@ -0,0 +1,121 @@
+import pytest
+
+from main import load_watermark
+from storage import LocalStorage, sync_upstream
+
+
+@pytest.fixture
+def local(tmp_path):
+    local = LocalStorage(str(tmp_path / "scout.sqlite"))
+    yield local
+    local.close()
+
+
+class Remote:
+    """Records what sync_upstream sends, in order."""
+
+    def __init__(self, lost_urls=(), columns=None):
+        self.calls = []
+        self.lost_urls = set(lost_urls)  # Channels whose upsert comes back without a row
+        self.columns = columns
+
+    def upsert(self, table, rows, on_conflict):
+        assert len({tuple(row) for row in rows}) == 1, "PostgREST needs the same keys on every row"
+        if self.columns and set(rows[0]) - set(self.columns[table]):
+            raise ValueError(f"column {table}.{(set(rows[0]) - set(self.columns[table])).pop()} does not exist")
+        self.calls.append(("upsert", table, rows))
+        if table == "os_channels":
+            return [dict(row, id=row.get("id") or f"remote-{row['url']}") for row in rows
+                    if row["url"] not in self.lost_urls]
+        return rows
+
+    def delete(self, table, column, values):
+        self.calls.append(("delete", table, list(values)))
+        return len(values)
+
+
+def test_reinserted_row_is_not_deleted_upstream(local):
+    local.upsert("os_outliers", [{"video_id": "v1", "title": "First"}], on_conflict="video_id")
+    local.delete("os_outliers", "video_id", ["v1", "v2"])
+    local.upsert("os_outliers", [{"video_id": "v1", "title": "Back again"}], on_conflict="video_id")
+
+    remote = Remote()
+    stats = sync_upstream(local, remote)
+
+    assert [c for c in remote.calls if c[0] == "delete"] == [("delete", "os_outliers", ["v2"])]
+    assert remote.calls[0][0] == "delete"  # Deletes go before upserts
+    assert stats["deleted"] == 1
+    assert local.pending_deletes() == []
+
+
+def test_cleared_values_are_sent_as_nulls(local):
+    local.upsert("os_outliers", [{"video_id": "v1", "title": "Title", "thumbnail": "t.jpg"}], on_conflict="video_id")
+    sync_upstream(local, Remote())
+    local.update("os_outliers", {"thumbnail": None}, [("video_id", "eq", "v1")])
+
+    remote = Remote()
+    sync_upstream(local, remote)
+
+    (_, table, rows), = remote.calls
+    assert table == "os_outliers"
+    assert "thumbnail" in rows[0] and rows[0]["thumbnail"] is None
+    assert rows[0]["title"] == "Title"
+
+
+def test_watermark_reads_every_page(local, monkeypatch):
+    [channel] = local.upsert("os_channels", [{"url": "https://youtube.com/@a", "name": "A",
+                                               "last_scouted": "2026-01-01T00:00:00+00:00"}], on_conflict="url")
+    local.upsert("os_outliers", [{"video_id": f"v{i:04d}", "channel_id": channel["id"], "views": i}
+                                 for i in range(2500)], on_conflict="video_id")
+    queries = []
+    query = local.query
+    monkeypatch.setattr(local, "query", lambda *a, **kw: queries.append(kw.get("limit")) or query(*a, **kw))
+
+    watermark = load_watermark(local, "https://youtube.com/@a")
+
+    assert len(watermark["known"]) == 2500
+    assert None not in queries[1:]  # Every outlier read is bounded
+
+
+def test_insert_defaults_are_stamped_not_nulled(local):
+    local.upsert("os_outliers", [{"video_id": "v1", "title": "New"}], on_conflict="video_id")
+    local.upsert("os_outliers", [{"video_id": "v2", "title": "Old"}], on_conflict="video_id")
+    local.update("os_outliers", {"scouted_at": None}, [("video_id", "eq", "v2")])  # A row from before stamping
+
+    remote = Remote()
+    sync_upstream(local, remote)
+
+    rows = {row["video_id"]: row for _, _, batch in remote.calls for row in batch}
+    assert rows["v1"]["scouted_at"]
+    assert "scouted_at" not in rows["v2"]  # Supabase's default applies instead of a null
+    assert rows["v2"]["thumbnail"] is None
+
+
+def test_deferred_page_does_not_strand_later_rows(local):
+    local.upsert("os_channels", [{"url": "https://youtube.com/@lost", "name": "Lost"},
+                                 {"url": "https://youtube.com/@ok", "name": "Ok"}], on_conflict="url")
+    ids = {row["url"]: row["id"] for row in local.query("os_channels", "id, url")}
+    local.upsert("os_outliers", [{"video_id": f"lost{i}", "channel_id": ids["https://youtube.com/@lost"]}
+                                 for i in range(3)], on_conflict="video_id")
+    local.upsert("os_outliers", [{"video_id": f"ok{i}", "channel_id": ids["https://youtube.com/@ok"]}
+                                 for i in range(3)], on_conflict="video_id")
+
+    remote = Remote(lost_urls={"https://youtube.com/@lost"})
+    stats = sync_upstream(local, remote, batch_rows=2)
+
+    pushed = [row["video_id"] for _, table, rows in remote.calls if table == "os_outliers" for row in rows]
+    assert pushed == ["ok0", "ok1", "ok2"]
+    assert stats["deferred"] == 3 and stats["outliers"] == 3
+    assert local.backlog()["os_outliers"] == 3
+
+
+def test_channels_sync_without_upstream_avatar_url(local):
+    local.upsert("os_channels", [{"url": "https://youtube.com/@a", "name": "A", "avatar_url": "a.jpg"}],
+                 on_conflict="url")
+
+    remote = Remote(columns={"os_channels": ("id", "url", "name", "last_scouted", "created_at")})
+    stats = sync_upstream(local, remote)
+
+    (_, _, [row]), = remote.calls
+    assert row["name"] == "A" and "avatar_url" not in row
+    assert stats["channels"] == 1 and local.backlog()["os_channels"] == 0
@@ -0,0 +1,99 @@
+import io
+import threading
+import time
+
+import httpx
+import pytest
+from PIL import Image
+
+from thumbnails import ThumbnailCache, ThumbnailNotFound, ThumbnailUnavailable
+
+VIDEO_ID = "dQw4w9WgXcQ"
+
+
+def jpeg(width=480, height=360):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(out, "JPEG")
+    return out.getvalue()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ThumbnailCache(root=str(tmp_path / "thumbs"))
+    yield cache
+    cache.close()
+
+
+def serve(cache, handler):
+    cache._client = httpx.Client(transport=httpx.MockTransport(handler))
+
+
+def concurrent_sources(cache, handler, followers=3):
+    """Run one leader and several followers for the same video; return what each got."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow(request):
+        started.set()
+        release.wait(5)
+        return handler(request)
+
+    serve(cache, slow)
+    outcomes = [None] * (followers + 1)
+
+    def fetch(i):
+        try:
+            outcomes[i] = cache.source(VIDEO_ID)
+        except Exception as e:
+            outcomes[i] = e
+
+    leader = threading.Thread(target=fetch, args=(0,))
+    leader.start()
+    started.wait(5)
+    threads = [threading.Thread(target=fetch, args=(i,)) for i in range(1, followers + 1)]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)  # Let the followers block on the leader's download
+    release.set()
+    for t in [leader] + threads:
+        t.join(5)
+    return outcomes
+
+
+def test_followers_share_the_leaders_download(cache):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(200, content=jpeg())
+
+    outcomes = concurrent_sources(cache, handler)
+    assert len(set(outcomes)) == 1 and isinstance(outcomes[0], str)
+    assert len(calls) == 1
+    assert cache.snapshot()["downloads"] == 1
+
+
+def test_followers_get_not_found_when_the_leader_does(cache):
+    outcomes = concurrent_sources(cache, lambda request: httpx.Response(404))
+    assert all(isinstance(o, ThumbnailNotFound) for o in outcomes)
+
+
+def test_followers_see_network_errors_as_unavailable(cache):
+    def handler(request):
+        raise httpx.ConnectError("unreachable", request=request)
+
+    leader, *followers = concurrent_sources(cache, handler)
+    assert isinstance(leader, httpx.ConnectError)
+    # Not a 404: the server redirects these to the CDN like the leader's request
+    assert followers and all(isinstance(o, ThumbnailUnavailable) for o in followers)
+
+
+def test_get_builds_a_16_9_webp(cache):
+    serve(cache, lambda request: httpx.Response(200, content=jpeg()))
+    data, etag = cache.get(VIDEO_ID, 300)
+    with Image.open(io.BytesIO(data)) as image:
+        assert image.format == "WEBP"
+        assert image.size == (320, 180)
+    assert cache.etag(VIDEO_ID, 300) == etag
+    assert cache.get(VIDEO_ID, 320)[0] == data
+    assert cache.snapshot()["hits"] == 1
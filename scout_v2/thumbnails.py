@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Thumbnail cache and resizing proxy.
+
+The dashboard used to load full-size hqdefault.jpg files straight from
+i.ytimg.com on every page view. server.py now serves them from here instead:
+
+    GET /thumbnails/<video_id>?w=320   -> WebP, ETag, long-lived Cache-Control
+
+The original JPEG is always fetched from the canonical
+i.ytimg.com/vi/<id>/hqdefault.jpg URL, never from a stored (possibly signed,
+possibly expired) URL. It is stored once under its SHA-256, so re-uploads
+with an identical thumbnail share one file. WebP variants are only made at
+a few fixed widths, with hqdefault's letterbox bars cropped to 16:9.
+A SQLite index keeps the video -> digest mapping and each file's size and
+last access, and evicts least-recently-used files once the cache grows
+past SCOUT_THUMB_CACHE_MB.
+
+prefetch() warms the cache for many videos with bounded concurrency;
+the server runs it for every batch's outliers and on POST /thumbnails/prefetch.
+
+Usage:
+    python thumbnails.py warm [--limit 5000]   # Prefetch every stored outlier
+    python thumbnails.py stats
+    python thumbnails.py evict
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from PIL import Image
+
+THUMB_DIR = os.environ.get("SCOUT_THUMB_DIR", os.path.abspath("./data/thumbnails"))
+MAX_BYTES = int(float(os.environ.get("SCOUT_THUMB_CACHE_MB", 512)) * 1024 * 1024)
+CONCURRENCY = int(os.environ.get("SCOUT_THUMB_CONCURRENCY", 8))
+SOURCE_TTL_DAYS = float(os.environ.get("SCOUT_THUMB_TTL_DAYS", 7))  # Creators do swap thumbnails
+WIDTHS = (120, 240, 320, 480)  # Only these are generated; other requests snap to the next one up
+DEFAULT_WIDTH = 320
+WEBP_QUALITY = 75
+MAX_PREFETCH = 5000  # Video ids per POST /thumbnails/prefetch
+EVICT_TO = 0.9  # Eviction trims down to this fraction of MAX_BYTES
+TOUCH_INTERVAL = 60  # Seconds between last_access writes for the same file
+
+SOURCE_URL = "https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+
+
+class ThumbnailNotFound(Exception):
+    """YouTube has no thumbnail for this video (deleted, private or bad id)."""
+
+
+class ThumbnailUnavailable(Exception):
+    """The thumbnail couldn't be fetched right now (network error, timeout); the CDN may still have it."""
+
+
+def snap_width(width):
+    """Smallest pre-defined width >= width, so arbitrary ?w= can't fill the cache."""
+    try:
+        width = int(width)
+    except (TypeError, ValueError):
+        return DEFAULT_WIDTH
+    return next((w for w in WIDTHS if w >= width), WIDTHS[-1])
+
+
+def make_variant(data, width):
+    """JPEG bytes -> 16:9 WebP bytes `width` px wide."""
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGB")
+        w, h = image.size
+        # hqdefault is 4:3 with black bars above and below a 16:9 frame
+        target_h = round(w * 9 / 16)
+        if h > target_h:
+            top = (h - target_h) // 2
+            image = image.crop((0, top, w, top + target_h))
+        if w > width:
+            image = image.resize((width, round(width * 9 / 16)), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, "WEBP", quality=WEBP_QUALITY, method=4)
+        return out.getvalue()
+
+
+class ThumbnailCache:
+    def __init__(self, root=THUMB_DIR, max_bytes=MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS sources (
+                video_id TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                fetched_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                last_access REAL
+            );
+            CREATE INDEX IF NOT EXISTS files_lru ON files (last_access);
+        """)
+        self._total = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM files").fetchone()[0]
+        self._touched = {}
+        # One download per video at a time, however many requests want it: video_id -> (event, outcome)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._client = httpx.Client(timeout=15, follow_redirects=True,
+                                    limits=httpx.Limits(max_connections=CONCURRENCY * 2))
+        self.stats = {"hits": 0, "misses": 0, "downloads": 0, "not_found": 0, "evicted": 0, "errors": 0}
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def close(self):
+        self._client.close()
+        with self._lock:
+            self._conn.close()
+
+    # --- Index -----------------------------------------------------------------
+
+    def _source_digest(self, video_id):
+        with self._lock:
+            row = self._conn.execute("SELECT digest, fetched_at FROM sources WHERE video_id = ?",
+                                     (video_id,)).fetchone()
+        if not row or time.time() - (row["fetched_at"] or 0) > SOURCE_TTL_DAYS * 86400:
+            return None
+        return row["digest"]
+
+    def _record(self, rel_path, digest, size):
+        now = time.time()
+        with self._lock, self._conn:
+            old = self._conn.execute("SELECT bytes FROM files WHERE path = ?", (rel_path,)).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO files (path, digest, bytes, last_access) VALUES (?, ?, ?, ?)",
+                               (rel_path, digest, size, now))
+            self._total += size - (old["bytes"] if old else 0)
+        self._touched[rel_path] = now
+
+    def _touch(self, rel_path):
+        now = time.time()
+        if now - self._touched.get(rel_path, 0) < TOUCH_INTERVAL:
+            return
+        self._touched[rel_path] = now
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE files SET last_access = ? WHERE path = ?", (now, rel_path))
+
+    def _write(self, rel_path, data):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _source_path(digest):
+        return os.path.join("src", digest[:2], f"{digest}.jpg")
+
+    @staticmethod
+    def _variant_path(digest, width):
+        return os.path.join("webp", digest[:2], f"{digest}-{width}.webp")
+
+    # --- Fetching ----------------------------------------------------------------
+
+    def _download(self, video_id):
+        response = self._client.get(SOURCE_URL.format(video_id=video_id))
+        if response.status_code == 404:
+            raise ThumbnailNotFound(video_id)
+        response.raise_for_status()
+        data = response.content
+        digest = hashlib.sha256(data).hexdigest()
+        rel_path = self._source_path(digest)
+        if not os.path.exists(os.path.join(self.root, rel_path)):
+            self._write(rel_path, data)
+            self._record(rel_path, digest, len(data))
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO sources (video_id, digest, fetched_at) VALUES (?, ?, ?)",
+                               (video_id, digest, time.time()))
+        self._count("downloads")
+        return digest
+
+    def source(self, video_id):
+        """Digest of the video's original thumbnail, downloading it if needed. Blocking."""
+        digest = self._source_digest(video_id)
+        if digest and os.path.exists(os.path.join(self.root, self._source_path(digest))):
+            return digest
+        with self._inflight_lock:
+            flight = self._inflight.get(video_id)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[video_id] = (threading.Event(), {})
+        event, outcome = flight
+        if not leader:
+            # Followers end the same way the leader did: found, 404, or unavailable (-> CDN redirect)
+            if not event.wait(timeout=30):
+                raise ThumbnailUnavailable(f"{video_id}: timed out waiting for the download")
+            error = outcome.get("error")
+            if isinstance(error, ThumbnailNotFound):
+                raise ThumbnailNotFound(video_id)
+            if error is not None:
+                raise ThumbnailUnavailable(f"{video_id}: {error}")
+            return outcome["digest"]
+        try:
+            outcome["digest"] = self._download(video_id)
+            return outcome["digest"]
+        except ThumbnailNotFound as e:
+            outcome["error"] = e
+            self._count("not_found")
+            raise
+        except Exception as e:
+            outcome["error"] = e
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(video_id, None)
+            event.set()
+
+    def get(self, video_id, width=DEFAULT_WIDTH):
+        """(webp_bytes, etag) for one video at a snapped width. Blocking."""
+        if not VIDEO_ID_RE.match(video_id or ""):
+            raise ThumbnailNotFound(video_id)
+        width = snap_width(width)
+        digest = self.source(video_id)
+        rel_path = self._variant_path(digest, width)
+        path = os.path.join(self.root, rel_path)
+        etag = f'"{digest[:20]}-{width}"'
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            self._count("hits")
+            self._touch(rel_path)
+            return data, etag
+        except FileNotFoundError:
+            pass
+        self._count("misses")
+        try:
+            with open(os.path.join(self.root, self._source_path(digest)), "rb") as f:
+                source = f.read()
+        except FileNotFoundError:
+            # Evicted between lookup and read
+            digest = self._download(video_id)
+            with open(os.path.join(self.root, self._source_path(digest)), "rb") as f:
+                source = f.read()
+            rel_path, etag = self._variant_path(digest, width), f'"{digest[:20]}-{width}"'
+        data = make_variant(source, width)
+        self._write(rel_path, data)
+        self._record(rel_path, digest, len(data))
+        if self._total > self.max_bytes:
+            self.evict()
+        return data, etag
+
+    def etag(self, video_id, width=DEFAULT_WIDTH):
+        """ETag of a cached variant without reading it, or None; lets 304s skip the disk."""
+        digest = self._source_digest(video_id)
+        return f'"{digest[:20]}-{snap_width(width)}"' if digest else None
+
+    def prefetch(self, video_ids, widths=(DEFAULT_WIDTH,)):
+        """Warm the cache for many videos, CONCURRENCY downloads at a time. Blocking."""
+        video_ids = [v for v in dict.fromkeys(video_ids) if v and VIDEO_ID_RE.match(v)]
+        counts = {"requested": len(video_ids), "ok": 0, "not_found": 0, "errors": 0}
+
+        def warm(video_id):
+            try:
+                for width in widths:
+                    self.get(video_id, width)
+                counts["ok"] += 1
+            except ThumbnailNotFound:
+                counts["not_found"] += 1
+            except Exception as e:
+                counts["errors"] += 1
+                self._count("errors")
+                print(f"⚠️ Thumbnail {video_id}: {e}")
+
+        t0 = time.time()
+        with ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix="thumbs") as pool:
+            list(pool.map(warm, video_ids))
+        counts["seconds"] = round(time.time() - t0, 2)
+        return counts
+
+    # --- Eviction ----------------------------------------------------------------
+
+    def evict(self, target=None):
+        """Delete least-recently-used files until the cache is under target bytes."""
+        target = self.max_bytes * EVICT_TO if target is None else target
+        removed = 0
+        with self._lock, self._conn:
+            rows = self._conn.execute("SELECT path, digest, bytes FROM files ORDER BY last_access").fetchall()
+            for row in rows:
+                if self._total <= target:
+                    break
+                try:
+                    os.remove(os.path.join(self.root, row["path"]))
+                except FileNotFoundError:
+                    pass
+                self._conn.execute("DELETE FROM files WHERE path = ?", (row["path"],))
+                if row["path"] == self._source_path(row["digest"]):
+                    # Without the original, variants can't be rebuilt; refetch next time
+                    self._conn.execute("DELETE FROM sources WHERE digest = ?", (row["digest"],))
+                self._touched.pop(row["path"], None)
+                self._total -= row["bytes"]
+                removed += 1
+        self._count("evicted", removed)
+        return removed
+
+    def snapshot(self):
+        with self._lock:
+            files, videos = self._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM files), (SELECT COUNT(*) FROM sources)").fetchone()
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return dict(stats, files=files, videos=videos, bytes=self._total, max_bytes=self.max_bytes)
+
+
+async def run_and_prefetch(runner, channel_urls, on_progress=None, cache=None, **options):
+    """
+    Call runner(channel_urls, on_progress=..., **options) and warm the cache
+    with each channel's outliers as soon as that channel finishes, on a
+    background thread, so the dashboard's first load is already local.
+    """
+    cache = cache or get_cache()
+
+    def progress(url, status, result):
+        video_ids = [o.get("video_id") for o in result.get("outliers") or []]
+        if result.get("finished_at") and video_ids:
+            _prefetcher.submit(cache.prefetch, video_ids)
+        if on_progress:
+            on_progress(url, status, result)
+
+    return await runner(channel_urls, on_progress=progress, **options)
+
+
+def outlier_video_ids(storage, limit=None, page_size=1000):
+    """Every outlier's video_id, newest first."""
+    ids = []
+    offset = 0
+    while limit is None or len(ids) < limit:
+        rows = storage.query("os_outliers", "video_id", order="published_at", desc=True, limit=page_size,
+                             offset=offset)
+        ids.extend(row["video_id"] for row in rows if row.get("video_id"))
+        if len(rows) < page_size:
+            break
+        offset += page_size
+    return ids[:limit] if limit else ids
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumb-prefetch")  # One batch at a time
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ThumbnailCache()
+        return _cache
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local thumbnail cache")
+    parser.add_argument("command", choices=["warm", "stats", "evict"])
+    parser.add_argument("--limit", type=int, help="Only the newest N outliers")
+    args = parser.parse_args()
+
+    cache = get_cache()
+    if args.command == "warm":
+        from storage import get_storage
+        video_ids = outlier_video_ids(get_storage(), limit=args.limit)
+        print(f"🖼️ Warming {len(video_ids)} thumbnails ({CONCURRENCY} at a time)")
+        print(cache.prefetch(video_ids))
+    elif args.command == "evict":
+        print(f"🧹 Evicted {cache.evict()} files")
+    print(cache.snapshot())
+    cache.close()
@@ -0,0 +1,223 @@
+"""
+Long-lived transcript worker.
+
+Keeps youtube_transcript_api imported once, fetches batches of videos
+concurrently on a bounded thread pool, and caches formatted transcripts in a
+compressed, content-addressed on-disk store with an in-memory LRU in front,
+so repeat lookups never leave the process.
+
+Usage:
+    python scripts/transcript_service.py --stdin
+        Read JSONL from stdin ({"video_id": "..."} or {"video_ids": [...]}),
+        write one JSON line per video as soon as it's ready.
+    python scripts/transcript_service.py --http [--port 5055]
+        GET  /transcript/<video_id>  -> {"transcript": "..."} (same shape as get_transcript.py)
+        POST /transcripts {"video_ids": [...]} -> NDJSON, one line per video
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CACHE_DIR = os.environ.get(
+    "TRANSCRIPT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".transcript_cache")
+)
+MAX_WORKERS = int(os.environ.get("TRANSCRIPT_WORKERS", 8))
+LRU_SIZE = int(os.environ.get("TRANSCRIPT_LRU_SIZE", 512))
+DEFAULT_PORT = int(os.environ.get("TRANSCRIPT_SERVICE_PORT", 5055))
+
+
+def format_transcript(entries):
+    """[M:SS] text lines, same format get_transcript.py has always produced."""
+    def lines():
+        for entry in entries:
+            # Handle object or dict
+            if hasattr(entry, 'start'):
+                start, text = entry.start, entry.text
+            else:
+                start, text = entry.get('start'), entry.get('text')
+            if start is not None and text:
+                start = float(start)
+                yield f"[{int(start // 60)}:{int(start % 60):02d}] {text}"
+    return "\n".join(lines())
+
+
+def fetch_entries(video_id):
+    from youtube_transcript_api import YouTubeTranscriptApi
+    try:
+        # Try instantiating (newer API)
+        return YouTubeTranscriptApi().fetch(video_id)
+    except AttributeError:
+        return YouTubeTranscriptApi.get_transcript(video_id)
+
+
+class TranscriptCache:
+    """
+    objects/<sha[:2]>/<sha>.gz holds each distinct transcript once;
+    refs/<video_id> holds the sha it maps to.
+    """
+
+    def __init__(self, root=CACHE_DIR, lru_size=LRU_SIZE):
+        self.root = root
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "refs"), exist_ok=True)
+
+    def _ref_path(self, video_id):
+        safe = "".join(c for c in video_id if c.isalnum() or c in "-_")
+        return os.path.join(self.root, "refs", safe)
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest + ".gz")
+
+    def _remember(self, video_id, transcript):
+        with self._lock:
+            self._lru[video_id] = transcript
+            self._lru.move_to_end(video_id)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def get(self, video_id):
+        with self._lock:
+            if video_id in self._lru:
+                self._lru.move_to_end(video_id)
+                return self._lru[video_id]
+        try:
+            with open(self._ref_path(video_id)) as f:
+                digest = f.read().strip()
+            with gzip.open(self._object_path(digest), "rt", encoding="utf-8") as f:
+                transcript = f.read()
+        except (OSError, EOFError):
+            return None
+        self._remember(video_id, transcript)
+        return transcript
+
+    def put(self, video_id, transcript):
+        data = transcript.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        tmp = f"{self._ref_path(video_id)}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(digest)
+        os.replace(tmp, self._ref_path(video_id))
+        self._remember(video_id, transcript)
+
+
+class TranscriptService:
+    def __init__(self, cache=None, max_workers=MAX_WORKERS):
+        self.cache = cache or TranscriptCache()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="transcript")
+
+    def get(self, video_id):
+        """{"video_id", "transcript", "cached"} or {"video_id", "error"}."""
+        cached = self.cache.get(video_id)
+        if cached is not None:
+            return {"video_id": video_id, "transcript": cached, "cached": True}
+        try:
+            entries = fetch_entries(video_id)
+        except Exception as e:
+            return {"video_id": video_id, "error": f"Failed: {str(e)}"}
+        try:
+            transcript = format_transcript(entries)
+        except Exception as e:
+            return {"video_id": video_id, "error": f"Formatting failed: {str(e)}"}
+        self.cache.put(video_id, transcript)
+        return {"video_id": video_id, "transcript": transcript, "cached": False}
+
+    def get_many(self, video_ids):
+        """Yield results as they complete; cache hits come back first."""
+        pending = []
+        for video_id in dict.fromkeys(video_ids):
+            cached = self.cache.get(video_id)
+            if cached is not None:
+                yield {"video_id": video_id, "transcript": cached, "cached": True}
+            else:
+                pending.append(self.pool.submit(self.get, video_id))
+        for future in as_completed(pending):
+            yield future.result()
+
+
+def serve_stdin(service):
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = {"video_id": line}  # Bare ids are fine too
+        video_ids = request.get("video_ids") or [request.get("video_id")]
+        for result in service.get_many([v for v in video_ids if v]):
+            sys.stdout.write(json.dumps(result) + "\n")
+            sys.stdout.flush()
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                return self._json(200, {"status": "running"})
+            if not self.path.startswith("/transcript/"):
+                return self._json(404, {"error": "Not found"})
+            result = service.get(self.path[len("/transcript/"):].split("?")[0])
+            self._json(200 if "transcript" in result else 502, result)
+
+        def do_POST(self):
+            if self.path != "/transcripts":
+                return self._json(404, {"error": "Not found"})
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                video_ids = json.loads(self.rfile.read(length) or b"{}").get("video_ids") or []
+            except ValueError:
+                return self._json(400, {"error": "Invalid JSON"})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            for result in service.get_many(video_ids):
+                self.wfile.write((json.dumps(result) + "\n").encode())
+                self.wfile.flush()
+            self.close_connection = True
+
+        def log_message(self, fmt, *args):
+            pass  # Keep stdout quiet; this runs next to the dev server
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Persistent batch transcript service")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--stdin", action="store_true", help="Read JSONL requests from stdin")
+    mode.add_argument("--http", action="store_true", help="Serve a local HTTP endpoint")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    service = TranscriptService()
+    if args.stdin:
+        serve_stdin(service)
+    else:
+        print(f"📝 Transcript service on http://127.0.0.1:{args.port}", file=sys.stderr)
+        ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(service)).serve_forever()
@@ -2,6 +2,42 @@ import React, { useState, useEffect, useRef } from 'react';
 import { supabase } from '../../supabaseClient';
 import { Search, Filter, RefreshCw, Trash2, ExternalLink, Database, Eye, Calendar, User } from 'lucide-react';
 
+const SCOUT_API_URL = import.meta.env.VITE_SCOUT_API_URL || 'http://localhost:5000';
+const PLACEHOLDER_THUMBNAIL = 'https://placehold.co/1280x720/0a0a0a/ff982b?text=No+Thumbnail';
+
+// Served as WebP from the scout's thumbnail cache; YouTube's CDN is only the fallback
+const thumbnailSrc = (video) => video.video_id
+    ? `${SCOUT_API_URL}/thumbnails/${video.video_id}?w=480`
+    : (video.thumbnail || video.thumbnail_url || '/assets/placeholder.svg');
+
+const handleThumbnailError = (e, video) => {
+    const img = e.target;
+    if (!img.dataset.fallback && video.video_id) {
+        img.dataset.fallback = 'cdn';
+        const stored = video.thumbnail && !video.thumbnail.startsWith('data:image') ? video.thumbnail : null;
+        img.src = stored || `https://i.ytimg.com/vi/${video.video_id}/hqdefault.jpg`;
+    } else if (img.dataset.fallback !== 'placeholder') {
+        img.dataset.fallback = 'placeholder';
+        img.src = PLACEHOLDER_THUMBNAIL;
+    }
+};
+
+// Calls onEvent for each JSON line of a streamed response body until it ends
+const readNdjson = async (response, onEvent) => {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => onEvent(JSON.parse(line)));
+    }
+    if (buffer.trim()) onEvent(JSON.parse(buffer));
+};
+
 const OutlierGallery = ({ isPublic = false }) => {
     const [outliers, setOutliers] = useState([]);
     const [search, setSearch] = useState('');
@@ -14,6 +50,7 @@ const OutlierGallery = ({ isPublic = false }) => {
     const [loading, setLoading] = useState(true);
     const [page, setPage] = useState(0);
     const [hasMore, setHasMore] = useState(true);
+    const [cursor, setCursor] = useState(null);
     const [debugError, setDebugError] = useState(null);
     const [viewRange, setViewRange] = useState({ min: '', max: '' });
     const [scoutingStatus, setScoutingStatus] = useState('');
@@ -21,64 +58,87 @@ const OutlierGallery = ({ isPublic = false }) => {
     const observerTarget = useRef(null);
     const PAGE_SIZE = 24;
 
-    const fetchOutliers = async (isLoadMore = false) => {
-        if (!isLoadMore) setLoading(true);
+    // Served from the scout's in-memory index (GET /outliers), paged by cursor
+    const fetchFromScout = async (isLoadMore) => {
+        const params = new URLSearchParams({ sort: sortBy, limit: PAGE_SIZE, minScore });
+        if (search) params.set('search', search);
+        if (viewRange.min) params.set('minViews', parseInt(viewRange.min));
+        if (viewRange.max) params.set('maxViews', parseInt(viewRange.max));
+        const cutoff = dateCutoff();
+        if (cutoff) params.set('publishedAfter', cutoff.toISOString());
+        if (isLoadMore && cursor) params.set('cursor', cursor);
+
+        const response = await fetch(`${SCOUT_API_URL}/outliers?${params}`);
+        const data = await response.json();
+        if (!response.ok) throw new Error(data.error || `Scout returned ${response.status}`);
+        return { rows: data.items || [], nextCursor: data.next_cursor, hasMore: !!data.next_cursor };
+    };
 
-        if (!supabase) {
-            setLoading(false);
-            return;
+    // Fallback when the scout service is unreachable
+    const fetchFromSupabase = async (isLoadMore) => {
+        // Join with os_channels to get name
+        let query = supabase
+            .from('os_outliers')
+            .select('*, os_channels(name)')
+            .gte('outlier_score', minScore);
+
+        // Apply Search
+        if (search) {
+            query = query.ilike('title', `%${search}%`);
         }
 
-        try {
-            // Join with os_channels to get name
-            let query = supabase
-                .from('os_outliers')
-                .select('*, os_channels(name)')
-                .gte('outlier_score', minScore);
-
-            // Apply Search
-            if (search) {
-                query = query.ilike('title', `%${search}%`);
-            }
+        // Apply View Range
+        if (viewRange.min) query = query.gte('views', parseInt(viewRange.min));
+        if (viewRange.max) query = query.lte('views', parseInt(viewRange.max));
 
-            // Apply View Range
-            if (viewRange.min) query = query.gte('views', parseInt(viewRange.min));
-            if (viewRange.max) query = query.lte('views', parseInt(viewRange.max));
+        // Apply Date Filter
+        const cutoff = dateCutoff();
+        if (cutoff) query = query.gte('published_at', cutoff.toISOString());
 
-            // Apply Date Filter
-            if (dateFilter !== 'any') {
-                const date = new Date();
-                if (dateFilter === '6months') date.setMonth(date.getMonth() - 6);
-                else if (dateFilter === 'year') date.setFullYear(date.getFullYear() - 1);
-                else if (dateFilter === '3years') date.setFullYear(date.getFullYear() - 3);
+        // Apply Sort
+        if (sortBy === 'score') {
+            query = query.order('outlier_score', { ascending: false });
+        } else {
+            query = query.order('views', { ascending: false });
+        }
+        // Apply Pagination
+        const from = (isLoadMore ? page + 1 : 0) * PAGE_SIZE;
+        const to = from + PAGE_SIZE - 1;
+        query = query.range(from, to);
 
-                query = query.gte('published_at', date.toISOString());
-            }
+        const { data, error } = await query;
 
-            // Apply Sort
-            if (sortBy === 'score') {
-                query = query.order('outlier_score', { ascending: false });
-            } else {
-                query = query.order('views', { ascending: false });
-            }
-            // Apply Pagination
-            const from = (isLoadMore ? page + 1 : 0) * PAGE_SIZE;
-            const to = from + PAGE_SIZE - 1;
-            query = query.range(from, to);
+        if (error) throw error;
+        return { rows: data || [], nextCursor: null, hasMore: data?.length === PAGE_SIZE };
+    };
 
-            const { data, error } = await query;
+    const fetchOutliers = async (isLoadMore = false) => {
+        if (!isLoadMore) setLoading(true);
 
-            if (error) throw error;
+        try {
+            let result;
+            try {
+                result = await fetchFromScout(isLoadMore);
+            } catch (scoutError) {
+                if (!supabase) throw scoutError;
+                console.warn('Scout outlier index unavailable, reading Supabase:', scoutError);
+                result = await fetchFromSupabase(isLoadMore);
+            }
 
             if (isLoadMore) {
-                setOutliers(prev => [...prev, ...(data || [])]);
+                // Rows streamed in by a scout may already be on screen
+                setOutliers(prev => {
+                    const ids = new Set(prev.map(row => row.video_id));
+                    return [...prev, ...result.rows.filter(row => !ids.has(row.video_id))];
+                });
                 setPage(prev => prev + 1);
             } else {
-                setOutliers(data || []);
+                setOutliers(result.rows);
                 setPage(0);
             }
 
-            setHasMore(data?.length === PAGE_SIZE);
+            setCursor(result.nextCursor);
+            setHasMore(result.hasMore);
 
         } catch (error) {
             console.error('Error fetching outliers:', error);
@@ -119,7 +179,7 @@ const OutlierGallery = ({ isPublic = false }) => {
                 observer.unobserve(observerTarget.current);
             }
         };
-    }, [hasMore, loading, page]);
+    }, [hasMore, loading, page, cursor]);
 
     // Debounce search and filter changes
     useEffect(() => {
@@ -129,6 +189,38 @@ const OutlierGallery = ({ isPublic = false }) => {
         return () => clearTimeout(timer);
     }, [search, minScore, sortBy, viewRange, dateFilter]);
 
+    const dateCutoff = () => {
+        if (dateFilter === 'any') return null;
+        const date = new Date();
+        if (dateFilter === '6months') date.setMonth(date.getMonth() - 6);
+        else if (dateFilter === 'year') date.setFullYear(date.getFullYear() - 1);
+        else if (dateFilter === '3years') date.setFullYear(date.getFullYear() - 3);
+        return date;
+    };
+
+    // Same filters as fetchOutliers, applied to rows streamed in by the scout
+    const matchesFilters = (row) => {
+        const cutoff = dateCutoff();
+        return (row.outlier_score || 0) >= minScore
+            && (!search || (row.title || '').toLowerCase().includes(search.toLowerCase()))
+            && (!viewRange.min || (row.views || 0) >= parseInt(viewRange.min))
+            && (!viewRange.max || (row.views || 0) <= parseInt(viewRange.max))
+            && (!cutoff || (row.published_at && new Date(row.published_at) >= cutoff));
+    };
+
+    const mergeOutliers = (rows, channel) => {
+        const fresh = (rows || [])
+            .filter(row => row.video_id && matchesFilters(row))
+            .map(row => ({ ...row, os_channels: channel ? { name: channel.name, avatar_url: channel.avatar_url } : null }));
+        if (fresh.length === 0) return;
+        const sortKey = sortBy === 'score' ? 'outlier_score' : 'views';
+        setOutliers(prev => {
+            const ids = new Set(fresh.map(row => row.video_id));
+            return [...fresh, ...prev.filter(row => !ids.has(row.video_id))]
+                .sort((a, b) => (b[sortKey] || 0) - (a[sortKey] || 0));
+        });
+    };
+
     const handleScout = async () => {
         if (!channelUrl) return;
 
@@ -148,35 +240,69 @@ const OutlierGallery = ({ isPublic = false }) => {
         setScoutingStatus(`Initializing batch of ${urls.length} channels...`);
         setScoutLog([]);
 
-        const SCOUT_API_URL = import.meta.env.VITE_SCOUT_API_URL || 'http://localhost:5000';
-
         try {
-            // 1. Add ALL to Supabase Queue
-            if (supabase) {
-                const upserts = urls.map(u => ({ url: u, last_scouted: null }));
-                const { error } = await supabase
-                    .from('os_channels')
-                    .upsert(upserts, { onConflict: 'url' });
-                if (error) console.warn(`Supabase upsert warning:`, error);
-            }
-
-            // 2. Call Scout Service ONCE with list
+            // 1. Call Scout Service ONCE with list, streaming each channel's results as it finishes.
+            // The scout creates the os_channels rows itself, under each channel's canonical URL,
+            // so different spellings of one channel don't leave duplicate rows behind.
             setScoutingStatus(`Scouting ${urls.length} channels... (This may take a while)`);
 
-            const response = await fetch(`${SCOUT_API_URL}/scout`, {
+            let response = await fetch(`${SCOUT_API_URL}/scout?stream=ndjson`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ channelUrls: urls }),
-                signal: AbortSignal.timeout(1200000) // 20 minutes timeout for batch
+                body: JSON.stringify({ channelUrls: urls })
             });
 
-            const data = await response.json();
-
             if (!response.ok) {
+                const data = await response.json().catch(() => ({}));
                 throw new Error(data.error || 'Scouting failed');
             }
 
-            setScoutLog(prev => [...prev, `✅ Batch Complete!`]);
+            // 2. Merge rows into the grid as channels finish; reconnect from the last event if the stream drops
+            let jobId = null;
+            let total = urls.length;
+            let lastSeq = 0;
+            let finished = null;
+            let completed = 0;
+            let found = 0;
+            const onEvent = (event) => {
+                if (event.type === 'job_started') {
+                    jobId = event.job_id;
+                    total = event.total_channels || total;
+                    return;
+                }
+                if (event.seq) lastSeq = Math.max(lastSeq, event.seq);
+                if (event.type === 'channel') {
+                    completed += 1;
+                    found += event.outliers_count ?? event.outliers.length;
+                    setProgress(Math.round((completed / total) * 100));
+                    setScoutingStatus(`Scouted ${completed}/${total} channels, ${found} outliers found...`);
+                    mergeOutliers(event.outliers, event.channel);
+                    if (event.status !== 'done' && event.error) {
+                        setScoutLog(prev => [...prev, `❌ ${event.channel_url}: ${event.error}`]);
+                    }
+                } else if (event.type === 'job') {
+                    finished = event;
+                }
+            };
+
+            const deadline = Date.now() + 1200000; // 20 minutes max for batch
+            while (!finished && Date.now() < deadline) {
+                try {
+                    await readNdjson(response, onEvent);
+                } catch (streamError) {
+                    console.warn('Scout stream dropped, reconnecting:', streamError);
+                }
+                if (finished || !jobId) break;
+                await new Promise(resolve => setTimeout(resolve, 2000));
+                response = await fetch(`${SCOUT_API_URL}/jobs/${jobId}/events?format=ndjson&since=${lastSeq}`);
+                if (!response.ok) break;
+            }
+
+            if (!finished || finished.status === 'failed') {
+                throw new Error(finished?.error || 'Scouting stream ended before the batch finished');
+            }
+
+            setScoutLog(prev => [...prev, `✅ Batch Complete! ${found} outliers found`]);
             setScoutingStatus(`Batch Complete!`);
 
         } catch (e) {
@@ -185,7 +311,6 @@ const OutlierGallery = ({ isPublic = false }) => {
             setScoutingStatus(`Batch Failed`);
         } finally {
             setProgress(100);
-            fetchOutliers();
             setIsScouting(false);
             setChannelUrl('');
             setTimeout(() => setScoutingStatus(''), 10000);
@@ -196,12 +321,17 @@ const OutlierGallery = ({ isPublic = false }) => {
     const handleDelete = async (videoId) => {
         if (!confirm('Are you sure you want to delete this outlier?')) return;
 
-        if (supabase) {
-            await supabase.from('os_outliers').delete().eq('video_id', videoId);
-            setOutliers(prev => prev.filter(o => o.video_id !== videoId));
-        } else {
-            setOutliers(prev => prev.filter(o => o.video_id !== videoId));
+        try {
+            // Through the scout, so its outlier index drops the row right away
+            const response = await fetch(`${SCOUT_API_URL}/outliers/${encodeURIComponent(videoId)}`, { method: 'DELETE' });
+            if (!response.ok) throw new Error(`Scout returned ${response.status}`);
+        } catch (scoutError) {
+            console.warn('Scout unavailable, deleting from Supabase directly:', scoutError);
+            if (supabase) {
+                await supabase.from('os_outliers').delete().eq('video_id', videoId);
+            }
         }
+        setOutliers(prev => prev.filter(o => o.video_id !== videoId));
     };
 
     return (
@@ -367,10 +497,11 @@ const OutlierGallery = ({ isPublic = false }) => {
 
                                 <div className="relative aspect-video bg-[#0a0a0a] z-20 overflow-hidden">
                                     <img
-                                        src={video.thumbnail?.startsWith('data:image') ? video.thumbnail : (video.thumbnail || video.thumbnail_url || '/assets/placeholder.svg')}
+                                        src={thumbnailSrc(video)}
                                         alt={video.title}
+                                        loading="lazy"
                                         className="w-full h-full object-cover object-center group-hover:scale-105 transition-transform duration-500"
-                                        onError={(e) => { e.target.src = 'https://placehold.co/1280x720/0a0a0a/ff982b?text=No+Thumbnail'; }}
+                                        onError={(e) => handleThumbnailError(e, video)}
                                     />
                                     <div className="absolute bottom-2 right-2 px-3 py-1.5 rounded-lg bg-black/90 border border-white/10 shadow-xl animate-[pulse-scale_2s_ease-in-out_infinite] z-50 group-hover:bg-white group-hover:border-transparent transition-all duration-300">
                                         <span className="text-lg font-black bg-gradient-to-r from-[#ff982b] to-[#ff6b00] text-transparent bg-clip-text group-hover:text-black">
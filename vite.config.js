@@ -77,7 +77,13 @@ export default defineConfig({
             // Strategy -1: Python youtube-transcript-api (Most Reliable)
             try {
               console.log(`[Vite Proxy] Strategy -1: Attempting Python youtube-transcript-api...`);
-              const transcript = await new Promise((resolve, reject) => {
+              const transcript = await fetch(`http://127.0.0.1:${process.env.TRANSCRIPT_SERVICE_PORT || 5055}/transcript/${videoId}`, {
+                signal: AbortSignal.timeout(60000)
+              })
+                .then(r => r.json())
+                .then(result => result.transcript)
+                .catch(() => null) // Service not running: fall back to a one-off process
+                || await new Promise((resolve, reject) => {
                 exec(`python scripts/get_transcript.py ${videoId}`, (error, stdout, stderr) => {
                   if (error) {
                     reject(error);